@@ -1,6 +1,7 @@
 from japanrealestate.incometaxcalc import IncomeTaxCalc
 from japanrealestate.realestatecalc import RealEstateCalc
 import csv
+import datetime as dt
 
 """
 This is an example of using the calculators to do due diligence on some property.
@@ -12,10 +13,11 @@ The calculator is run over several years and output is printed to CSV files.
 
 decent_income_tax_calc = IncomeTaxCalc(
     employment_income=20000000,
+    current_date=dt.date(2017, 1, 1),
     is_resident_for_tax_purposes=True,
 )
 
-zero_income_tax_calc = IncomeTaxCalc()
+zero_income_tax_calc = IncomeTaxCalc(current_date=dt.date(2017, 1, 1))
 
 output_file_name_to_income_tax_calc = {
     'example_csv_output_20m_salary.csv': decent_income_tax_calc,
@@ -26,6 +28,7 @@ output_file_name_to_income_tax_calc = {
 # We do not specify a sales price so the model will resort to book value, which is a conservative estimate assuming
 # no capital gains and that the property depreciates to zero value over its useful life
 real_estate_calc = RealEstateCalc(
+    purchase_date=dt.date(2017, 1, 1),
     purchase_price=68000000,
     building_to_land_ratio=0.3,
     size=62.06,
@@ -74,16 +77,19 @@ for output_file_name, inc_calc in output_file_name_to_income_tax_calc.items():
     output = [header]
     real_estate_calc.income_tax_calculator = inc_calc
 
-    for calc_year in range(0, 40):
-        real_estate_calc.calc_year = calc_year
-        real_estate_calc.calculate_all_fields()
+    real_estate_calc.calculate_all_fields()
+
+    # All 40 years are calculated in a single pass, each field being a NumPy array indexed by calc_year
+    projected = real_estate_calc.project(horizon=39)
+
+    for calc_year in projected['calc_year']:
         row = [
             real_estate_calc.purchase_date.year + calc_year,
-            real_estate_calc.net_income_after_taxes,
-            real_estate_calc.book_value,
-            real_estate_calc.cumulative_net_income,
-            real_estate_calc.equity_value,
-            real_estate_calc.net_profit_on_realestate
+            projected['net_income_after_taxes'][calc_year],
+            projected['book_value'][calc_year],
+            projected['cumulative_net_income'][calc_year],
+            projected['equity_value'][calc_year],
+            projected['net_profit_on_realestate'][calc_year]
         ]
         output.append(row)
 
@@ -91,6 +97,7 @@ for output_file_name, inc_calc in output_file_name_to_income_tax_calc.items():
         csv_writer = csv.writer(
             csv_file,
             delimiter=',',
+            lineterminator='\n',
         )
 
         for row in output:
@@ -0,0 +1,3 @@
+from japanrealestate.cli import main
+
+main()
@@ -0,0 +1,149 @@
+"""
+Command line interface to evaluate files of scenarios, e.g.
+   japanrealestate listings.jsonl --output results.csv --fields net_income_after_taxes,net_profit_on_realestate
+
+Scenarios are read one at a time from JSONL (one scenario per line, in the shape of examples/config1.json) or CSV (one
+scenario per row, with a column per input of RealEstateCalc or IncomeTaxCalc, whose values are parsed as JSON, e.g.
+true or 0.9, or kept as strings, e.g. 2017-01-24 for dates). They are evaluated by a SweepRunner, and the results are
+written to CSV or JSONL as they are produced, so memory use does not depend on the size of the files.
+"""
+
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.realestatecalc import RealEstateCalc
+from japanrealestate.resultcache import SQLiteResultCache
+from japanrealestate.sweeprunner import SweepRunner
+import argparse
+import contextlib
+import csv
+import datetime as dt
+import inspect
+import json
+import sys
+
+_FORMATS = ('jsonl', 'csv')
+
+
+def _parameter_names(calculator_class):
+    """Returns the names of the inputs of calculator_class"""
+    return set(inspect.signature(calculator_class.__init__).parameters) - {'self', 'outputs', 'income_tax_calculator'}
+
+
+def _parse_value(text):
+    """Returns the value of a CSV field: its JSON value if it is valid JSON, or else the text itself"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def read_scenarios(lines, input_format='jsonl'):
+    """
+    Yields the scenarios (see sweeprunner.scenario_calculators) read from an iterable of lines (e.g. a file object).
+
+    :param input_format: 'jsonl' or 'csv'. Columns of CSV files are inputs of RealEstateCalc or IncomeTaxCalc (inputs of
+           both, such as is_resident_for_tax_purposes, are given to both). Rows without any input which is only an
+           input of IncomeTaxCalc have no income taxes. Empty fields are left to their default value.
+    """
+    if input_format == 'jsonl':
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+        return
+
+    real_estate_calc_params = _parameter_names(RealEstateCalc)
+    income_tax_calc_params = _parameter_names(IncomeTaxCalc)
+    reader = csv.DictReader(lines)
+    unknown_columns = set(reader.fieldnames or []) - real_estate_calc_params - income_tax_calc_params
+    if unknown_columns:
+        raise ValueError("'{}' is not an input of RealEstateCalc or IncomeTaxCalc".format(sorted(unknown_columns)[0]))
+
+    for row in reader:
+        values = {column: _parse_value(text) for column, text in row.items() if text != ''}
+        scenario = {'real_estate_calc_params': {name: value for name, value in values.items()
+                                                if name in real_estate_calc_params}}
+        if not income_tax_calc_params.isdisjoint(values.keys() - real_estate_calc_params):
+            scenario['income_tax_calc_params'] = {name: value for name, value in values.items()
+                                                  if name in income_tax_calc_params}
+        yield scenario
+
+
+def _json_default(value):
+    """JSON form of the values which are not JSON types (dates)"""
+    if isinstance(value, dt.date):
+        return value.isoformat()
+    raise TypeError("{} is not JSON serializable".format(type(value).__name__))
+
+
+def write_results(results, file, output_format='csv', per_year=False):
+    """
+    Writes (index of scenario, result) tuples (see SweepRunner.run) to file as they are produced, one line per scenario
+    (or per year of each scenario if per_year), with the index of the scenario under 'scenario'.
+
+    :param output_format: 'csv' or 'jsonl'. The columns of CSV files are those of the first result.
+    """
+    writer = None
+    for index, result in results:
+        for row in (result if per_year else [result]):
+            row = dict(scenario=index, **row)
+            if output_format == 'jsonl':
+                file.write(json.dumps(row, default=_json_default) + '\n')
+            else:
+                if writer is None:
+                    writer = csv.DictWriter(file, fieldnames=list(row), lineterminator='\n')
+                    writer.writeheader()
+                writer.writerow(row)
+
+
+def _format(path, explicit_format, default_format):
+    """Returns the explicit format, or else the format of the extension of path, or else the default format"""
+    if explicit_format is not None:
+        return explicit_format
+    for file_format in _FORMATS:
+        if path.lower().endswith('.' + file_format):
+            return file_format
+    return default_format
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog='japanrealestate', description='Evaluates files of real estate scenarios.')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='JSONL or CSV file of scenarios, or - (default) for standard input')
+    parser.add_argument('-o', '--output', default='-', help='CSV or JSONL file of results, or - (default) for standard '
+                                                           'output')
+    parser.add_argument('--input-format', choices=_FORMATS, help='Defaults to the extension of input, or else jsonl')
+    parser.add_argument('--output-format', choices=_FORMATS, help='Defaults to the extension of output, or else csv')
+    parser.add_argument('-f', '--fields', help='Comma separated names of the fields of RealEstateCalc to output. '
+                                               'Defaults to all of them (all year-varying fields with --per-year)')
+    parser.add_argument('--per-year', action='store_true',
+                        help='Output a row for every year from 0 until the calc_year of each scenario')
+    parser.add_argument('-w', '--workers', type=int, help='Number of worker processes. Defaults to the number of CPUs')
+    parser.add_argument('--chunk-size', type=int, default=100, help='Number of scenarios sent to a worker per task')
+    parser.add_argument('--unordered', action='store_true',
+                        help='Output results as soon as they are available, rather than in the order of the input')
+    parser.add_argument('--cache', help='SQLite file of a cache of results (see SQLiteResultCache)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Entry point of the japanrealestate command"""
+    args = _parse_args(argv)
+    fields = args.fields.split(',') if args.fields else None
+
+    with contextlib.ExitStack() as stack:
+        if args.input == '-':
+            input_file = sys.stdin
+        else:
+            input_file = stack.enter_context(open(args.input, newline=''))
+        if args.output == '-':
+            output_file = sys.stdout
+        else:
+            output_file = stack.enter_context(open(args.output, 'w', newline=''))
+        cache = stack.enter_context(SQLiteResultCache(args.cache)) if args.cache else None
+        runner = stack.enter_context(SweepRunner(max_workers=args.workers, chunk_size=args.chunk_size, outputs=fields,
+                                                 cache=cache, per_year=args.per_year))
+
+        scenarios = read_scenarios(input_file, _format(args.input, args.input_format, 'jsonl'))
+        write_results(runner.run(scenarios, ordered=not args.unordered),
+                      output_file,
+                      _format(args.output, args.output_format, 'csv'),
+                      per_year=args.per_year)
@@ -0,0 +1,73 @@
+class DependencyGraph:
+    """
+    Declared dependencies between the fields of a calculator class (e.g. RealEstateCalc), used to only recalculate the
+    derived fields affected by a change (downstream), or to only calculate the derived fields required for some outputs
+    (upstream), rather than all of them.
+
+    Each derived field is calculated by the _calculate_<field> method of the calculator, from the fields it depends on
+    (inputs or other derived fields). Derived fields must be declared in calculation order, i.e. the order in which
+    calculate_all_fields() calls the _calculate_* methods, so every derived field only depends on fields declared
+    before it. A derived field can depend on itself, for inputs which are defaulted when None (e.g. purchase_date).
+    """
+
+    def __init__(self, dependencies):
+        """
+        :param dependencies: List of (derived field, list of fields it depends on) tuples, in calculation order
+        """
+        self.dependencies = dict(dependencies)
+        self.fields = [field for field, _ in dependencies]  # Derived fields in calculation order
+
+        self._downstream_fields = {}  # Cache of downstream(), keyed on frozenset of changed fields
+        self._upstream_fields = {}  # Cache of upstream(), keyed on frozenset of required fields
+
+        calculated_fields = set()
+        for field, field_dependencies in dependencies:
+            for dependency in field_dependencies:
+                if dependency in self.dependencies and dependency not in calculated_fields and dependency != field:
+                    raise ValueError("'{}' depends on '{}' which is calculated after it".format(field, dependency))
+            calculated_fields.add(field)
+
+        # All derived fields and their dependencies
+        self.known_fields = set(self.fields).union(*self.dependencies.values())
+
+    def downstream(self, changed_fields):
+        """
+        Returns the derived fields which depend (directly or indirectly) on any of the changed fields, in calculation
+        order. A changed derived field (i.e. an overridden value) is not itself included, unless it depends on itself.
+        """
+        key = frozenset(changed_fields)
+        if key not in self._downstream_fields:
+            unknown_fields = key - self.known_fields
+            if unknown_fields:
+                raise ValueError("'{}' is not a known field".format(sorted(unknown_fields)[0]))
+
+            dirty_fields = set(key)
+            downstream_fields = []
+            for field in self.fields:
+                if not dirty_fields.isdisjoint(self.dependencies[field]):
+                    downstream_fields.append(field)
+                    dirty_fields.add(field)
+            self._downstream_fields[key] = downstream_fields
+
+        return self._downstream_fields[key]
+
+    def upstream(self, fields):
+        """
+        Returns the derived fields required to calculate the input fields (directly or indirectly), including the input
+        fields themselves if they are derived fields, in calculation order.
+        """
+        key = frozenset(fields)
+        if key not in self._upstream_fields:
+            unknown_fields = key - self.known_fields
+            if unknown_fields:
+                raise ValueError("'{}' is not a known field".format(sorted(unknown_fields)[0]))
+
+            required_fields = set(key)
+            upstream_fields = []
+            for field in reversed(self.fields):
+                if field in required_fields:
+                    upstream_fields.append(field)
+                    required_fields.update(self.dependencies[field])
+            self._upstream_fields[key] = upstream_fields[::-1]
+
+        return self._upstream_fields[key]
@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class DepreciationSchedule:
+    """
+    Class to represent the straight-line depreciation of one or more components of a building (e.g. the building body
+    and its equipment, which have different useful lives). Each component is depreciated by its annual amount every
+    year from year 0 until its number of years is reached.
+
+    The depreciation of any year, and the cumulative depreciation from year 0 until any year, are calculated in
+    constant time from the annual amounts and years of the components, rather than by summing up every year.
+
+    The annual amounts and years of each component can be NumPy arrays (one element per scenario), as used by
+    RealEstateCalcBatch, in which case the year can also be an array and all results are arrays. With numbers, results
+    are numbers (e.g. integers when the annual amounts are integers).
+    """
+
+    def __init__(
+            self,
+            annual_amount=0,
+            years=0,
+    ):
+        """
+        :param annual_amount: Annual depreciation amount of each component: a number (or array) for a single component,
+               or a list with one element per component.
+        :param years: Number of years each component is depreciated for, in the same format as annual_amount.
+        """
+
+        # Initialize class fields from arguments
+        self.annual_amount = annual_amount
+        self.years = years
+
+        # Derived fields that will be calculated
+        self.components = None  # List of (annual_amount, years) tuples, one per component
+        self.total_depreciation = None  # Depreciation over the years of all components
+
+        # Calculate!
+        self.calculate_all_fields()
+
+    def calculate_all_fields(self):
+        """Calculate value for all derived fields"""
+        self._calculate_components()
+        self._calculate_total_depreciation()
+
+    def __eq__(self, other):
+        """Schedules are equal when their components have the same annual amounts and years"""
+        if not isinstance(other, DepreciationSchedule):
+            return NotImplemented
+        return len(self.components) == len(other.components) and all(
+            np.array_equal(annual_amount, other_annual_amount) and np.array_equal(years, other_years)
+            for (annual_amount, years), (other_annual_amount, other_years) in zip(self.components, other.components)
+        )
+
+    def depreciation_for_year(self, year):
+        """Returns the depreciation amount for input year"""
+        return sum(annual_amount * (year < years) for annual_amount, years in self.components)
+
+    def cumulative_depreciation_for_year(self, year):
+        """Returns the sum of depreciation amounts for every year from 0 until input year (inclusive)"""
+        return sum(annual_amount * self._depreciable_years(year, years) for annual_amount, years in self.components)
+
+    @staticmethod
+    def _depreciable_years(year, years):
+        """Number of years from 0 until year (inclusive) which are within the years of a component"""
+        depreciable_years = np.clip(np.minimum(np.asarray(year) + 1, years), 0, None)
+        if np.ndim(depreciable_years) == 0:
+            return int(depreciable_years)
+        return depreciable_years
+
+    def _calculate_components(self):
+        if isinstance(self.annual_amount, (list, tuple)):
+            if len(self.annual_amount) != len(self.years):
+                raise ValueError("annual_amount and years must have one element per component")
+            self.components = list(zip(self.annual_amount, self.years))
+        else:
+            self.components = [(self.annual_amount, self.years)]
+
+    def _calculate_total_depreciation(self):
+        self.total_depreciation = sum(annual_amount * years for annual_amount, years in self.components)
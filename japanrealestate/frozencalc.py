@@ -0,0 +1,65 @@
+"""
+Functional evaluation of RealEstateCalc, from immutable inputs to an immutable result, e.g. to evaluate variants of a
+base scenario concurrently from a concurrent.futures.ThreadPoolExecutor:
+   base = RealEstateInputs(purchase_price=100000000, ...)
+   variants = [base._replace(monthly_fees=monthly_fees) for monthly_fees in range(10000, 50000, 1000)]
+   with ThreadPoolExecutor() as executor:
+       results = list(executor.map(evaluate, variants, itertools.repeat(IncomeTaxInputs(employment_income=20000000))))
+
+The calculators mutate themselves as they calculate (including inputs defaulted when None, e.g. purchase_date), so
+sharing a calculator between threads is not safe. evaluate() instead calculates new calculators private to the call,
+from inputs which cannot be modified, and returns their fields as a result which cannot be modified either. The only
+state shared between calls is read-only (the tax tables of the calculator classes), memoized idempotently (the
+dependency graphs) or locked (RealEstateCalc.mortgage_cache), so calls can run concurrently from any number of
+threads, including on free-threaded builds of CPython where they run in parallel.
+"""
+
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.realestatecalc import RealEstateCalc
+from collections import namedtuple
+import inspect
+
+# Fields of RealEstateCalc holding mutable objects (other calculators), which are not part of results
+_MUTABLE_FIELDS = ('income_tax_calculator', 'mortgage', 'depreciation_schedule')
+
+
+def _parameters(calculator_class):
+    """Returns the inputs of calculator_class and their default values, as a list of (name, default) tuples"""
+    parameters = inspect.signature(calculator_class.__init__).parameters
+    return [(name, parameter.default) for name, parameter in parameters.items()
+            if name not in ('self', 'outputs', 'income_tax_calculator')]
+
+
+def _namedtuple(name, parameters):
+    return namedtuple(name, [name for name, _ in parameters], defaults=[default for _, default in parameters])
+
+
+# Inputs of RealEstateCalc (except income_tax_calculator, see evaluate), with the same defaults
+RealEstateInputs = _namedtuple('RealEstateInputs', _parameters(RealEstateCalc))
+
+# Inputs of IncomeTaxCalc, with the same defaults
+IncomeTaxInputs = _namedtuple('IncomeTaxInputs', _parameters(IncomeTaxCalc))
+
+# Inputs (as used by the calculation, e.g. with purchase_date defaulted) and derived fields of RealEstateCalc
+RealEstateResult = namedtuple('RealEstateResult', list(RealEstateInputs._fields) + [
+    field for field in RealEstateCalc._DEPENDENCY_GRAPH.fields
+    if field not in RealEstateInputs._fields and field not in _MUTABLE_FIELDS
+])
+
+
+def evaluate(real_estate_inputs, income_tax_inputs=None, outputs=None):
+    """
+    Returns the RealEstateResult of the inputs. Thread-safe.
+
+    :param real_estate_inputs: RealEstateInputs of the property.
+    :param income_tax_inputs: IncomeTaxInputs of the owner, or None for no income taxes.
+    :param outputs: Names of the derived fields to calculate (see RealEstateCalc). The other derived fields are None.
+           Defaults to all fields.
+    """
+    income_tax_calc = None
+    if income_tax_inputs is not None:
+        income_tax_calc = IncomeTaxCalc(**income_tax_inputs._asdict())
+
+    real_estate_calc = RealEstateCalc(income_tax_calculator=income_tax_calc, outputs=outputs,
+                                      **real_estate_inputs._asdict())
+    return RealEstateResult(**{field: getattr(real_estate_calc, field) for field in RealEstateResult._fields})
@@ -0,0 +1,156 @@
+from japanrealestate.realestatecalcbatch import RealEstateCalcBatch
+import numpy as np
+
+
+class GoalSeek:
+    """
+    Class to solve for the value of an input of a batch calculator (RealEstateCalcBatch or IncomeTaxCalcBatch) which
+    makes one of its outputs equal to a target, for many scenarios at once, e.g. the gross_rental_yield where
+    net_income_after_taxes is 0, the purchase_price giving an IRR of 5%, or the employment_income giving a target
+    net_income_after_tax.
+
+    The output must be monotone in the input between lower and upper (the bracket is moved up, by steps of increasing
+    size, for scenarios where the output does not cross the target in the bracket). Every iteration evaluates a single
+    batch for all scenarios, using the Illinois variant of regula falsi: the input is interpolated linearly between the
+    ends of the bracket. The outputs are piecewise linear in most inputs (e.g. tax tables are linear within each
+    bracket), so interpolation is usually exact within a couple of iterations, while the Illinois adjustment and a
+    fallback to bisection guarantee that the bracket keeps shrinking across the kinks and steps (e.g. truncation to
+    whole yen) of the calculation.
+
+    Scenarios without a solution in the bracket get NaN.
+    """
+
+    def __init__(
+            self,
+            calculator_class=RealEstateCalcBatch,
+            inputs=None,
+            parameter=None,
+            output=None,
+            target=0,
+            lower=None,
+            upper=None,
+            output_tolerance=0,
+            max_iterations=100,
+    ):
+        """
+        :param calculator_class: Batch calculator class (RealEstateCalcBatch or IncomeTaxCalcBatch).
+        :param inputs: Dict of the other inputs of calculator_class, which can be arrays (one element per scenario).
+        :param parameter: Name of the input to solve for.
+        :param output: Name of the derived field of calculator_class to match to the target, or of one of its methods
+               without arguments (e.g. 'irr' of RealEstateCalcBatch).
+        :param target: Target value of output (can be an array).
+        :param lower: Lower end of the initial bracket of parameter (can be an array).
+        :param upper: Upper end of the initial bracket of parameter (can be an array).
+        :param output_tolerance: A scenario is solved once its output is within output_tolerance of the target (or once
+               its bracket cannot be narrowed any further).
+        :param max_iterations: Maximum number of batch evaluations.
+        """
+
+        # Initialize class fields from arguments
+        self.calculator_class = calculator_class
+        self.inputs = inputs or {}
+        self.parameter = parameter
+        self.output = output
+        self.target = target
+        self.lower = lower
+        self.upper = upper
+        self.output_tolerance = output_tolerance
+        self.max_iterations = max_iterations
+
+        # Derived fields that will be calculated (arrays with one element per scenario)
+        self.evaluations = None  # Number of batch evaluations
+        self.solution = None  # Value of parameter, NaN where there is no solution in the bracket
+        self.value = None  # Value of output at solution
+        self.is_converged = None  # False where there is no solution or max_iterations was reached
+
+        # Calculate!
+        self.calculate_all_fields()
+
+    # Maximum number of batch evaluations to move the bracket up when the target is not crossed
+    _MAX_BRACKET_EXPANSIONS = 10
+
+    def calculate_all_fields(self):
+        """Calculate value for all derived fields"""
+        self._calculate_solution()
+
+    def _evaluate(self, parameter_values):
+        """Returns the output of every scenario for the parameter values, less the target"""
+        calculator = self.calculator_class(**dict(self.inputs, **{self.parameter: parameter_values}))
+        self.evaluations += 1
+
+        values = getattr(calculator, self.output)
+        if callable(values):
+            values = values()
+        return np.asarray(values, dtype=float) - self.target
+
+    def _calculate_solution(self):
+        self.evaluations = 0
+        residual_low = self._evaluate(self.lower)
+        residual_high = self._evaluate(self.upper)
+        shape = np.broadcast(residual_low, residual_high).shape
+        low = np.broadcast_to(np.asarray(self.lower, dtype=float), shape).copy()
+        high = np.broadcast_to(np.asarray(self.upper, dtype=float), shape).copy()
+        residual_low = np.broadcast_to(residual_low, shape).copy()
+        residual_high = np.broadcast_to(residual_high, shape).copy()
+
+        # Move the bracket up by steps of increasing size, and smaller steps where the output is not defined (NaN)
+        step = high - low
+        for _ in range(self._MAX_BRACKET_EXPANSIONS):
+            is_not_bracketed = np.sign(residual_low) * np.sign(residual_high) > 0
+            if not is_not_bracketed.any():
+                break
+            candidate = np.where(is_not_bracketed, high + step, high)
+            residual_candidate = self._evaluate(candidate)
+
+            is_valid = is_not_bracketed & np.isfinite(residual_candidate)
+            low, residual_low = np.where(is_valid, high, low), np.where(is_valid, residual_high, residual_low)
+            high = np.where(is_valid, candidate, high)
+            residual_high = np.where(is_valid, residual_candidate, residual_high)
+            step = np.where(is_valid, step * 2, np.where(is_not_bracketed, step / 2, step))
+        is_bracketed = np.sign(residual_low) * np.sign(residual_high) <= 0
+
+        # Best point found so far for every scenario
+        is_low_best = np.abs(residual_low) <= np.abs(residual_high)
+        solution = np.where(is_low_best, low, high)
+        residual = np.where(is_low_best, residual_low, residual_high)
+
+        previous_side = np.zeros(shape)  # Side of the bracket replaced by the previous iteration (-1 low, 1 high)
+        for _ in range(self.max_iterations - self.evaluations):
+            is_bracket_collapsed = np.abs(high - low) <= 4 * np.finfo(float).eps * np.maximum(np.abs(low), np.abs(high))
+            is_converged = (np.abs(residual) <= self.output_tolerance) | is_bracket_collapsed
+            if (is_converged | ~is_bracketed).all():
+                break
+
+            # Regula falsi, falling back to bisection where the interpolation is not strictly inside the bracket
+            with np.errstate(divide='ignore', invalid='ignore'):
+                interpolated = high - residual_high * (high - low) / (residual_high - residual_low)
+            is_inside = (np.isfinite(interpolated) &
+                         (interpolated > np.minimum(low, high)) &
+                         (interpolated < np.maximum(low, high)))
+            candidate = np.where(is_inside, interpolated, (low + high) / 2)
+            candidate = np.where(is_converged | ~is_bracketed, solution, candidate)
+            residual_candidate = self._evaluate(candidate)
+
+            is_active = ~is_converged & is_bracketed
+            replaces_high = is_active & (np.sign(residual_candidate) == np.sign(residual_high))
+            replaces_low = is_active & ~replaces_high
+
+            # Illinois adjustment: halve the residual of an end which was kept twice in a row
+            residual_low = np.where(replaces_high & (previous_side == 1), residual_low / 2, residual_low)
+            residual_high = np.where(replaces_low & (previous_side == -1), residual_high / 2, residual_high)
+
+            high, residual_high = (np.where(replaces_high, candidate, high),
+                                   np.where(replaces_high, residual_candidate, residual_high))
+            low, residual_low = (np.where(replaces_low, candidate, low),
+                                 np.where(replaces_low, residual_candidate, residual_low))
+            previous_side = np.where(replaces_high, 1, np.where(replaces_low, -1, previous_side))
+
+            is_better = is_active & (np.abs(residual_candidate) < np.abs(residual))
+            solution = np.where(is_better, candidate, solution)
+            residual = np.where(is_better, residual_candidate, residual)
+        else:
+            is_converged = np.abs(residual) <= self.output_tolerance
+
+        self.solution = np.where(is_bracketed, solution, np.nan)
+        self.value = np.where(is_bracketed, residual + self.target, np.nan)
+        self.is_converged = is_bracketed & is_converged
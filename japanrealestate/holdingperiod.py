@@ -0,0 +1,104 @@
+from japanrealestate import returns
+from japanrealestate.projection import Projection
+import numpy as np
+
+
+class HoldingPeriod:
+    """
+    Class to find the best year to sell a property, from the returns of selling it at the end of every year from 0
+    until horizon.
+
+    Rather than recalculating a RealEstateCalc for every sale year, a single Projection is calculated until horizon
+    (including the switch from short to long term capital gains tax rates), and the cash flows of every sale year are
+    derived from it: the net income after taxes of every year before the sale, plus the sale proceeds net of the
+    outstanding mortgage in the sale year. The IRR of all sale years is then solved at once (see returns.irr).
+    """
+
+    def __init__(
+            self,
+            real_estate_calc=None,
+            horizon=50,
+            sale_price=None,
+    ):
+        """
+        :param real_estate_calc: Instance of RealEstateCalc() class whose fields have already been calculated.
+               It is not modified by this class.
+        :param horizon: Last sale year (inclusive) to consider.
+        :param sale_price: Price of property if sold at the end of each year. If None, the book value of each year is
+               used (see Projection).
+        """
+
+        # Initialize class fields from arguments
+        self.real_estate_calc = real_estate_calc
+        self.horizon = horizon
+        self.sale_price = sale_price
+
+        # Derived fields that will be calculated (arrays where element i represents a sale at the end of year i)
+        self.projection = None  # Projection of real_estate_calc until horizon
+        self.sale_year = None
+        self.cash_flows = None  # 2-D array (sale year x cash flow year), see RealEstateCalc.cash_flows
+        self.net_profit_on_realestate = None
+        self.irr = None  # NaN where there is no IRR (see returns.irr)
+        self.annualized_return = None  # Compounded yearly return of the equity multiple, NaN if all equity is lost
+
+        # Calculate!
+        self.calculate_all_fields()
+
+    def calculate_all_fields(self):
+        """Calculate value for all derived fields"""
+        self._calculate_projection()
+        self._calculate_sale_year()
+        self._calculate_cash_flows()
+        self._calculate_net_profit_on_realestate()
+        self._calculate_irr()
+        self._calculate_annualized_return()
+
+    # Metrics that can be maximized by optimal_sale_year()
+    _METRICS = ('net_profit_on_realestate', 'irr', 'annualized_return')
+
+    def optimal_sale_year(self, metric='irr'):
+        """
+        Returns the sale year with the highest value of metric ('net_profit_on_realestate', 'irr' or
+        'annualized_return'), or None if the metric is not defined for any year. The earliest year wins ties.
+        """
+        if metric not in self._METRICS:
+            raise ValueError("'{}' is not one of {}".format(metric, self._METRICS))
+
+        values = np.asarray(getattr(self, metric), dtype=float)
+        if np.isnan(values).all():
+            return None
+        return int(self.sale_year[np.nanargmax(values)])
+
+    def _calculate_projection(self):
+        self.projection = Projection(real_estate_calc=self.real_estate_calc,
+                                     horizon=self.horizon,
+                                     sale_price=self.sale_price,
+                                     fields=['net_income_after_taxes', 'sale_proceeds_net', 'mortgage_amount_outstanding',
+                                             'net_profit_on_realestate'])
+
+    def _calculate_sale_year(self):
+        self.sale_year = np.array(self.projection.calc_year, dtype=int)
+
+    def _calculate_cash_flows(self):
+        """Lower triangular: the cash flows of a sale in year i are the yearly net income until year i, then zeros"""
+        net_income_after_taxes = np.array(self.projection.net_income_after_taxes, dtype=np.int64)
+        num_years = len(self.sale_year)
+
+        self.cash_flows = np.zeros((num_years, num_years + 1), dtype=np.int64)
+        self.cash_flows[:, 0] = -self.real_estate_calc.purchase_initial_outlay
+        self.cash_flows[:, 1:] = np.tril(np.broadcast_to(net_income_after_taxes, (num_years, num_years)))
+        self.cash_flows[self.sale_year, self.sale_year + 1] += (np.array(self.projection.sale_proceeds_net) -
+                                                                np.array(self.projection.mortgage_amount_outstanding))
+
+    def _calculate_net_profit_on_realestate(self):
+        self.net_profit_on_realestate = np.array(self.projection.net_profit_on_realestate, dtype=np.int64)
+
+    def _calculate_irr(self):
+        self.irr = returns.irr(self.cash_flows)
+
+    def _calculate_annualized_return(self):
+        equity_multiple = returns.equity_multiple(self.cash_flows)
+        with np.errstate(invalid='ignore'):
+            self.annualized_return = np.where(equity_multiple > 0,
+                                              equity_multiple ** (1 / (self.sale_year + 1)) - 1,
+                                              np.nan)
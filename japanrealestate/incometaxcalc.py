@@ -1,7 +1,19 @@
 from japanrealestate import taxconstants
+from japanrealestate.dependencygraph import DependencyGraph
+import bisect
+import copy
 import datetime as dt
 
 
+def _compile_tax_table(rules):
+    """Compiles the bounds of a tax table into sorted lists of lower and upper bounds (both inclusive)"""
+    lower_bounds = [rule['bounds'][0] for rule in rules]
+    upper_bounds = [rule['bounds'][1] for rule in rules]
+    if lower_bounds != sorted(lower_bounds):
+        raise ValueError("Rules of tax table must be sorted by bounds")
+    return lower_bounds, upper_bounds
+
+
 # To do
 # Find out how constants are used in Python to avoid magic numbers? Is there any point to constants only used in one
 # method?
@@ -44,6 +56,7 @@ class IncomeTaxCalc:
             tax_deduction=0,
             is_resident_for_tax_purposes=True,
             current_date=None,
+            outputs=None,
      ):
         """
         :param employment_income: Annual income from employment (amount prior to rent program being taken out)
@@ -59,6 +72,8 @@ class IncomeTaxCalc:
                NOT a deduction from taxable income (which should be included under other_income). Examples include
                home loan mortgage deductions on primary residence.
         :param current_date: date for which tax is being calculated. Defaults to date.today().
+        :param outputs: Names of the derived fields to calculate (together with the fields they depend on). Other
+               derived fields are left as None. Defaults to all fields (see calculate_all_fields).
         """
 
         # Initialize class fields from arguments
@@ -74,6 +89,9 @@ class IncomeTaxCalc:
         self.is_resident_for_tax_purposes = is_resident_for_tax_purposes
         self.current_date = current_date
 
+        # Inputs which were None and were given a default value computed from other fields (see _set_default)
+        self._defaulted_inputs = {}
+
         # Derived fields that will be calculated
         self.total_income = None  # Real cash flow income
         self.employment_income_after_rent_program = None  # After deducting amount allowed under rent program
@@ -92,7 +110,10 @@ class IncomeTaxCalc:
         self.effective_tax_rate = None  # Earnings after tax divided by
 
         # Calculate!
-        self.calculate_all_fields()
+        if outputs is None:
+            self.calculate_all_fields()
+        else:
+            self.calculate_fields(*outputs)
 
     def calculate_all_fields(self):
         """Calculate value for all derived fields"""
@@ -114,6 +135,68 @@ class IncomeTaxCalc:
         self._calculate_net_income_after_tax()
         self._calculate_effective_tax_rate()
 
+    def calculate_fields(self, *fields):
+        """
+        Calculate only the input derived fields and the derived fields they depend on (directly or indirectly),
+        according to _DEPENDENCY_GRAPH, e.g. calculate_fields('total_income_tax').
+        """
+        for field in self._DEPENDENCY_GRAPH.upstream(fields):
+            getattr(self, '_calculate_' + field)()
+
+    def recalculate(self, *changed_fields):
+        """
+        Recalculate only the derived fields which depend (directly or indirectly) on the changed fields, according to
+        _DEPENDENCY_GRAPH. This gives the same result as calculate_all_fields(), but is cheaper when only a few fields
+        were changed.
+        :param changed_fields: Names of the fields that were changed (inputs or overridden derived fields)
+        """
+        if not self._defaulted_inputs.keys().isdisjoint(changed_fields):
+            # Changed inputs were set explicitly (or to None, to be defaulted again), so they are no longer defaults
+            self._defaulted_inputs = {field: value for field, value in self._defaulted_inputs.items()
+                                      if field not in changed_fields}
+
+        for field in self._DEPENDENCY_GRAPH.downstream(changed_fields):
+            getattr(self, '_calculate_' + field)()
+
+    def update(self, **changes):
+        """Sets the input fields (e.g. update(other_income=0)) and recalculates the derived fields depending on them"""
+        for field, value in changes.items():
+            setattr(self, field, value)
+        self.recalculate(*changes)
+
+    def fork(self, **overrides):
+        """
+        Returns a variant of this calculator with the input fields overridden (e.g. fork(other_income=0)), where only
+        the derived fields depending on the overrides are recalculated, and the other fields are shared with this
+        calculator. This calculator is not modified.
+        """
+        forked_calc = copy.copy(self)
+        forked_calc.update(**overrides)
+        return forked_calc
+
+    # Fields read by each _calculate_* method, in the order of calculate_all_fields
+    _DEPENDENCY_GRAPH = DependencyGraph([
+        ('current_date', ['current_date']),
+        ('total_income', ['employment_income', 'other_income']),
+        ('employment_income_after_rent_program', ['employment_income', 'is_rent_program', 'rent']),
+        ('social_security_expense', ['social_security_expense', 'employment_income_after_rent_program']),
+        ('employment_income_for_tax', ['employment_income_after_rent_program']),
+        ('employment_income_deduction', ['employment_income_after_rent_program', 'employment_income_for_tax']),
+        ('total_income_for_tax', ['employment_income_for_tax', 'other_income']),
+        ('deduction_dependents', ['number_of_dependents']),
+        ('deduction_total', ['medical_expense', 'social_security_expense', 'life_insurance_premium',
+                             'deduction_dependents']),
+        ('taxable_income', ['total_income_for_tax', 'deduction_total']),
+        ('national_income_tax_bracket', ['taxable_income']),
+        ('national_income_tax_rate', ['national_income_tax_bracket']),
+        ('national_income_tax', ['taxable_income', 'national_income_tax_bracket', 'national_income_tax_rate',
+                                 'current_date']),
+        ('local_income_tax', ['is_resident_for_tax_purposes', 'taxable_income']),
+        ('total_income_tax', ['national_income_tax', 'local_income_tax', 'tax_deduction']),
+        ('net_income_after_tax', ['total_income', 'total_income_tax', 'social_security_expense']),
+        ('effective_tax_rate', ['total_income', 'net_income_after_tax']),
+    ])
+
     # Income tax specific constants
     _DEDUCTION_BASIC = 380000  # Basic deduction each tax individual receives
     _DEDUCTION_PER_DEPENDENT = 380000
@@ -124,58 +207,86 @@ class IncomeTaxCalc:
     income, the net revenue (所得 (syotoku)) is calculated from the gross amount based on the following table.
     Please refer to page 9 of the following file (page 8 based on documents numbering)
     http://www.nta.go.jp/tetsuzuki/shinkoku/shotoku/tebiki2016/pdf/01.pdf
+
+    Each rule is applied as: base * slope + intercept, where base is the income itself or, for rules with a
+    rounding_step, the income divided by 4 and rounded to the rounding_step.
     """
 
     _EMPLOYMENT_INCOME_FOR_TAX_TABLE = [
         {
             'bounds': [0, 650999],
-            'function': lambda x: 0
+            'slope': 0,  # Multiplied by the (rounded) income
+            'intercept': 0,  # Added to the multiplied income
+            'rounding_step': None  # Income / 4 is rounded to a multiple of this (None for no rounding)
         },
         {
             'bounds': [651000, 1618999],
-            'function': lambda x: x-650000
+            'slope': 1,
+            'intercept': -650000,
+            'rounding_step': None
         },
         {
             'bounds': [1619000, 1619999],
-            'function': lambda x: 969000
+            'slope': 0,
+            'intercept': 969000,
+            'rounding_step': None
         },
         {
             'bounds': [1620000, 1621999],
-            'function': lambda x: 970000
+            'slope': 0,
+            'intercept': 970000,
+            'rounding_step': None
         },
         {
             'bounds': [1622000, 1623999],
-            'function': lambda x: 972000
+            'slope': 0,
+            'intercept': 972000,
+            'rounding_step': None
         },
         {
             'bounds': [1624000, 1627999],
-            'function': lambda x: 974000
+            'slope': 0,
+            'intercept': 974000,
+            'rounding_step': None
         },
         {
             'bounds': [1628000, 1799999],
-            'function': lambda x: round(x/(4*1000))*1000 * 2.4
+            'slope': 2.4,
+            'intercept': 0,
+            'rounding_step': 1000
         },
         {
             'bounds': [1800000, 3599999],
-            'function': lambda x: round(x / (4 * 1000)) * 1000 * 2.8 - 180000
+            'slope': 2.8,
+            'intercept': -180000,
+            'rounding_step': 1000
         },
         {
             'bounds': [3600000, 6599999],
-            'function': lambda x: round(x / (4 * 1000)) * 1000 * 3.2 - 540000
+            'slope': 3.2,
+            'intercept': -540000,
+            'rounding_step': 1000
         },
         {
             'bounds': [6600000, 9999999],
-            'function': lambda x: x*0.9 - 1200000
+            'slope': 0.9,
+            'intercept': -1200000,
+            'rounding_step': None
         },
         {
             'bounds': [10000000, 11999999],
-            'function': lambda x: x*0.95 - 1700000
+            'slope': 0.95,
+            'intercept': -1700000,
+            'rounding_step': None
         },
         {
             'bounds': [12000000, 10000000000000],
-            'function': lambda x: x - 2300000
+            'slope': 1,
+            'intercept': -2300000,
+            'rounding_step': None
         },
     ]
+    _EMPLOYMENT_INCOME_FOR_TAX_ROUNDING_DIVISOR = 4
 
     _NATIONAL_INCOME_TAX_TABLE = [
         {
@@ -215,23 +326,70 @@ class IncomeTaxCalc:
         }
     ]
 
+    # Tax tables compiled into sorted lower / upper bounds, for binary search
+    _EMPLOYMENT_INCOME_FOR_TAX_BOUNDS = _compile_tax_table(_EMPLOYMENT_INCOME_FOR_TAX_TABLE)
+    _NATIONAL_INCOME_TAX_BOUNDS = _compile_tax_table(_NATIONAL_INCOME_TAX_TABLE)
+
     _LOCAL_INCOME_TAX_RATE = 0.04 + 0.06  # 4 percent prefectural + 6 percent municipal
     _HEALTH_INSURANCE_RATE = 0.0996  # For Tokyo
     _SOCIAL_PENSION_RATE = 0.183  # Expected as of Sept 2017
 
     @staticmethod
     def __lookup_in_tax_table(lookup_value,
-                              rules):
-        """Helper to look up entry in rule set for employment income"""
-        for rule in rules:
-            bounds = rule['bounds']
-            if bounds[0] <= lookup_value <= bounds[1]:
-                return rule
+                              rules,
+                              compiled_bounds):
+        """Helper to look up entry in rule set for employment income, using the bounds compiled from the rules"""
+        lower_bounds, upper_bounds = compiled_bounds
+        rule_index = bisect.bisect_right(lower_bounds, lookup_value) - 1
+        if rule_index >= 0 and lookup_value <= upper_bounds[rule_index]:
+            return rules[rule_index]
         raise ValueError("'{}' is not a valid income".format(lookup_value))
 
+    def adjusted_total_income_tax(self, additional_other_income=0, additional_tax_deduction=0, current_date=None):
+        """
+        Returns total_income_tax as if other_income and tax_deduction were increased by the input amounts, and the tax
+        was calculated for current_date (defaults to the current_date of this object). This object is not modified.
+
+        This gives the same result as copying this object, adjusting those fields and calling calculate_all_fields(),
+        but is much cheaper since the fields which do not depend on other_income (employment income for tax, social
+        security expense and income deductions) are re-used as they are.
+        """
+        if current_date is None:
+            current_date = self.current_date
+
+        total_income_for_tax = self.employment_income_for_tax + (self.other_income + additional_other_income)
+        taxable_income = max(0, total_income_for_tax - self.deduction_total)
+        national_income_tax_bracket = self.__lookup_in_tax_table(taxable_income,
+                                                                 self._NATIONAL_INCOME_TAX_TABLE,
+                                                                 self._NATIONAL_INCOME_TAX_BOUNDS)
+        national_income_tax = self.national_income_tax_for(
+            taxable_income=taxable_income,
+            national_income_tax_bracket=national_income_tax_bracket,
+            national_income_tax_rate=national_income_tax_bracket['rate'],
+            current_date=current_date,
+        )
+        local_income_tax = self.is_resident_for_tax_purposes * self._LOCAL_INCOME_TAX_RATE * taxable_income
+
+        total_income_tax = national_income_tax + local_income_tax - (self.tax_deduction + additional_tax_deduction)
+        return max(0, total_income_tax)  # No negative taxes
+
+    def _is_defaulted(self, field):
+        """
+        True if the input field is None, or still holds the default value it was given by _set_default(), i.e. if it
+        should be defaulted (again, e.g. social_security_expense after employment_income changed) rather than kept
+        """
+        value = getattr(self, field)
+        return value is None or (field in self._defaulted_inputs and value is self._defaulted_inputs[field])
+
+    def _set_default(self, field, value):
+        """Sets an input field to its default value, recording it as a default (see _is_defaulted)"""
+        setattr(self, field, value)
+        # Replaced rather than modified, as it is shared with the copies of this calculator (see fork)
+        self._defaulted_inputs = dict(self._defaulted_inputs, **{field: value})
+
     def _calculate_current_date(self):
-        if self.current_date is None:
-            self.current_date = dt.date.today()
+        if self._is_defaulted('current_date'):
+            self._set_default('current_date', dt.date.today())
 
     def _calculate_total_income(self):
         self.total_income = self.employment_income + self.other_income
@@ -265,7 +423,7 @@ class IncomeTaxCalc:
         http://www.htm.co.jp/payroll-social-insurance-practices-japan.htm
         https://www.justlanded.jp/english/Japan/Japan-Guide/Jobs/Japanese-pension-insurance
         """
-        if self.social_security_expense is None:
+        if self._is_defaulted('social_security_expense'):
             health_insurance_standard_salary = min(self.employment_income_after_rent_program, 1390000 * 12)
             health_insurance_expense = health_insurance_standard_salary * self._HEALTH_INSURANCE_RATE
 
@@ -273,21 +431,23 @@ class IncomeTaxCalc:
             social_pension_standard_expense = social_pension_standard_salary * self._SOCIAL_PENSION_RATE
 
             total_expense = health_insurance_expense + social_pension_standard_expense
-            self.social_security_expense = int(total_expense * 0.5)  # Half paid by employer
+            self._set_default('social_security_expense', int(total_expense * 0.5))  # Half paid by employer
 
     def _calculate_employment_income_for_tax(self):
         """Converts an actual annual employment income into the income used for tax calculations"""
         income_for_tax_rule = self.__lookup_in_tax_table(
             self.employment_income_after_rent_program,
-            self._EMPLOYMENT_INCOME_FOR_TAX_TABLE
+            self._EMPLOYMENT_INCOME_FOR_TAX_TABLE,
+            self._EMPLOYMENT_INCOME_FOR_TAX_BOUNDS
         )
 
+        base = self.employment_income_after_rent_program
+        if income_for_tax_rule['rounding_step'] is not None:
+            rounding_step = income_for_tax_rule['rounding_step']
+            base = round(base / self._EMPLOYMENT_INCOME_FOR_TAX_ROUNDING_DIVISOR / rounding_step) * rounding_step
+
         self.employment_income_for_tax = min(
-            int(
-                income_for_tax_rule['function'](
-                    self.employment_income_after_rent_program
-                )
-            ),
+            int(base * income_for_tax_rule['slope'] + income_for_tax_rule['intercept']),
             self.employment_income_after_rent_program
         )
 
@@ -314,25 +474,40 @@ class IncomeTaxCalc:
 
     def _calculate_national_income_tax_bracket(self):
         self.national_income_tax_bracket = self.__lookup_in_tax_table(self.taxable_income,
-                                                                      self._NATIONAL_INCOME_TAX_TABLE)
+                                                                      self._NATIONAL_INCOME_TAX_TABLE,
+                                                                      self._NATIONAL_INCOME_TAX_BOUNDS)
 
     def _calculate_national_income_tax_rate(self):
         self.national_income_tax_rate = self.national_income_tax_bracket['rate']
 
-    def _calculate_national_income_tax(self):
-        marginal_income = self.taxable_income - self.national_income_tax_bracket['bounds'][0]
-        marginal_rate = self.national_income_tax_rate
+    @staticmethod
+    def national_income_tax_for(taxable_income, national_income_tax_bracket, national_income_tax_rate, current_date):
+        """
+        Returns the national income tax amount for input taxable income and its bracket.
+        Unlike the other _calculate_* methods, logic is delegated to a helper function since the logic is re-used for
+        adjusted_total_income_tax.
+        """
+        marginal_income = taxable_income - national_income_tax_bracket['bounds'][0]
+        marginal_rate = national_income_tax_rate
         marginal_tax = marginal_income * marginal_rate
-        total_tax = self.national_income_tax_bracket['previous_brackets_sum'] + marginal_tax
+        total_tax = national_income_tax_bracket['previous_brackets_sum'] + marginal_tax
 
         #  Restoration tax is multiplied on top of national income tax only (there is also a 10 year ¥1000
         #  inhabitant tax increase but this is not implemented as it is insignificant)
         #  http://www.eytax.jp/pdf/newsletter/2011/Newsletter_Dec_2011_E.pdf
 
-        if self.current_date < taxconstants.RESTORATION_TAX_EXPIRY:
+        if current_date < taxconstants.RESTORATION_TAX_EXPIRY:
             total_tax *= (1 + taxconstants.RESTORATION_TAX)
 
-        self.national_income_tax = int(total_tax)
+        return int(total_tax)
+
+    def _calculate_national_income_tax(self):
+        self.national_income_tax = self.national_income_tax_for(
+            taxable_income=self.taxable_income,
+            national_income_tax_bracket=self.national_income_tax_bracket,
+            national_income_tax_rate=self.national_income_tax_rate,
+            current_date=self.current_date,
+        )
 
     def _calculate_local_income_tax(self):
         self.local_income_tax = (self.is_resident_for_tax_purposes *
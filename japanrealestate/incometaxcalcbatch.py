@@ -0,0 +1,271 @@
+from japanrealestate import taxconstants
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+import datetime as dt
+import numpy as np
+
+
+def _int(values):
+    """Vectorized int(), i.e. truncation towards zero, so that values match IncomeTaxCalc to the yen"""
+    return np.trunc(values).astype(np.int64)
+
+
+def _compile_tax_table(compiled_bounds):
+    """Converts the bounds of a tax table compiled by IncomeTaxCalc into arrays of lower and upper bounds"""
+    lower_bounds, upper_bounds = compiled_bounds
+    return np.array(lower_bounds, dtype=float), np.array(upper_bounds, dtype=float)
+
+
+def _lookup_in_tax_table(lookup_values, lower_bounds, upper_bounds):
+    """Vectorized IncomeTaxCalc.__lookup_in_tax_table, returning the index of the matching rule for every value"""
+    rule_index = np.searchsorted(lower_bounds, lookup_values, side='right') - 1
+    is_valid = (rule_index >= 0) & (lookup_values <= upper_bounds[np.clip(rule_index, 0, None)])
+    if not is_valid.all():
+        raise ValueError("'{}' is not a valid income".format(np.asarray(lookup_values)[~is_valid].flat[0]))
+    return rule_index
+
+
+class IncomeTaxCalcBatch:
+    """
+    Vectorized version of IncomeTaxCalc, to calculate the taxes of many taxpayers (or many variations of the same
+    taxpayer) at once.
+
+    Every input can be a NumPy array, and all inputs are broadcast together. Every derived field is then an array of the
+    broadcast shape, where each element is equal to the field of an IncomeTaxCalc created with the corresponding
+    elements of the inputs. The tax tables of IncomeTaxCalc are applied as piecewise array kernels, i.e. the matching
+    rule of every value is found with a binary search over the bounds and the rules are then applied as array operations.
+    """
+
+    def __init__(
+            self,
+            employment_income=0,
+            rent=0,
+            is_rent_program=False,
+            other_income=0,
+            life_insurance_premium=0,
+            medical_expense=0,
+            number_of_dependents=0,
+            social_security_expense=None,
+            tax_deduction=0,
+            is_resident_for_tax_purposes=True,
+            current_date=None,
+    ):
+        """
+        See IncomeTaxCalc for the meaning of each parameter.
+
+        :param social_security_expense: If None (or NaN for individual taxpayers), will be auto-calculated.
+        :param current_date: date, or datetime64 array of dates, for which tax is being calculated.
+               Defaults to date.today() (as do NaT elements).
+        """
+
+        # Initialize class fields from arguments
+        if social_security_expense is None:
+            social_security_expense = np.nan
+
+        (
+            self.employment_income,
+            self.rent,
+            self.is_rent_program,
+            self.other_income,
+            self.life_insurance_premium,
+            self.medical_expense,
+            self.number_of_dependents,
+            self.social_security_expense,
+            self.tax_deduction,
+            self.is_resident_for_tax_purposes,
+            self.current_date,
+        ) = np.broadcast_arrays(
+            employment_income,
+            rent,
+            is_rent_program,
+            other_income,
+            life_insurance_premium,
+            medical_expense,
+            number_of_dependents,
+            social_security_expense,
+            tax_deduction,
+            is_resident_for_tax_purposes,
+            np.asarray(current_date, dtype='datetime64[D]'),  # None becomes NaT
+        )
+        self.shape = self.employment_income.shape  # Broadcast shape of inputs, and shape of all derived fields
+
+        # Derived fields that will be calculated (see IncomeTaxCalc for descriptions)
+        self.total_income = None
+        self.employment_income_after_rent_program = None
+        self.employment_income_deduction = None
+        self.employment_income_for_tax = None
+        self.total_income_for_tax = None
+        self.deduction_dependents = None
+        self.deduction_total = None
+        self.taxable_income = None
+        self.national_income_tax_bracket = None  # Index of the entry in _NATIONAL_INCOME_TAX_TABLE
+        self.national_income_tax_rate = None
+        self.national_income_tax = None
+        self.local_income_tax = None
+        self.total_income_tax = None
+        self.net_income_after_tax = None
+        self.effective_tax_rate = None
+
+        # Calculate!
+        self.calculate_all_fields()
+
+    @classmethod
+    def from_income_tax_calc(cls, income_tax_calc, **overrides):
+        """
+        Creates a batch from the inputs of an IncomeTaxCalc, with some of them overridden (typically by arrays).
+        The social_security_expense already calculated by income_tax_calc is re-used.
+        """
+        inputs = dict(
+            employment_income=income_tax_calc.employment_income,
+            rent=income_tax_calc.rent,
+            is_rent_program=income_tax_calc.is_rent_program,
+            other_income=income_tax_calc.other_income,
+            life_insurance_premium=income_tax_calc.life_insurance_premium,
+            medical_expense=income_tax_calc.medical_expense,
+            number_of_dependents=income_tax_calc.number_of_dependents,
+            social_security_expense=income_tax_calc.social_security_expense,
+            tax_deduction=income_tax_calc.tax_deduction,
+            is_resident_for_tax_purposes=income_tax_calc.is_resident_for_tax_purposes,
+            current_date=income_tax_calc.current_date,
+        )
+        inputs.update(overrides)
+        return cls(**inputs)
+
+    def calculate_all_fields(self):
+        """Calculate value for all derived fields"""
+        self._calculate_current_date()
+        self._calculate_total_income()
+        self._calculate_employment_income_after_rent_program()
+        self._calculate_social_security_expense()
+        self._calculate_employment_income_for_tax()
+        self._calculate_employment_income_deduction()
+        self._calculate_total_income_for_tax()
+        self._calculate_deduction_dependents()
+        self._calculate_deduction_total()
+        self._calculate_taxable_income()
+        self._calculate_national_income_tax_bracket()
+        self._calculate_national_income_tax_rate()
+        self._calculate_national_income_tax()
+        self._calculate_local_income_tax()
+        self._calculate_total_income_tax()
+        self._calculate_net_income_after_tax()
+        self._calculate_effective_tax_rate()
+
+    # Tax tables of IncomeTaxCalc compiled into arrays
+    _EMPLOYMENT_INCOME_FOR_TAX_BOUNDS = _compile_tax_table(IncomeTaxCalc._EMPLOYMENT_INCOME_FOR_TAX_BOUNDS)
+    _EMPLOYMENT_INCOME_FOR_TAX_SLOPES = np.array(
+        [rule['slope'] for rule in IncomeTaxCalc._EMPLOYMENT_INCOME_FOR_TAX_TABLE]
+    )
+    _EMPLOYMENT_INCOME_FOR_TAX_INTERCEPTS = np.array(
+        [rule['intercept'] for rule in IncomeTaxCalc._EMPLOYMENT_INCOME_FOR_TAX_TABLE]
+    )
+    _EMPLOYMENT_INCOME_FOR_TAX_ROUNDING_STEPS = np.array(  # 0 for rules without rounding
+        [rule['rounding_step'] or 0 for rule in IncomeTaxCalc._EMPLOYMENT_INCOME_FOR_TAX_TABLE]
+    )
+    _NATIONAL_INCOME_TAX_BOUNDS = _compile_tax_table(IncomeTaxCalc._NATIONAL_INCOME_TAX_BOUNDS)
+    _NATIONAL_INCOME_TAX_RATES = np.array([rule['rate'] for rule in IncomeTaxCalc._NATIONAL_INCOME_TAX_TABLE])
+    _NATIONAL_INCOME_TAX_PREVIOUS_BRACKETS_SUMS = np.array(
+        [rule['previous_brackets_sum'] for rule in IncomeTaxCalc._NATIONAL_INCOME_TAX_TABLE]
+    )
+
+    def _calculate_current_date(self):
+        self.current_date = np.where(np.isnat(self.current_date), np.datetime64(dt.date.today()), self.current_date)
+
+    def _calculate_total_income(self):
+        self.total_income = self.employment_income + self.other_income
+
+    def _calculate_employment_income_after_rent_program(self):
+        self.employment_income_after_rent_program = (self.employment_income -
+                                                     self.is_rent_program * self.rent *
+                                                     IncomeTaxCalc._LEGAL_RENT_RATE)
+
+    def _calculate_social_security_expense(self):
+        """See IncomeTaxCalc._calculate_social_security_expense"""
+        health_insurance_standard_salary = np.minimum(self.employment_income_after_rent_program, 1390000 * 12)
+        health_insurance_expense = health_insurance_standard_salary * IncomeTaxCalc._HEALTH_INSURANCE_RATE
+
+        social_pension_standard_salary = np.minimum(self.employment_income_after_rent_program, 635000 * 12)
+        social_pension_standard_expense = social_pension_standard_salary * IncomeTaxCalc._SOCIAL_PENSION_RATE
+
+        total_expense = health_insurance_expense + social_pension_standard_expense
+        default_social_security_expense = _int(total_expense * 0.5)  # Half paid by employer
+
+        if np.issubdtype(self.social_security_expense.dtype, np.floating):
+            self.social_security_expense = np.where(np.isnan(self.social_security_expense),
+                                                    default_social_security_expense,
+                                                    self.social_security_expense)
+
+    def _calculate_employment_income_for_tax(self):
+        """
+        Piecewise kernel equivalent to IncomeTaxCalc._calculate_employment_income_for_tax: the slope, intercept and
+        rounding_step of the matching rule of every income are gathered, and then applied as array operations
+        """
+        income = self.employment_income_after_rent_program
+        rule_index = _lookup_in_tax_table(income, *self._EMPLOYMENT_INCOME_FOR_TAX_BOUNDS)
+        slope = self._EMPLOYMENT_INCOME_FOR_TAX_SLOPES[rule_index]
+        intercept = self._EMPLOYMENT_INCOME_FOR_TAX_INTERCEPTS[rule_index]
+        rounding_step = self._EMPLOYMENT_INCOME_FOR_TAX_ROUNDING_STEPS[rule_index]
+
+        divided_income = income / IncomeTaxCalc._EMPLOYMENT_INCOME_FOR_TAX_ROUNDING_DIVISOR
+        rounded_income = np.round(divided_income / np.where(rounding_step == 0, 1, rounding_step)) * rounding_step
+        base = np.where(rounding_step == 0, income, rounded_income)
+        income_for_tax = _int(base * slope + intercept)
+
+        self.employment_income_for_tax = np.minimum(income_for_tax, income)
+
+    def _calculate_employment_income_deduction(self):
+        self.employment_income_deduction = self.employment_income_after_rent_program - self.employment_income_for_tax
+
+    def _calculate_total_income_for_tax(self):
+        self.total_income_for_tax = self.employment_income_for_tax + self.other_income
+
+    def _calculate_deduction_dependents(self):
+        self.deduction_dependents = self.number_of_dependents * IncomeTaxCalc._DEDUCTION_PER_DEPENDENT
+
+    def _calculate_deduction_total(self):
+        self.deduction_total = (np.minimum(2000000, self.medical_expense) +
+                                self.social_security_expense +
+                                self.life_insurance_premium +
+                                IncomeTaxCalc._DEDUCTION_BASIC +
+                                self.deduction_dependents)
+
+    def _calculate_taxable_income(self):
+        self.taxable_income = np.maximum(0, self.total_income_for_tax - self.deduction_total)
+
+    def _calculate_national_income_tax_bracket(self):
+        self.national_income_tax_bracket = _lookup_in_tax_table(self.taxable_income,
+                                                                *self._NATIONAL_INCOME_TAX_BOUNDS)
+
+    def _calculate_national_income_tax_rate(self):
+        self.national_income_tax_rate = self._NATIONAL_INCOME_TAX_RATES[self.national_income_tax_bracket]
+
+    def _calculate_national_income_tax(self):
+        lower_bounds, _ = self._NATIONAL_INCOME_TAX_BOUNDS
+        marginal_income = self.taxable_income - lower_bounds[self.national_income_tax_bracket]
+        marginal_tax = marginal_income * self.national_income_tax_rate
+        total_tax = self._NATIONAL_INCOME_TAX_PREVIOUS_BRACKETS_SUMS[self.national_income_tax_bracket] + marginal_tax
+
+        # Restoration tax, see IncomeTaxCalc._calculate_national_income_tax
+        is_restoration_tax = self.current_date < np.datetime64(taxconstants.RESTORATION_TAX_EXPIRY)
+        total_tax = np.where(is_restoration_tax, total_tax * (1 + taxconstants.RESTORATION_TAX), total_tax)
+
+        self.national_income_tax = _int(total_tax)
+
+    def _calculate_local_income_tax(self):
+        self.local_income_tax = (self.is_resident_for_tax_purposes *
+                                 IncomeTaxCalc._LOCAL_INCOME_TAX_RATE *
+                                 self.taxable_income)
+
+    def _calculate_total_income_tax(self):
+        total_income_tax = self.national_income_tax + self.local_income_tax - self.tax_deduction
+        self.total_income_tax = np.maximum(0, total_income_tax)  # No negative taxes
+
+    def _calculate_net_income_after_tax(self):
+        self.net_income_after_tax = (self.total_income -
+                                     self.total_income_tax -
+                                     self.social_security_expense)
+
+    def _calculate_effective_tax_rate(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.effective_tax_rate = np.where(self.total_income == 0,
+                                               0,
+                                               1 - self.net_income_after_tax / self.total_income)
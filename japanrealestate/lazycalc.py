@@ -0,0 +1,34 @@
+class LazyCalc:
+    """
+    Lazy wrapper of a calculator class (RealEstateCalc or IncomeTaxCalc), where derived fields are only calculated when
+    first accessed, together with the derived fields they depend on, and then memoized.
+
+    e.g. when screening listings on yield and cash flow only:
+       real_estate_calc = LazyCalc(RealEstateCalc, purchase_price=50e6, gross_rental_yield=0.05, ...)
+       real_estate_calc.net_income_after_taxes  # The disposal fields and cumulative_net_income are never calculated
+
+    Fields are read-only through this wrapper. To override fields, modify the wrapped calculator and call its
+    recalculate() method.
+    """
+
+    def __init__(self, calculator_class, **inputs):
+        """
+        :param calculator_class: Calculator class to wrap (RealEstateCalc or IncomeTaxCalc)
+        :param inputs: Inputs of the calculator class
+        """
+        self.calculator = calculator_class(outputs=(), **inputs)  # Instance with no derived fields calculated yet
+        self.calculated_fields = set()  # Derived fields of calculator already calculated
+
+    def __getattr__(self, name):
+        """Called for fields not found on the wrapper, which are read from the calculator (and calculated if needed)"""
+        if name in ('calculator', 'calculated_fields'):  # Not set yet (e.g. while being copied)
+            raise AttributeError(name)
+
+        graph = type(self.calculator)._DEPENDENCY_GRAPH
+        if name in graph.dependencies and name not in self.calculated_fields:
+            for field in graph.upstream([name]):
+                if field not in self.calculated_fields:
+                    getattr(self.calculator, '_calculate_' + field)()
+                    self.calculated_fields.add(field)
+
+        return getattr(self.calculator, name)
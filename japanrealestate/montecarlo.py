@@ -0,0 +1,284 @@
+from japanrealestate import returns
+from japanrealestate import taxconstants
+from japanrealestate.incometaxcalcbatch import IncomeTaxCalcBatch
+from japanrealestate.projection import Projection
+import numpy as np
+
+
+def _int(values):
+    """Vectorized int(), i.e. truncation towards zero, as in RealEstateCalc"""
+    return np.trunc(values).astype(np.int64)
+
+
+class MonteCarlo:
+    """
+    Class to simulate the economics of a RealEstateCalc under random rent growth, vacancy and mortgage rate resets.
+
+    RealEstateCalc assumes a constant gross rental yield, no vacancy and a fixed mortgage rate. This class instead
+    simulates num_paths paths of every year from 0 until horizon, as 2-D NumPy arrays (path x year):
+        * rent_index: rent relative to year 0, where the rent of each year grows by a normally distributed rate
+        * vacancy_months: number of months (out of 12) without a tenant, binomially distributed
+        * mortgage_rate: rate of the mortgage, which resets every rate_reset_years by a normally distributed change
+          (the monthly payment is then recalculated for the remaining balance and tenor, as for a variable rate loan)
+
+    The income, expense and tax calculations of RealEstateCalc are then applied to all paths at once, one year at a
+    time (taxes are calculated by IncomeTaxCalcBatch). Rental management fees are charged on the rent actually
+    collected.
+    The disposal at horizon uses the sale price of real_estate_calc (see Projection), so the distribution of
+    net_profit_on_realestate reflects the simulated income and mortgage balance only.
+
+    With zero volatility and vacancy, every path matches the Projection of real_estate_calc (up to a yen, since the
+    mortgage is amortized in closed form, a year at a time).
+    """
+
+    def __init__(
+            self,
+            real_estate_calc=None,
+            horizon=None,
+            num_paths=10000,
+            rent_growth_mean=0.0,
+            rent_growth_volatility=0.0,
+            vacancy_rate=0.0,
+            rate_reset_years=0,
+            rate_volatility=0.0,
+            rate_floor=0.0,
+            sale_price=None,
+            seed=None,
+    ):
+        """
+        :param real_estate_calc: Instance of RealEstateCalc() class whose fields have already been calculated.
+               It is not modified by this class.
+        :param horizon: Last year (inclusive) of the simulation, at the end of which the property is sold. Defaults to
+               calc_year of real_estate_calc.
+        :param num_paths: Number of simulated paths.
+        :param rent_growth_mean: Mean of the yearly growth rate of rent, e.g. -0.01 for rents decreasing 1% a year.
+        :param rent_growth_volatility: Standard deviation of the yearly growth rate of rent.
+        :param vacancy_rate: Probability of each month being vacant.
+        :param rate_reset_years: Number of years between mortgage rate resets, or 0 for a fixed rate.
+        :param rate_volatility: Standard deviation of the change of the mortgage rate at each reset.
+        :param rate_floor: Minimum mortgage rate after a reset.
+        :param sale_price: Price of property sold at horizon. If None, will be estimated using the book value.
+        :param seed: Seed of the random number generator, for reproducible simulations.
+        """
+
+        # Initialize class fields from arguments
+        self.real_estate_calc = real_estate_calc
+        self.horizon = horizon
+        self.num_paths = num_paths
+        self.rent_growth_mean = rent_growth_mean
+        self.rent_growth_volatility = rent_growth_volatility
+        self.vacancy_rate = vacancy_rate
+        self.rate_reset_years = rate_reset_years
+        self.rate_volatility = rate_volatility
+        self.rate_floor = rate_floor
+        self.sale_price = sale_price
+        self.seed = seed
+
+        # Derived fields that will be calculated (2-D arrays are path x year)
+        self.projection = None  # Projection of the fields of real_estate_calc which are not simulated
+        self.rent_index = None  # 2-D array, rent relative to year 0
+        self.vacancy_months = None  # 2-D array, number of months without a tenant
+        self.mortgage_rate = None  # 2-D array, rate of the mortgage (0 where there is no mortgage)
+        self.rental_income = None  # 2-D array, rent collected
+        self.net_income_before_taxes = None  # 2-D array
+        self.net_income_after_taxes = None  # 2-D array
+        self.mortgage_amount_outstanding = None  # 2-D array, principal outstanding at the end of each year
+        self.probability_negative_cash_flow = None  # Array, fraction of paths with negative net_income_after_taxes
+        self.cumulative_net_income = None  # Array (per path), sum of net_income_after_taxes until horizon
+        self.net_profit_on_realestate = None  # Array (per path), if sold at the end of horizon
+
+        # Calculate!
+        self.calculate_all_fields()
+
+    def calculate_all_fields(self):
+        """Calculate value for all derived fields"""
+        random_generator = np.random.default_rng(self.seed)
+        self._calculate_horizon()
+        self._calculate_projection()
+        self._calculate_rent_index(random_generator)
+        self._calculate_vacancy_months(random_generator)
+        self._calculate_mortgage_rate(random_generator)
+        self._calculate_yearly_fields()
+        self._calculate_probability_negative_cash_flow()
+        self._calculate_cumulative_net_income()
+        self._calculate_net_profit_on_realestate()
+
+    def percentiles(self, field='net_profit_on_realestate', q=(5, 25, 50, 75, 95)):
+        """
+        Returns the percentiles q (in %) of a simulated field over all paths, i.e. an array of len(q) for per path
+        fields, or a 2-D array (percentile x year) for yearly fields.
+        """
+        return np.percentile(getattr(self, field), q, axis=0)
+
+    def value_at_risk(self, confidence=0.95):
+        """
+        Returns the value at risk of net_profit_on_realestate, i.e. the loss which is only exceeded in 1 - confidence
+        of the paths (negative if even those paths make a profit).
+        """
+        return -np.percentile(self.net_profit_on_realestate, 100 * (1 - confidence))
+
+    def cash_flows(self):
+        """
+        Returns the yearly cash flows of every path if sold at the end of horizon (see RealEstateCalc.cash_flows), as a
+        2-D array (path x horizon + 2).
+        """
+        cash_flows = np.zeros((self.num_paths, self.horizon + 2), dtype=np.int64)
+        cash_flows[:, 0] = -self.real_estate_calc.purchase_initial_outlay
+        cash_flows[:, 1:] = self.net_income_after_taxes
+        cash_flows[:, -1] += (self.projection.sale_proceeds_net[self.horizon] -
+                              self.mortgage_amount_outstanding[:, self.horizon])
+        return cash_flows
+
+    def irr(self):
+        """Internal rate of return of cash_flows() for every path (see returns.irr)"""
+        return returns.irr(self.cash_flows())
+
+    def _calculate_horizon(self):
+        if self.horizon is None:
+            self.horizon = self.real_estate_calc.calc_year
+
+    def _calculate_projection(self):
+        self.projection = Projection(real_estate_calc=self.real_estate_calc,
+                                     horizon=self.horizon,
+                                     sale_price=self.sale_price,
+                                     fields=['calc_date', 'depreciation', 'sale_proceeds_net'])
+
+    def _calculate_rent_index(self, random_generator):
+        rent_growth = random_generator.normal(self.rent_growth_mean,
+                                              self.rent_growth_volatility,
+                                              (self.num_paths, self.horizon + 1))
+        rent_growth[:, 0] = 0  # Rent of year 0 is the rent of real_estate_calc
+        self.rent_index = np.cumprod(1 + rent_growth, axis=1)
+
+    def _calculate_vacancy_months(self, random_generator):
+        self.vacancy_months = random_generator.binomial(12, self.vacancy_rate, (self.num_paths, self.horizon + 1))
+
+    def _calculate_mortgage_rate(self, random_generator):
+        rate_changes = random_generator.normal(0, self.rate_volatility, (self.num_paths, self.horizon + 1))
+        years = np.arange(self.horizon + 1)
+        is_reset = (years > 0) & (years % self.rate_reset_years == 0) if self.rate_reset_years else years < 0
+        rate_changes[:, ~is_reset] = 0
+
+        if self.real_estate_calc.mortgage is None:
+            self.mortgage_rate = np.zeros((self.num_paths, self.horizon + 1))
+        else:
+            mortgage_rate = self.real_estate_calc.mortgage_rate
+            self.mortgage_rate = np.maximum(self.rate_floor, mortgage_rate + np.cumsum(rate_changes, axis=1))
+            self.mortgage_rate[:, ~is_reset.cumsum().astype(bool)] = mortgage_rate  # Initial rate until the first reset
+
+    @staticmethod
+    def _monthly_payment(balance, rate, num_periods):
+        """Vectorized fixed monthly payment (see Mortgage) for a balance repaid over num_periods months"""
+        monthly_rate = rate / 12
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(monthly_rate == 0,
+                            balance / num_periods,
+                            balance * monthly_rate / (1 - (1 + monthly_rate) ** -num_periods))
+
+    @staticmethod
+    def _balance_after_year(balance, rate, monthly_payment):
+        """Vectorized balance after 12 monthly payments, in closed form"""
+        monthly_rate = rate / 12
+        growth = (1 + monthly_rate) ** 12
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(monthly_rate == 0,
+                            balance - 12 * monthly_payment,
+                            balance * growth - monthly_payment * (growth - 1) / monthly_rate)
+
+    def _calculate_yearly_fields(self):
+        """
+        Single forward pass from year 0 until horizon, over all paths at once. The mortgage balance and monthly payment
+        of every path are carried from one year to the next.
+        """
+        calc = self.real_estate_calc
+        income_tax_calc = calc.income_tax_calculator
+        shape = (self.num_paths, self.horizon + 1)
+        self.rental_income = np.zeros(shape, dtype=np.int64)
+        self.net_income_before_taxes = np.zeros(shape, dtype=np.int64)
+        self.net_income_after_taxes = np.zeros(shape, dtype=np.int64)
+        self.mortgage_amount_outstanding = np.zeros(shape, dtype=np.int64)
+
+        has_mortgage = calc.mortgage is not None
+        mortgage_tenor = calc.mortgage.tenor if has_mortgage else 0
+        balance = np.full(self.num_paths, float(calc.purchase_price_financed) if has_mortgage else 0.0)
+        monthly_payment = np.zeros(self.num_paths)
+
+        for year in range(self.horizon + 1):
+            rate = self.mortgage_rate[:, year]
+            is_mortgage_active = has_mortgage and year < mortgage_tenor
+            payment_for_year = interest_for_year = remaining_payments = 0
+            if is_mortgage_active:
+                num_periods = (mortgage_tenor - year) * 12
+                if year == 0 or (self.rate_reset_years and year % self.rate_reset_years == 0):
+                    monthly_payment = self._monthly_payment(balance, rate, num_periods)
+                remaining_payments = monthly_payment * num_periods
+
+                balance_after_year = self._balance_after_year(balance, rate, monthly_payment)
+                if year == mortgage_tenor - 1:
+                    balance_after_year = np.zeros(self.num_paths)  # Fully repaid, without rounding noise
+                payment_for_year = monthly_payment * 12
+                interest_for_year = payment_for_year - (balance - balance_after_year)
+                balance = balance_after_year
+            self.mortgage_amount_outstanding[:, year] = _int(balance)
+
+            # Income and expenses (see RealEstateCalc)
+            occupied_months = 12 - self.vacancy_months[:, year]
+            rental_income = _int(calc.rental_income * self.rent_index[:, year] * occupied_months / 12)
+            total_income = rental_income + _int(calc.renewal_income_rate * rental_income)
+            rental_management_total_expense = _int(
+                _int(rental_income * calc.rental_management_renewal_fee * (1 + taxconstants.CONSUMPTION_TAX)) +
+                _int(rental_income * calc.rental_management_rental_fee * (1 + taxconstants.CONSUMPTION_TAX))
+            )
+            total_expense = _int(
+                calc.maintenance_expense +
+                calc.monthly_fees_annualized +
+                rental_management_total_expense +
+                calc.property_tax_expense
+            )
+            net_income_before_taxes = total_income - total_expense - _int(payment_for_year)
+
+            # Taxes (see RealEstateCalc)
+            if calc.is_primary_residence:
+                net_income_taxable = np.zeros(self.num_paths, dtype=np.int64)
+            else:
+                net_income_taxable = (total_income - total_expense - self.projection.depreciation[year] -
+                                      _int(interest_for_year))
+
+            home_loan_deduction = 0
+            is_qualified_for_deduction = (calc.is_primary_residence and
+                                          year < 10 and
+                                          calc.size > 50 and
+                                          is_mortgage_active and
+                                          income_tax_calc is not None and
+                                          income_tax_calc.taxable_income < 30000000)
+            if is_qualified_for_deduction:
+                home_loan_deduction = _int(np.minimum(400000 if calc.age == 0 else 200000, remaining_payments))
+
+            net_income_after_taxes = net_income_before_taxes
+            if income_tax_calc is not None:
+                income_tax_calc_batch = IncomeTaxCalcBatch.from_income_tax_calc(
+                    income_tax_calc,
+                    current_date=np.datetime64(self.projection.calc_date[year], 'D'),
+                    other_income=income_tax_calc.other_income + net_income_taxable,
+                    tax_deduction=income_tax_calc.tax_deduction + home_loan_deduction,
+                )
+                income_tax = _int(income_tax_calc_batch.total_income_tax)
+                income_tax_real_estate = _int(np.maximum(0, income_tax - income_tax_calc.total_income_tax))
+                income_tax_shield = _int(np.maximum(0, income_tax_calc.total_income_tax - income_tax))
+                net_income_after_taxes = net_income_before_taxes - income_tax_real_estate + income_tax_shield
+
+            self.rental_income[:, year] = rental_income
+            self.net_income_before_taxes[:, year] = net_income_before_taxes
+            self.net_income_after_taxes[:, year] = net_income_after_taxes
+
+    def _calculate_probability_negative_cash_flow(self):
+        self.probability_negative_cash_flow = (self.net_income_after_taxes < 0).mean(axis=0)
+
+    def _calculate_cumulative_net_income(self):
+        self.cumulative_net_income = self.net_income_after_taxes.sum(axis=1)
+
+    def _calculate_net_profit_on_realestate(self):
+        self.net_profit_on_realestate = (self.projection.sale_proceeds_net[self.horizon] +
+                                         self.cumulative_net_income -
+                                         self.real_estate_calc.purchase_initial_outlay -
+                                         self.mortgage_amount_outstanding[:, self.horizon])
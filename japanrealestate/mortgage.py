@@ -31,6 +31,10 @@ class Mortgage:
         self.principal_schedule = None  # List where element i represents the principal payment for month i
         self.amortization_schedule = None  # List where element i represents the total payment for month i
         self.monthly_payment = None  # Total monthly payment
+        self.balance_by_year = None  # Array where element i represents the principal outstanding after i years
+        self.remaining_payments_by_year = None  # Array where element i represents the total payments after i years
+        self.interest_by_year = None  # Array where element i represents the total interest payments in year i
+        self.principal_by_year = None  # Array where element i represents the total principal payments in year i
 
         # Calculate!
         self.calculate_all_fields()
@@ -42,6 +46,64 @@ class Mortgage:
         self._calculate_principal_schedule()
         self._calculate_amortization_schedule()
         self._calculate_monthly_payment()
+        self._calculate_balance_by_year()
+        self._calculate_remaining_payments_by_year()
+        self._calculate_interest_by_year()
+        self._calculate_principal_by_year()
+
+    def balance_after_year(self, year):
+        """Principal outstanding after the input year ends (year 0 being the first year of the loan)"""
+        if 0 <= year + 1 < len(self.balance_by_year):
+            return self.balance_by_year[year + 1]
+        return sum(self.principal_schedule[(year + 1) * 12:])
+
+    def remaining_payments_after_year(self, year):
+        """Sum of all payments (principal and interest) still due after the input year ends"""
+        if 0 <= year + 1 < len(self.remaining_payments_by_year):
+            return self.remaining_payments_by_year[year + 1]
+        return sum(self.amortization_schedule[(year + 1) * 12:])
+
+    def interest_in_year(self, year):
+        """Sum of interest payments during the input year"""
+        if 0 <= year < len(self.interest_by_year):
+            return self.interest_by_year[year]
+        return sum(self.interest_schedule[year * 12:][:12])
+
+    def principal_in_year(self, year):
+        """Sum of principal payments during the input year"""
+        if 0 <= year < len(self.principal_by_year):
+            return self.principal_by_year[year]
+        return sum(self.principal_schedule[year * 12:][:12])
+
+    @staticmethod
+    def _sums_from_each_year(schedule):
+        """
+        Returns an array where element i is sum(schedule[i * 12:]), for i from 0 to the number of years in schedule.
+        The sums are accumulated in the same (sequential) order as sum(), so that results are identical to it.
+        """
+        schedule = np.asarray(schedule, dtype=float)
+        num_years = len(schedule) // 12
+        if num_years == 0:
+            return np.zeros(1)
+
+        # Row i is a view of schedule[i * 12:], padded at the end with zeros (which do not change a sequential sum)
+        padded_schedule = np.concatenate([schedule, np.zeros(num_years * 12)])
+        schedules_from_each_year = np.lib.stride_tricks.as_strided(
+            padded_schedule,
+            shape=(num_years + 1, len(schedule)),
+            strides=(12 * padded_schedule.strides[0], padded_schedule.strides[0]),
+            writeable=False,
+        )
+        return np.add.accumulate(schedules_from_each_year, axis=1)[:, -1]
+
+    @staticmethod
+    def _sums_for_each_year(schedule):
+        """Returns an array where element i is sum(schedule[i * 12:][:12]), accumulated in the same order as sum()"""
+        schedule = np.asarray(schedule, dtype=float)
+        num_years = len(schedule) // 12
+        if num_years == 0:
+            return np.zeros(0)
+        return np.add.accumulate(schedule[:num_years * 12].reshape(num_years, 12), axis=1)[:, -1]
 
     def _calculate_loan_periods(self):
         self.loan_periods = np.arange(self.tenor * 12) + 1  # Financial equations start the period count at 1
@@ -82,3 +144,14 @@ class Mortgage:
         else:
             self.monthly_payment = 0
 
+    def _calculate_balance_by_year(self):
+        self.balance_by_year = self._sums_from_each_year(self.principal_schedule)
+
+    def _calculate_remaining_payments_by_year(self):
+        self.remaining_payments_by_year = self._sums_from_each_year(self.amortization_schedule)
+
+    def _calculate_interest_by_year(self):
+        self.interest_by_year = self._sums_for_each_year(self.interest_schedule)
+
+    def _calculate_principal_by_year(self):
+        self.principal_by_year = self._sums_for_each_year(self.principal_schedule)
@@ -0,0 +1,164 @@
+import numpy as np
+
+
+class MortgageBatch:
+    """
+    Vectorized version of Mortgage, to amortize many fixed-rate mortgages at once (e.g. many bank quotes for many
+    properties).
+
+    principal, tenor and rate can be NumPy arrays, and are broadcast together. Identical loans are only amortized once:
+    the schedules are 2-D arrays with one row per unique (principal, tenor, rate) loan and one column per month, padded
+    with zeros after the end of shorter loans (is_active masks the months within the tenor of each loan). loan_index
+    maps every input loan to its row, e.g. interest_schedule[loan_index] gives the schedules in the broadcast shape of
+    the inputs. Values are identical to the corresponding fields of a Mortgage created with the same inputs.
+    """
+
+    def __init__(
+            self,
+            principal=0.0,
+            tenor=0,
+            rate=0.0,
+    ):
+        """
+        See Mortgage for the meaning of each parameter.
+        """
+
+        # Initialize class fields from arguments
+        self.principal, self.tenor, self.rate = np.broadcast_arrays(principal, tenor, rate)
+        self.shape = self.principal.shape  # Broadcast shape of inputs
+
+        # Derived fields that will be calculated
+        self.loan_index = None  # Array of input shape, where element i is the row of the schedules for input loan i
+        self.loan_principal = None  # Array where element i represents the principal of the unique loan of row i
+        self.loan_tenor = None  # Array where element i represents the tenor of the unique loan of row i
+        self.loan_rate = None  # Array where element i represents the rate of the unique loan of row i
+        self.loan_periods = None  # Array where element i represents the month i (of the longest loan)
+        self.is_active = None  # 2-D array (loan x month), True where the month is within the tenor of the loan
+        self.interest_schedule = None  # 2-D array (loan x month) of interest payments
+        self.principal_schedule = None  # 2-D array (loan x month) of principal payments
+        self.amortization_schedule = None  # 2-D array (loan x month) of total payments
+        self.monthly_payment = None  # Array of input shape, total monthly payment of every input loan
+        self.balance_by_year = None  # 2-D array (loan x year), principal outstanding after i years
+        self.remaining_payments_by_year = None  # 2-D array (loan x year), total payments after i years
+        self.interest_by_year = None  # 2-D array (loan x year), total interest payments in year i
+        self.principal_by_year = None  # 2-D array (loan x year), total principal payments in year i
+
+        # Calculate!
+        self.calculate_all_fields()
+
+    def calculate_all_fields(self):
+        """Calculate value for all derived fields"""
+        self._calculate_unique_loans()
+        self._calculate_loan_periods()
+        self._calculate_is_active()
+        self._calculate_interest_schedule()
+        self._calculate_principal_schedule()
+        self._calculate_amortization_schedule()
+        self._calculate_monthly_payment()
+        self._calculate_balance_by_year()
+        self._calculate_remaining_payments_by_year()
+        self._calculate_interest_by_year()
+        self._calculate_principal_by_year()
+
+    def balance_after_year(self, year):
+        """
+        Principal outstanding after the input year ends, for every input loan (see Mortgage.balance_after_year).
+        year can be an array broadcastable to the shape of the inputs, and must be at least -1.
+        """
+        return self._lookup_by_year(self.balance_by_year, np.asarray(year) + 1)
+
+    def remaining_payments_after_year(self, year):
+        """Sum of all payments still due after the input year ends, for every input loan (year must be at least -1)"""
+        return self._lookup_by_year(self.remaining_payments_by_year, np.asarray(year) + 1)
+
+    def interest_in_year(self, year):
+        """Sum of interest payments during the input year for every input loan, 0 for years outside of the loan"""
+        return self._lookup_by_year(self.interest_by_year, year)
+
+    def principal_in_year(self, year):
+        """Sum of principal payments during the input year for every input loan, 0 for years outside of the loan"""
+        return self._lookup_by_year(self.principal_by_year, year)
+
+    def _lookup_by_year(self, values_by_year, year):
+        """Element for year of the row of values_by_year of every input loan, 0 for years outside of values_by_year"""
+        year = np.broadcast_to(year, self.shape)
+        is_valid = (0 <= year) & (year < values_by_year.shape[1])
+        values = values_by_year[self.loan_index, np.where(is_valid, year, 0)] if values_by_year.shape[1] else 0.0
+        return np.where(is_valid, values, 0.0)
+
+    @staticmethod
+    def _sums_from_each_year(schedules):
+        """
+        Returns a 2-D array where element (i, j) is sum(schedules[i, j * 12:]).
+        Months are added one at a time, in the same order as sum() over a Mortgage schedule, so that the floating point
+        results are identical to Mortgage (the zero padding after the end of a loan does not change the sums).
+        """
+        num_years = schedules.shape[1] // 12
+        sums = np.zeros((schedules.shape[0], num_years + 1))
+        for month in range(schedules.shape[1]):
+            sums[:, :month // 12 + 1] += schedules[:, month:month + 1]
+        return sums
+
+    @staticmethod
+    def _sums_for_each_year(schedules):
+        """Returns a 2-D array where element (i, j) is sum(schedules[i, j * 12:][:12]), in the same order as sum()"""
+        num_years = schedules.shape[1] // 12
+        return np.add.accumulate(schedules.reshape(schedules.shape[0], num_years, 12), axis=2)[:, :, -1]
+
+    def _calculate_unique_loans(self):
+        loans = np.stack([self.principal.ravel(), self.tenor.ravel(), self.rate.ravel()], axis=-1).astype(float)
+        unique_loans, loan_index = np.unique(loans, axis=0, return_inverse=True)
+        self.loan_index = loan_index.reshape(self.shape)
+        self.loan_principal = unique_loans[:, 0]
+        self.loan_tenor = unique_loans[:, 1]
+        self.loan_rate = unique_loans[:, 2]
+
+    def _calculate_loan_periods(self):
+        # Padded to whole years of the longest loan. Financial equations start the period count at 1
+        num_years = int(np.ceil(self.loan_tenor.max(initial=0)))
+        self.loan_periods = np.arange(num_years * 12) + 1
+
+    def _calculate_is_active(self):
+        self.is_active = self.loan_periods <= (self.loan_tenor * 12).reshape(-1, 1)
+
+    def _calculate_interest_schedule(self):
+        rate = self.loan_rate.reshape(-1, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            interest_schedule = np.where(rate == 0,
+                                         0.0,
+                                         - np.ipmt(rate / 12,
+                                                   self.loan_periods,
+                                                   self.loan_tenor.reshape(-1, 1) * 12,
+                                                   self.loan_principal.reshape(-1, 1)))
+        self.interest_schedule = np.where(self.is_active, interest_schedule, 0.0)
+
+    def _calculate_principal_schedule(self):
+        rate = self.loan_rate.reshape(-1, 1)
+        num_periods = self.loan_tenor.reshape(-1, 1) * 12
+        principal = self.loan_principal.reshape(-1, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            principal_schedule = np.where(rate == 0,
+                                          principal / num_periods,
+                                          - np.ppmt(rate / 12, self.loan_periods, num_periods, principal))
+        self.principal_schedule = np.where(self.is_active, principal_schedule, 0.0)
+
+    def _calculate_amortization_schedule(self):
+        self.amortization_schedule = self.interest_schedule + self.principal_schedule
+
+    def _calculate_monthly_payment(self):
+        if len(self.loan_periods):
+            self.monthly_payment = self.amortization_schedule[self.loan_index, 0]
+        else:
+            self.monthly_payment = np.zeros(self.shape)
+
+    def _calculate_balance_by_year(self):
+        self.balance_by_year = self._sums_from_each_year(self.principal_schedule)
+
+    def _calculate_remaining_payments_by_year(self):
+        self.remaining_payments_by_year = self._sums_from_each_year(self.amortization_schedule)
+
+    def _calculate_interest_by_year(self):
+        self.interest_by_year = self._sums_for_each_year(self.interest_schedule)
+
+    def _calculate_principal_by_year(self):
+        self.principal_by_year = self._sums_for_each_year(self.principal_schedule)
@@ -0,0 +1,72 @@
+from japanrealestate.mortgage import Mortgage
+from collections import OrderedDict
+import copy
+import threading
+import numpy as np
+
+
+class MortgageCache:
+    """
+    Bounded LRU cache of Mortgage schedules keyed on (principal, tenor, rate).
+
+    Calculating a Mortgage amortizes the whole loan (tenor * 12 periods), although in year sweeps or across scenarios
+    and properties the same loan is typically requested many times. The first request for a loan calculates a Mortgage
+    and stores it, and every request returns a shallow copy of the stored Mortgage: scalar fields (e.g. monthly_payment)
+    can be overridden on the copy without affecting the cache, while the schedules are shared and made read-only.
+
+    The cache is thread-safe, so that calculators can be used from several threads (see frozencalc).
+    """
+
+    def __init__(self, max_size=1024):
+        """
+        :param max_size: Maximum number of loans kept in the cache. The least recently used loan is evicted first.
+        """
+        self.max_size = max_size
+
+        self.hits = 0  # Number of requests served from the cache
+        self.misses = 0  # Number of requests which required calculating a Mortgage
+
+        self._mortgages = OrderedDict()  # (principal, tenor, rate) to Mortgage, in least recently used order
+        self._lock = threading.Lock()  # Guards _mortgages and the counters
+
+    def __len__(self):
+        return len(self._mortgages)
+
+    def get(self, principal=0.0, tenor=0, rate=0.0):
+        """Returns a Mortgage with the input parameters (see Mortgage), with read-only schedules shared with the cache"""
+        key = (principal, tenor, rate)
+        with self._lock:
+            mortgage = self._mortgages.get(key)
+            if mortgage is not None:
+                self.hits += 1
+                self._mortgages.move_to_end(key)
+                return copy.copy(mortgage)
+            self.misses += 1
+
+        # The loan is amortized outside of the lock, so that other loans can be requested meanwhile (threads racing on
+        # the same new loan each calculate it, which is harmless as they calculate the same values)
+        mortgage = self._freeze(Mortgage(principal=principal, tenor=tenor, rate=rate))
+        with self._lock:
+            self._mortgages[key] = mortgage
+            self._mortgages.move_to_end(key)
+            if len(self._mortgages) > self.max_size:
+                self._mortgages.popitem(last=False)
+
+        return copy.copy(mortgage)
+
+    def clear(self):
+        """Removes all loans from the cache and resets the counters"""
+        with self._lock:
+            self._mortgages.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @staticmethod
+    def _freeze(mortgage):
+        """Makes the schedules of the input Mortgage read-only, so that they can be shared safely"""
+        for field, value in list(mortgage.__dict__.items()):
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            elif isinstance(value, list):
+                setattr(mortgage, field, tuple(value))
+        return mortgage
@@ -0,0 +1,232 @@
+from japanrealestate.projection import Projection
+import copy
+import datetime as dt
+
+
+class Portfolio:
+    """
+    Class to calculate the income taxes of several properties owned by the same person.
+
+    Income from real estate in Japan is pooled together with any other regular income prior to calculating taxes, so
+    when several properties are owned, the tax of each property depends on the others (e.g. the loss of one property
+    shields the income of another, and progressive rates apply to their combined income). RealEstateCalc calculates the
+    tax of each property as if it were the only one. This class instead aggregates the taxable income (and home loan
+    deductions) of all properties for every tax year, evaluates the income tax once per tax year, and then allocates the
+    resulting real estate tax (or tax shield) back to each property.
+
+    Years of each property are mapped to tax years using their calc_date, so properties bought on different dates are
+    pooled by calendar year. The tax change of a tax year is allocated to properties in proportion to their
+    net_income_taxable (at the average rate of the portfolio), and the effect of home loan deductions in proportion to
+    their home_loan_deduction. Allocations are whole yen and add up to the total of the portfolio.
+    """
+
+    def __init__(
+            self,
+            real_estate_calcs=None,
+            income_tax_calculator=None,
+            horizon=None,
+    ):
+        """
+        :param real_estate_calcs: List of RealEstateCalc() instances whose fields have already been calculated. Their
+               own income_tax_calculator is ignored, and they are not modified by this class.
+        :param income_tax_calculator: Instance of IncomeTaxCalc() class of the owner of the properties, or None for no
+               taxes.
+        :param horizon: Last year (inclusive) of each property to include. Defaults to the largest calc_year of the
+               properties.
+        """
+
+        # Initialize class fields from arguments
+        self.real_estate_calcs = real_estate_calcs
+        self.income_tax_calculator = income_tax_calculator
+        self.horizon = horizon
+
+        # Derived fields that will be calculated
+        self.projections = None  # Projection of the pre-tax fields of each property (see Projection)
+        self.tax_year = None  # List of calendar years covered by any property, in increasing order
+        self.net_income_taxable = None  # List where element i represents the total for tax_year i
+        self.home_loan_deduction = None  # List where element i represents the total for tax_year i
+        self.income_tax = None  # List where element i represents the income tax of the owner for tax_year i
+        self.income_tax_before_deductions = None  # Same as income_tax, but without the home loan deductions
+        self.tax_evaluations = None  # Number of income tax evaluations (at most 2 per tax year)
+        self.income_tax_real_estate = None  # List where element i represents the tax owed due to real estate
+        self.income_tax_shield = None  # List where element i represents the tax reduction due to real estate
+        self.property_income_tax_change = None  # List (per property) of lists (per year) of tax change allocated
+        self.property_income_tax_real_estate = None  # List (per property) of lists (per year)
+        self.property_income_tax_shield = None  # List (per property) of lists (per year)
+        self.property_net_income_after_taxes = None  # List (per property) of lists (per year)
+        self.net_income_after_taxes = None  # List where element i represents the total for tax_year i
+
+        # Calculate!
+        self.calculate_all_fields()
+
+    def calculate_all_fields(self):
+        """Calculate value for all derived fields"""
+        self._calculate_horizon()
+        self._calculate_projections()
+        self._calculate_tax_year()
+        self._calculate_net_income_taxable()
+        self._calculate_home_loan_deduction()
+        self._calculate_income_tax()
+        self._calculate_income_tax_real_estate()
+        self._calculate_income_tax_shield()
+        self._calculate_property_income_tax_change()
+        self._calculate_property_income_tax_real_estate()
+        self._calculate_property_income_tax_shield()
+        self._calculate_property_net_income_after_taxes()
+        self._calculate_net_income_after_taxes()
+
+    # Fields of each property required before taxes are pooled
+    _PRE_TAX_FIELDS = ['calc_date', 'net_income_before_taxes', 'net_income_taxable', 'home_loan_deduction']
+
+    @staticmethod
+    def _allocate(total, shares):
+        """
+        Splits the integer total into integers roughly proportional to shares (which add up to roughly total). The
+        rounding difference is given to the largest share, so the integers add up to total exactly.
+        """
+        allocations = [int(share) for share in shares]
+        if allocations:
+            largest = max(range(len(shares)), key=lambda i: abs(shares[i]))
+            allocations[largest] += total - sum(allocations)
+        return allocations
+
+    def _tax_year_entries(self, tax_year):
+        """Returns (property index, year) of every property year falling in tax_year"""
+        return [(i, year)
+                for i, projection in enumerate(self.projections)
+                for year, calc_date in enumerate(projection.calc_date)
+                if calc_date.year == tax_year]
+
+    def _calculate_horizon(self):
+        if self.horizon is None:
+            self.horizon = max([real_estate_calc.calc_year for real_estate_calc in self.real_estate_calcs], default=0)
+
+    def _calculate_projections(self):
+        """The pre-tax fields of every property, with the home loan deduction qualified against the owner's income"""
+        self.projections = []
+        for real_estate_calc in self.real_estate_calcs:
+            property_calc = copy.copy(real_estate_calc)
+            property_calc.income_tax_calculator = self.income_tax_calculator
+            self.projections.append(Projection(real_estate_calc=property_calc,
+                                               horizon=self.horizon,
+                                               fields=self._PRE_TAX_FIELDS))
+
+    def _calculate_tax_year(self):
+        self.tax_year = sorted({calc_date.year for projection in self.projections for calc_date in projection.calc_date})
+
+    def _calculate_net_income_taxable(self):
+        self.net_income_taxable = [
+            sum(self.projections[i].net_income_taxable[year] for i, year in self._tax_year_entries(tax_year))
+            for tax_year in self.tax_year
+        ]
+
+    def _calculate_home_loan_deduction(self):
+        self.home_loan_deduction = [
+            sum(self.projections[i].home_loan_deduction[year] for i, year in self._tax_year_entries(tax_year))
+            for tax_year in self.tax_year
+        ]
+
+    def _calculate_income_tax(self):
+        """
+        One income tax evaluation per tax year, on the pooled income of all properties (plus one more for the years
+        with home loan deductions, to separate their effect for the allocation to properties).
+        """
+        self.income_tax = []
+        self.income_tax_before_deductions = []
+        self.tax_evaluations = 0
+        if self.income_tax_calculator is None:
+            self.income_tax = [0] * len(self.tax_year)
+            self.income_tax_before_deductions = [0] * len(self.tax_year)
+            return
+
+        for tax_year, net_income_taxable, home_loan_deduction in zip(self.tax_year,
+                                                                     self.net_income_taxable,
+                                                                     self.home_loan_deduction):
+            # Restoration tax only depends on the year, so any date of the tax year gives the same result
+            current_date = dt.date(tax_year, 1, 1)
+            income_tax = int(self.income_tax_calculator.adjusted_total_income_tax(
+                additional_other_income=net_income_taxable,
+                additional_tax_deduction=home_loan_deduction,
+                current_date=current_date,
+            ))
+            self.tax_evaluations += 1
+
+            income_tax_before_deductions = income_tax
+            if home_loan_deduction != 0:
+                income_tax_before_deductions = int(self.income_tax_calculator.adjusted_total_income_tax(
+                    additional_other_income=net_income_taxable,
+                    current_date=current_date,
+                ))
+                self.tax_evaluations += 1
+
+            self.income_tax.append(income_tax)
+            self.income_tax_before_deductions.append(income_tax_before_deductions)
+
+    def _calculate_income_tax_real_estate(self):
+        self.income_tax_real_estate = [0] * len(self.tax_year)
+        if self.income_tax_calculator is not None:
+            self.income_tax_real_estate = [int(max(0, income_tax - self.income_tax_calculator.total_income_tax))
+                                           for income_tax in self.income_tax]
+
+    def _calculate_income_tax_shield(self):
+        self.income_tax_shield = [0] * len(self.tax_year)
+        if self.income_tax_calculator is not None:
+            self.income_tax_shield = [int(max(0, self.income_tax_calculator.total_income_tax - income_tax))
+                                      for income_tax in self.income_tax]
+
+    def _calculate_property_income_tax_change(self):
+        """
+        Allocates the change in income tax of every tax year (positive for tax owed, negative for a tax shield) to the
+        properties of that year
+        """
+        self.property_income_tax_change = [[0] * len(projection.calc_year) for projection in self.projections]
+        if self.income_tax_calculator is None:
+            return
+
+        base_income_tax = self.income_tax_calculator.total_income_tax
+        for tax_year_index, tax_year in enumerate(self.tax_year):
+            entries = self._tax_year_entries(tax_year)
+            net_income_taxable = [self.projections[i].net_income_taxable[year] for i, year in entries]
+            home_loan_deduction = [self.projections[i].home_loan_deduction[year] for i, year in entries]
+            total_net_income_taxable = self.net_income_taxable[tax_year_index]
+            total_home_loan_deduction = self.home_loan_deduction[tax_year_index]
+
+            tax_change = self.income_tax[tax_year_index] - base_income_tax
+            tax_change_before_deductions = self.income_tax_before_deductions[tax_year_index] - base_income_tax
+            tax_change_from_deductions = tax_change - tax_change_before_deductions
+
+            shares = []
+            for income, deduction in zip(net_income_taxable, home_loan_deduction):
+                if total_net_income_taxable != 0:
+                    share = tax_change_before_deductions * income / total_net_income_taxable
+                else:
+                    share = tax_change_before_deductions / len(entries)
+                if total_home_loan_deduction != 0:
+                    share += tax_change_from_deductions * deduction / total_home_loan_deduction
+                shares.append(share)
+
+            for (i, year), allocation in zip(entries, self._allocate(int(tax_change), shares)):
+                self.property_income_tax_change[i][year] = allocation
+
+    def _calculate_property_income_tax_real_estate(self):
+        self.property_income_tax_real_estate = [[max(0, tax_change) for tax_change in tax_changes]
+                                                for tax_changes in self.property_income_tax_change]
+
+    def _calculate_property_income_tax_shield(self):
+        self.property_income_tax_shield = [[max(0, -tax_change) for tax_change in tax_changes]
+                                           for tax_changes in self.property_income_tax_change]
+
+    def _calculate_property_net_income_after_taxes(self):
+        self.property_net_income_after_taxes = [
+            [net_income_before_taxes - income_tax_real_estate + income_tax_shield
+             for net_income_before_taxes, income_tax_real_estate, income_tax_shield in zip(
+                 projection.net_income_before_taxes, income_tax_real_estate_by_year, income_tax_shield_by_year)]
+            for projection, income_tax_real_estate_by_year, income_tax_shield_by_year in zip(
+                self.projections, self.property_income_tax_real_estate, self.property_income_tax_shield)
+        ]
+
+    def _calculate_net_income_after_taxes(self):
+        self.net_income_after_taxes = [
+            sum(self.property_net_income_after_taxes[i][year] for i, year in self._tax_year_entries(tax_year))
+            for tax_year in self.tax_year
+        ]
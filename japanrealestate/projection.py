@@ -0,0 +1,186 @@
+import copy
+import numpy as np
+
+
+class Projection:
+    """
+    Class to calculate the year-varying fields of a RealEstateCalc for every year from 0 until horizon.
+
+    RealEstateCalc only holds the fields for a single calc_year, and its cumulative fields used to be calculated by
+    recursively re-calculating the whole class for every previous year. This class instead steps through the years once
+    (a single forward pass), re-using the year-varying _calculate_* methods of RealEstateCalc and accumulating the
+    running totals along the way. The results are identical to changing calc_year and calling calculate_all_fields().
+    """
+
+    def __init__(
+            self,
+            real_estate_calc=None,
+            horizon=None,
+            sale_price=None,
+            fields=None,
+    ):
+        """
+        :param real_estate_calc: Instance of RealEstateCalc() class whose fields have already been calculated.
+               It is not modified by this class.
+        :param horizon: Last year (inclusive) of the projection. Defaults to calc_year of real_estate_calc.
+        :param sale_price: Price of property if sold at the end of each year. If None, will be estimated using the book
+               value of each year (note that the sale_price of real_estate_calc is not used, since it is overwritten
+               with the book value of its own calc_year once calculated).
+        :param fields: Names of the yearly fields to calculate (together with the yearly fields they depend on).
+               Defaults to all of _YEARLY_FIELDS. Fields which are not calculated are left as None.
+        """
+
+        # Initialize class fields from arguments
+        self.real_estate_calc = real_estate_calc
+        self.horizon = horizon
+        self.sale_price = sale_price
+        self.fields = fields
+
+        # Derived fields that will be calculated (lists where element i represents year i)
+        self.calc_year = None  # Year of each element, from 0 until horizon
+        self.calc_date = None
+        self.depreciation = None
+        self.net_income_before_taxes = None
+        self.net_income_taxable = None
+        self.home_loan_deduction = None
+        self.income_tax = None
+        self.income_tax_real_estate = None
+        self.income_tax_shield = None
+        self.net_income_after_taxes = None
+        self.cumulative_net_income = None  # Running total of net_income_after_taxes
+        self.mortgage_amount_outstanding = None
+        self.depreciation_cumulative = None
+        self.depreciated_building_value = None
+        self.book_value = None
+        self.equity_value = None
+        self.sale_prices = None  # Sale price if sold at the end of each year
+        self.sale_agent_fee = None
+        self.sale_other_transaction_fees = None
+        self.sale_proceeds_after_fees = None
+        self.capital_gains = None
+        self.capital_gains_tax_rate = None
+        self.capital_gains_tax = None
+        self.sale_proceeds_net = None
+        self.net_profit_on_realestate = None
+
+        # Calculate!
+        self.calculate_all_fields()
+
+    # Fields of RealEstateCalc that vary by year, in the order they are calculated by _calculate_yearly_fields
+    _YEARLY_FIELDS = [
+        'calc_date',
+        'depreciation',
+        'net_income_before_taxes',
+        'net_income_taxable',
+        'home_loan_deduction',
+        'income_tax',
+        'income_tax_real_estate',
+        'income_tax_shield',
+        'net_income_after_taxes',
+        'cumulative_net_income',
+        'mortgage_amount_outstanding',
+        'depreciation_cumulative',
+        'depreciated_building_value',
+        'book_value',
+        'equity_value',
+        'sale_price',
+        'sale_agent_fee',
+        'sale_other_transaction_fees',
+        'sale_proceeds_after_fees',
+        'capital_gains',
+        'capital_gains_tax_rate',
+        'capital_gains_tax',
+        'sale_proceeds_net',
+        'net_profit_on_realestate',
+    ]
+
+    # Running totals over the years, and the yearly field they sum up
+    _RUNNING_TOTALS = {
+        'cumulative_net_income': 'net_income_after_taxes',
+    }
+
+    def calculate_all_fields(self):
+        """Calculate value for all derived fields"""
+        self._calculate_horizon()
+        self._calculate_fields()
+        self._calculate_yearly_fields()
+
+    def _calculate_horizon(self):
+        if self.horizon is None:
+            self.horizon = self.real_estate_calc.calc_year
+
+    def _calculate_fields(self):
+        """Expands the requested fields to every yearly field they depend on, in the order of _YEARLY_FIELDS"""
+        if self.fields is None:
+            self.fields = list(self._YEARLY_FIELDS)
+        else:
+            graph = type(self.real_estate_calc)._DEPENDENCY_GRAPH
+            required_fields = set(self.fields)
+            while True:
+                # Running totals are accumulated from the yearly value they sum up, rather than by _calculate_* methods
+                summed_fields = {self._RUNNING_TOTALS[field] for field in required_fields if field in self._RUNNING_TOTALS}
+                expanded_fields = set(graph.upstream(required_fields | summed_fields))
+                if expanded_fields == required_fields:
+                    break
+                required_fields = expanded_fields
+
+            self.fields = [field for field in self._YEARLY_FIELDS if field in required_fields]
+
+    def _calculate_yearly_fields(self):
+        """
+        Single forward pass from year 0 until horizon.
+
+        A shallow copy of the calculator is stepped through the years so that the year-independent fields (and the
+        Mortgage and IncomeTaxCalc objects, which are only read) are shared rather than recalculated every year.
+        """
+        self.calc_year = list(range(0, self.horizon + 1))
+        for field in self.fields:
+            setattr(self, self._attribute_name(field), [])
+
+        year_calc = copy.copy(self.real_estate_calc)
+
+        # Year-independent disposal fields, which RealEstateCalc only calculates after cumulative_net_income
+        if 'capital_gains' in self.fields:
+            year_calc._calculate_acquisition_cost()
+        if 'capital_gains_tax' in self.fields:
+            year_calc._calculate_capital_gains_tax_primary_residence_deduction()
+
+        running_totals = {field: 0 for field in self._RUNNING_TOTALS}
+
+        for year in self.calc_year:
+            year_calc.calc_year = year
+            for field in self.fields:
+                if field in self._RUNNING_TOTALS:
+                    running_totals[field] += getattr(year_calc, self._RUNNING_TOTALS[field])
+                    setattr(year_calc, field, running_totals[field])
+                elif field == 'sale_price':
+                    # The sale price of this projection is used as is, or else the book value of each year
+                    year_calc.sale_price = self.sale_price
+                    if self.sale_price is None:
+                        year_calc._calculate_sale_price()
+                else:
+                    getattr(year_calc, '_calculate_' + field)()
+
+            for field in self.fields:
+                getattr(self, self._attribute_name(field)).append(getattr(year_calc, field))
+
+    @staticmethod
+    def _attribute_name(field):
+        """sale_price is an input of this class, so the yearly sale prices are stored under sale_prices"""
+        if field == 'sale_price':
+            return 'sale_prices'
+        return field
+
+    def to_arrays(self):
+        """
+        Returns the yearly fields as a dict of field name to NumPy array (element i of each array is the value for year
+        i), i.e. a columnar view of the projection. calc_date is returned as a datetime64[D] array.
+        """
+        arrays = {'calc_year': np.array(self.calc_year, dtype=int)}
+        for field in self.fields:
+            values = getattr(self, self._attribute_name(field))
+            if field == 'calc_date':
+                arrays[field] = np.array(values, dtype='datetime64[D]')
+            else:
+                arrays[field] = np.array(values)
+        return arrays
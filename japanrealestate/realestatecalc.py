@@ -1,6 +1,10 @@
 from dateutil.relativedelta import relativedelta
+from japanrealestate import returns
 from japanrealestate import taxconstants
-from japanrealestate.mortgage import Mortgage
+from japanrealestate.dependencygraph import DependencyGraph
+from japanrealestate.depreciationschedule import DepreciationSchedule
+from japanrealestate.mortgagecache import MortgageCache
+from japanrealestate.projection import Projection
 import copy
 import datetime as dt
 
@@ -77,6 +81,9 @@ class RealEstateCalc:
             is_primary_residence=0,
             is_resident_for_tax_purposes=False,
             sale_price=None,
+
+            # Calculation options
+            outputs=None,
     ):
         """
         Parameters associated with initial purchase:
@@ -167,6 +174,11 @@ class RealEstateCalc:
                If zero, will be treated as investment property for tax purposes.
         :param is_resident_for_tax_purposes: True if you are a resident of Japan for tax purposes, false otherwise.
         :param sale_price: Price of property sold. If None, will be estimated using depreciation model.
+
+        Calculation options:
+        :param outputs: Names of the derived fields to calculate (together with the fields they depend on), e.g.
+               ['net_income_after_taxes'] to skip the disposal fields. Other derived fields are left as None.
+               Defaults to all fields (see calculate_all_fields).
         """
         # Initialize class fields from arguments
         self.purchase_date = purchase_date
@@ -201,6 +213,9 @@ class RealEstateCalc:
         self.is_resident_for_tax_purposes = is_resident_for_tax_purposes
         self.sale_price = sale_price
 
+        # Inputs which were None and were given a default value computed from other fields (see _set_default)
+        self._defaulted_inputs = {}
+
         # Derived fields that will be calculated
 
         # Acquisition derived fields
@@ -217,6 +232,7 @@ class RealEstateCalc:
         self.depreciation_years = None  # Number of years that building value can be depreciated to zero
         self.depreciation_percentage = None  # Annual % (in decimal) of building value depreciated (straight line)
         self.depreciation_annual = None  # Annual depreciation amount for building value
+        self.depreciation_schedule = None  # DepreciationSchedule() object
         self.rental_income = None  # Annual income from tenant rental
         self.renewal_income = None  # Annual income from tenant renewing lease
         self.total_income = None  # Annual total income from tenant
@@ -262,7 +278,10 @@ class RealEstateCalc:
         self.net_profit_on_realestate = None  # Net profit (including past income) after selling and paying back loan
 
         # Calculate!
-        self.calculate_all_fields()
+        if outputs is None:
+            self.calculate_all_fields()
+        else:
+            self.calculate_fields(*outputs)
 
     def calculate_all_fields(self):
         # Default inputs
@@ -285,6 +304,7 @@ class RealEstateCalc:
         self._calculate_depreciation_years()
         self._calculate_depreciation_percentage()
         self._calculate_depreciation_annual()
+        self._calculate_depreciation_schedule()
         self._calculate_rental_income()
         self._calculate_renewal_income()
         self._calculate_total_income()
@@ -324,6 +344,94 @@ class RealEstateCalc:
         self._calculate_sale_proceeds_net()
         self._calculate_net_profit_on_realestate()
 
+    def calculate_fields(self, *fields):
+        """
+        Calculate only the input derived fields and the derived fields they depend on (directly or indirectly),
+        according to _DEPENDENCY_GRAPH, e.g. calculate_fields('net_income_after_taxes').
+        """
+        for field in self._DEPENDENCY_GRAPH.upstream(fields):
+            getattr(self, '_calculate_' + field)()
+
+    def recalculate(self, *changed_fields):
+        """
+        Recalculate only the derived fields which depend (directly or indirectly) on the changed fields, according to
+        _DEPENDENCY_GRAPH. This gives the same result as calculate_all_fields(), but is much cheaper when only a few
+        fields were changed, e.g.:
+           real_estate_calc.monthly_fees = 30000
+           real_estate_calc.recalculate('monthly_fees')
+        :param changed_fields: Names of the fields that were changed (inputs or overridden derived fields)
+        """
+        if not self._defaulted_inputs.keys().isdisjoint(changed_fields):
+            # Changed inputs were set explicitly (or to None, to be defaulted again), so they are no longer defaults
+            self._defaulted_inputs = {field: value for field, value in self._defaulted_inputs.items()
+                                      if field not in changed_fields}
+
+        for field in self._DEPENDENCY_GRAPH.downstream(changed_fields):
+            getattr(self, '_calculate_' + field)()
+
+    def update(self, **changes):
+        """
+        Sets the input fields (e.g. update(monthly_fees=30000)) and recalculates the derived fields depending on them
+        """
+        for field, value in changes.items():
+            setattr(self, field, value)
+        self.recalculate(*changes)
+
+    def fork(self, **overrides):
+        """
+        Returns a variant of this calculator with the input fields overridden (e.g. fork(monthly_fees=30000)), where
+        only the derived fields depending on the overrides are recalculated. This calculator is not modified.
+
+        All other fields, including the mortgage and the income_tax_calculator, are shared with this calculator rather
+        than copied (recalculating a field replaces its value), so forking many variants of a base scenario is much
+        cheaper than copy.deepcopy() and calculate_all_fields(). Shared calculators should therefore not be modified in
+        place: to vary the owner, fork it too, e.g.
+           real_estate_calc.fork(income_tax_calculator=real_estate_calc.income_tax_calculator.fork(other_income=0))
+        """
+        forked_calc = copy.copy(self)
+        forked_calc.update(**overrides)
+        return forked_calc
+
+    def project(self, horizon=None, sale_price=None, fields=None):
+        """
+        Returns every year-varying field for years 0 until horizon as a dict of field name to NumPy array, where
+        element i of each array is the value for year i (see Projection for details).
+
+        This is equivalent to changing calc_year and calling calculate_all_fields() for every year, but the years are
+        calculated in a single pass and this object is not modified.
+
+        :param horizon: Last year (inclusive) of the projection. Defaults to calc_year.
+        :param sale_price: Price of property if sold at the end of each year. If None, the book value of each year is
+               used.
+        :param fields: Names of the year-varying fields to return (together with the fields they depend on). Defaults
+               to all of them.
+        """
+        return Projection(real_estate_calc=self, horizon=horizon, sale_price=sale_price, fields=fields).to_arrays()
+
+    def cash_flows(self):
+        """
+        Returns the yearly cash flows of the equity invested if the property is sold at the end of calc_year, as a list
+        where element 0 is the initial outlay (negative) at purchase and element i + 1 is the cash flow at the end of
+        year i: net_income_after_taxes, plus sale_proceeds_net less mortgage_amount_outstanding for the last year.
+        """
+        previous_years = Projection(real_estate_calc=self, horizon=self.calc_year - 1,
+                                    fields=['net_income_after_taxes'])
+        return ([-self.purchase_initial_outlay] +
+                previous_years.net_income_after_taxes +
+                [self.net_income_after_taxes + self.sale_proceeds_net - self.mortgage_amount_outstanding])
+
+    def npv(self, discount_rate):
+        """Net present value of cash_flows() at the input yearly discount rate"""
+        return float(returns.npv(discount_rate, self.cash_flows()))
+
+    def irr(self):
+        """Internal rate of return of cash_flows() on the equity invested, NaN if there is none (see returns.irr)"""
+        return float(returns.irr(self.cash_flows()))
+
+    def equity_multiple(self):
+        """Total cash returned by cash_flows() per unit of initial outlay"""
+        return float(returns.equity_multiple(self.cash_flows()))
+
     # Real estate specific constants
     _RENEWAL_INCOME_RATE_DEFAULT = 1 / 24  # Lease renewed every 2 years and one month rent is paid by tenant
     _RENTAL_MANAGEMENT_FEE_DEFAULT = 0.05  # 5% seems normal in Tokyo
@@ -346,9 +454,100 @@ class RealEstateCalc:
     _CAPITAL_GAINS_TAX_LONG_MUNICIPAL = 0.05
     _CAPITAL_GAINS_TAX_PRIMARY_RESIDENCE_DEDUCTION = 30000000
 
+    # Fields read by each _calculate_* method, in the order of calculate_all_fields
+    _DEPENDENCY_GRAPH = DependencyGraph([
+        # Default inputs
+        ('purchase_date', ['purchase_date']),
+        ('renewal_income_rate', ['renewal_income_rate']),
+        ('rental_management_rental_fee', ['rental_management_rental_fee']),
+        ('rental_management_renewal_fee', ['rental_management_renewal_fee']),
+
+        # Acquisition derived fields
+        ('purchase_price_financed', ['purchase_price', 'bank_valuation_to_actual', 'mortgage_loan_to_value']),
+        ('mortgage', ['purchase_price_financed', 'mortgage_tenor', 'mortgage_rate']),
+        ('purchase_price_building', ['purchase_price', 'building_to_land_ratio', 'age']),
+        ('purchase_price_land', ['purchase_price', 'purchase_price_building']),
+        ('purchase_agent_fee', ['purchase_price', 'agent_fee_variable', 'agent_fee_fixed']),
+        ('purchase_other_transaction_fees', ['purchase_price', 'other_transaction_fees']),
+        ('purchase_price_and_fees', ['purchase_price', 'purchase_agent_fee', 'purchase_other_transaction_fees',
+                                     'mortgage_initiation_fees', 'renovation_cost']),
+        ('purchase_initial_outlay', ['purchase_price_and_fees', 'purchase_price_financed']),
+
+        # Ongoing derived fields
+        ('depreciation_years', ['age', 'useful_life']),
+        ('depreciation_percentage', ['depreciation_years']),
+        ('depreciation_annual', ['purchase_price_building', 'depreciation_percentage']),
+        ('depreciation_schedule', ['depreciation_annual', 'depreciation_years']),
+        ('rental_income', ['purchase_price', 'gross_rental_yield']),
+        ('renewal_income', ['renewal_income_rate', 'rental_income']),
+        ('total_income', ['rental_income', 'renewal_income']),
+        ('maintenance_expense', ['maintenance_per_m2', 'size']),
+        ('monthly_fees_annualized', ['monthly_fees']),
+        ('rental_management_renewal_expense', ['rental_income', 'rental_management_renewal_fee']),
+        ('rental_management_rental_expense', ['rental_income', 'rental_management_rental_fee']),
+        ('rental_management_total_expense', ['rental_management_renewal_expense', 'rental_management_rental_expense']),
+        ('property_tax_expense', ['purchase_price', 'property_tax_rate']),
+        ('total_expense', ['maintenance_expense', 'monthly_fees_annualized', 'rental_management_total_expense',
+                           'property_tax_expense']),
+        ('depreciation', ['calc_year', 'depreciation_schedule']),
+        ('calc_date', ['purchase_date', 'calc_year']),
+        ('net_income_before_taxes', ['total_income', 'total_expense', 'mortgage', 'calc_year']),
+        ('net_income_taxable', ['is_primary_residence', 'total_income', 'total_expense', 'depreciation', 'mortgage',
+                                'calc_year']),
+        ('home_loan_deduction', ['is_primary_residence', 'calc_year', 'size', 'mortgage', 'income_tax_calculator',
+                                 'age']),
+        ('income_tax', ['income_tax_calculator', 'net_income_taxable', 'home_loan_deduction', 'calc_date']),
+        ('income_tax_real_estate', ['income_tax_calculator', 'income_tax']),
+        ('income_tax_shield', ['income_tax_calculator', 'income_tax']),
+        ('net_income_after_taxes', ['net_income_before_taxes', 'income_tax_real_estate', 'income_tax_shield']),
+        # Previous years are calculated by Projection, from the fields used for net_income_after_taxes
+        ('cumulative_net_income', ['calc_year', 'net_income_after_taxes', 'total_income', 'total_expense',
+                                   'depreciation_schedule', 'purchase_date', 'mortgage',
+                                   'is_primary_residence', 'size', 'age', 'income_tax_calculator']),
+        ('mortgage_amount_outstanding', ['mortgage', 'calc_year']),
+
+        # Disposal derived fields
+        ('depreciation_cumulative', ['calc_year', 'depreciation_schedule']),
+        ('depreciated_building_value', ['purchase_price_building', 'depreciation_cumulative']),
+        ('book_value', ['purchase_price_land', 'depreciated_building_value']),
+        ('equity_value', ['book_value', 'mortgage_amount_outstanding']),
+        ('sale_price', ['sale_price', 'book_value']),
+        ('sale_agent_fee', ['sale_price', 'agent_fee_variable', 'agent_fee_fixed']),
+        ('sale_other_transaction_fees', ['sale_price', 'other_transaction_fees']),
+        ('sale_proceeds_after_fees', ['sale_price', 'sale_agent_fee', 'sale_other_transaction_fees']),
+        ('acquisition_cost', ['purchase_price', 'purchase_agent_fee', 'purchase_other_transaction_fees',
+                              'renovation_cost']),
+        ('capital_gains_tax_primary_residence_deduction', ['is_primary_residence']),
+        ('capital_gains', ['sale_proceeds_after_fees', 'acquisition_cost', 'depreciation_cumulative']),
+        ('capital_gains_tax_rate', ['calc_year', 'is_resident_for_tax_purposes', 'calc_date']),
+        ('capital_gains_tax', ['capital_gains', 'capital_gains_tax_rate',
+                               'capital_gains_tax_primary_residence_deduction']),
+        ('sale_proceeds_net', ['sale_proceeds_after_fees', 'capital_gains_tax']),
+        ('net_profit_on_realestate', ['sale_proceeds_net', 'cumulative_net_income', 'purchase_initial_outlay',
+                                      'mortgage_amount_outstanding']),
+    ])
+
+    # Mortgage schedules shared by all calculators, as the same loan is typically recalculated for many years/scenarios.
+    # Hit/miss counters are available on the cache (e.g. RealEstateCalc.mortgage_cache.hits).
+    mortgage_cache = MortgageCache(max_size=256)
+
+    def _is_defaulted(self, field):
+        """
+        True if the input field is None, or still holds the default value it was given by _set_default(), i.e. if it
+        should be defaulted (again, e.g. sale_price after calc_year changed) rather than kept
+        """
+        value = getattr(self, field)
+        return value is None or (field in self._defaulted_inputs and value is self._defaulted_inputs[field])
+
+    def _set_default(self, field, value):
+        """Sets an input field to its default value, recording it as a default (see _is_defaulted)"""
+        setattr(self, field, value)
+        # Replaced rather than modified, as it is shared with the copies of this calculator (see fork)
+        self._defaulted_inputs = dict(self._defaulted_inputs, **{field: value})
+
     def _calculate_purchase_date(self):
-        if self.purchase_date is None:
-            self.purchase_date = dt.date.today()
+        if self._is_defaulted('purchase_date'):
+            self._set_default('purchase_date', dt.date.today())
 
     def _calculate_renewal_income_rate(self):
         if self.renewal_income_rate is None:
@@ -371,11 +570,13 @@ class RealEstateCalc:
 
     def _calculate_mortgage(self):
         if self.purchase_price_financed > 0:
-            self.mortgage = Mortgage(
+            self.mortgage = self.mortgage_cache.get(
                 principal=self.purchase_price_financed,
                 tenor=self.mortgage_tenor,
                 rate=self.mortgage_rate
             )
+        else:
+            self.mortgage = None
 
     def _calculate_purchase_price_building(self):
         self.purchase_price_building = int(self.purchase_price * self.building_to_land_ratio)
@@ -437,6 +638,14 @@ class RealEstateCalc:
     def _calculate_depreciation_annual(self):
         self.depreciation_annual = int(self.purchase_price_building * self.depreciation_percentage)
 
+    def _calculate_depreciation_schedule(self):
+        """
+        Only the building is depreciated, as a single component. A schedule with several components (e.g. building body
+        and equipment) can be set instead with update(depreciation_schedule=DepreciationSchedule(...)).
+        """
+        self.depreciation_schedule = DepreciationSchedule(annual_amount=self.depreciation_annual,
+                                                          years=self.depreciation_years)
+
     def _calculate_rental_income(self):
         self.rental_income = int(self.purchase_price * self.gross_rental_yield)
 
@@ -495,17 +704,10 @@ class RealEstateCalc:
 
     def depreciation_for_year(self, year):
         """Returns the depreciation amount for input year"""
-        if year < self.depreciation_years:
-            return self.depreciation_annual
-        else:
-            return 0
+        return self.depreciation_schedule.depreciation_for_year(year)
 
     def _calculate_depreciation(self):
-        """
-        Depreciation amount for calc_year.
-        Unlike the other _calculate_* methods, logic is delegated to a helper function since the logic is re-used for
-        _calculate_depreciation_cumulative.
-        """
+        """Depreciation amount for calc_year"""
         self.depreciation = self.depreciation_for_year(year=self.calc_year)
 
     def _calculate_net_income_taxable(self):
@@ -524,9 +726,7 @@ class RealEstateCalc:
         else:
             self.net_income_taxable = self.total_income - self.total_expense - self.depreciation
             if self.mortgage is not None and self.calc_year < self.mortgage.tenor:
-                month = self.calc_year * 12  # Assume tenor is whole number of years
-                interest_payments = self.mortgage.interest_schedule[month:][:12]  # First 12 months starting at year
-                interest_payment_for_year = int(sum(interest_payments))
+                interest_payment_for_year = int(self.mortgage.interest_in_year(self.calc_year))
                 self.net_income_taxable -= interest_payment_for_year
 
     def _calculate_home_loan_deduction(self):
@@ -559,8 +759,8 @@ class RealEstateCalc:
             else:
                 self.home_loan_deduction = 200000
 
-            month = self.calc_year * 12  # Assume tenor is whole number of years
-            remaining_loan_balance = sum(self.mortgage.amortization_schedule[month:])
+            # Payments from the start of calc_year, i.e. after the previous year ends
+            remaining_loan_balance = self.mortgage.remaining_payments_after_year(self.calc_year - 1)
             self.home_loan_deduction = int(min(self.home_loan_deduction, remaining_loan_balance))
 
     def _calculate_income_tax(self):
@@ -573,18 +773,15 @@ class RealEstateCalc:
         self.income_tax = 0  # Set 0 tax if calculator is not provided
         if self.income_tax_calculator is not None:
             # Get tax before and after real estate income, as the difference is tax liability due to real estate
-
-            # Use a copy of income tax calculator so we don't touch the original one
-            copied_calc = copy.deepcopy(self.income_tax_calculator)
-
-            # Override fields for calculation
-            copied_calc.current_date = self.calc_date
-            copied_calc.other_income += self.net_income_taxable
-            copied_calc.tax_deduction += self.home_loan_deduction
-            copied_calc.calculate_all_fields()
+            # (the income tax calculator itself is not modified)
+            total_income_tax = self.income_tax_calculator.adjusted_total_income_tax(
+                additional_other_income=self.net_income_taxable,
+                additional_tax_deduction=self.home_loan_deduction,
+                current_date=self.calc_date,
+            )
 
             # Calculate tax
-            self.income_tax = int(copied_calc.total_income_tax)
+            self.income_tax = int(total_income_tax)
 
     def _calculate_income_tax_real_estate(self):
         """The amount of tax owed for rental income at calc_year based on net_income_taxable."""
@@ -607,28 +804,29 @@ class RealEstateCalc:
         )
 
     def _calculate_cumulative_net_income(self):
-        """Recursively use this class to sum up all income from 0 to calc_year"""
+        """
+        Sum up all income from 0 to calc_year.
+        Previous years are calculated in a single forward pass by Projection (rather than by recursively re-calculating
+        this class for every year), and net_income_after_taxes is used as is for calc_year.
+        """
         if self.calc_year < 0:
             self.cumulative_net_income = 0
         else:
             self.cumulative_net_income = self.net_income_after_taxes
-            copy_of_self = copy.deepcopy(self)  # Not sure this is the best way to do this recursion...?
-            copy_of_self.calc_year -= 1
-            copy_of_self.calculate_all_fields()
-            self.cumulative_net_income += copy_of_self.cumulative_net_income
+            previous_years = Projection(real_estate_calc=self,
+                                        horizon=self.calc_year - 1,
+                                        fields=['net_income_after_taxes'])
+            self.cumulative_net_income += sum(previous_years.net_income_after_taxes)
 
     def _calculate_mortgage_amount_outstanding(self):
         """Amount of loan outstanding *after* calc_year ends"""
         if self.mortgage is not None:
-            month = (self.calc_year + 1) * 12
-            self.mortgage_amount_outstanding = int(sum(self.mortgage.principal_schedule[month:]))
+            self.mortgage_amount_outstanding = int(self.mortgage.balance_after_year(self.calc_year))
         else:
             self.mortgage_amount_outstanding = 0
 
     def _calculate_depreciation_cumulative(self):
-        years_until_calc_year = range(0, self.calc_year + 1)
-        depreciation_per_year = [self.depreciation_for_year(year=x) for x in years_until_calc_year]
-        self.depreciation_cumulative = sum(depreciation_per_year)
+        self.depreciation_cumulative = self.depreciation_schedule.cumulative_depreciation_for_year(self.calc_year)
 
     def _calculate_depreciated_building_value(self):
         self.depreciated_building_value = int(self.purchase_price_building - self.depreciation_cumulative)
@@ -644,8 +842,8 @@ class RealEstateCalc:
         self.equity_value = int(self.book_value - self.mortgage_amount_outstanding)
 
     def _calculate_sale_price(self):
-        if self.sale_price is None:
-            self.sale_price = self.book_value
+        if self._is_defaulted('sale_price'):
+            self._set_default('sale_price', self.book_value)
 
     def _calculate_sale_agent_fee(self):
         self.sale_agent_fee = int(
@@ -0,0 +1,621 @@
+from dateutil.relativedelta import relativedelta
+from japanrealestate import returns
+from japanrealestate import taxconstants
+from japanrealestate.depreciationschedule import DepreciationSchedule
+from japanrealestate.incometaxcalcbatch import IncomeTaxCalcBatch
+from japanrealestate.mortgagebatch import MortgageBatch
+from japanrealestate.realestatecalc import RealEstateCalc
+import copy
+import datetime as dt
+import numpy as np
+
+
+def _int(values):
+    """Vectorized int(), i.e. truncation towards zero, so that values match RealEstateCalc to the yen"""
+    return np.trunc(values).astype(np.int64)
+
+
+class RealEstateCalcBatch:
+    """
+    Vectorized version of RealEstateCalc, to calculate the economics of many real estate scenarios at once
+    (e.g. a grid of purchase price x gross rental yield x mortgage rate x loan to value x tenor).
+
+    Every numeric input can be a NumPy array, and all inputs are broadcast together. Every derived field is then an
+    array of the broadcast shape, where each element is equal to the field of a RealEstateCalc created with the
+    corresponding elements of the inputs (the int(...) truncations of RealEstateCalc are reproduced, so results match to
+    the yen). This avoids constructing one Python object per scenario.
+
+    Differences with RealEstateCalc:
+        * purchase_date and income_tax_calculator are shared by all scenarios.
+        * sale_price can contain NaN for scenarios where the sale price should be estimated using the book value.
+        * mortgage is a MortgageBatch() object (with zero principal where there is no mortgage). has_mortgage and
+          mortgage_monthly_payment hold the relevant details of each scenario.
+    """
+
+    def __init__(
+            self,
+            # Parameters associated with initial purchase
+            purchase_date=None,
+            purchase_price=0,
+            building_to_land_ratio=0.7,
+            size=0,
+            age=0,
+            mortgage_loan_to_value=0,
+            bank_valuation_to_actual=1,
+            mortgage_tenor=0,
+            mortgage_rate=0,
+            mortgage_initiation_fees=0,
+            renovation_cost=0,
+
+            # Parameters associated with initial purchase but also applied to final sale
+            agent_fee_variable=0,
+            agent_fee_fixed=0,
+            other_transaction_fees=0,
+
+            # Parameters associated with ongoing concern
+            monthly_fees=0,
+            property_tax_rate=0,
+            maintenance_per_m2=1000,
+            useful_life=47,
+            calc_year=0,
+            income_tax_calculator=None,
+
+            # Parameters associated with renting out the real estate
+            gross_rental_yield=0,
+            renewal_income_rate=None,
+            rental_management_rental_fee=None,
+            rental_management_renewal_fee=None,
+
+            # Parameters associated with final disposal
+            is_primary_residence=0,
+            is_resident_for_tax_purposes=False,
+            sale_price=None,
+    ):
+        """
+        See RealEstateCalc for the meaning of each parameter. All parameters except purchase_date and
+        income_tax_calculator can be arrays.
+
+        :param purchase_date: date when properties were purchased. Defaults to date.today().
+        :param income_tax_calculator: Instance of IncomeTaxCalc() class shared by all scenarios.
+        :param sale_price: Price of property sold. If None (or NaN for individual scenarios), will be estimated using
+               depreciation model.
+        """
+        # Initialize class fields from arguments
+        self.purchase_date = purchase_date
+        self.income_tax_calculator = income_tax_calculator
+        self.renewal_income_rate = renewal_income_rate
+        self.rental_management_rental_fee = rental_management_rental_fee
+        self.rental_management_renewal_fee = rental_management_renewal_fee
+        self.sale_price = sale_price
+
+        (
+            self.purchase_price,
+            self.building_to_land_ratio,
+            self.size,
+            self.age,
+            self.mortgage_loan_to_value,
+            self.bank_valuation_to_actual,
+            self.mortgage_tenor,
+            self.mortgage_rate,
+            self.mortgage_initiation_fees,
+            self.renovation_cost,
+            self.agent_fee_variable,
+            self.agent_fee_fixed,
+            self.other_transaction_fees,
+            self.monthly_fees,
+            self.property_tax_rate,
+            self.maintenance_per_m2,
+            self.useful_life,
+            self.calc_year,
+            self.gross_rental_yield,
+            self.is_primary_residence,
+            self.is_resident_for_tax_purposes,
+        ) = np.broadcast_arrays(
+            purchase_price,
+            building_to_land_ratio,
+            size,
+            age,
+            mortgage_loan_to_value,
+            bank_valuation_to_actual,
+            mortgage_tenor,
+            mortgage_rate,
+            mortgage_initiation_fees,
+            renovation_cost,
+            agent_fee_variable,
+            agent_fee_fixed,
+            other_transaction_fees,
+            monthly_fees,
+            property_tax_rate,
+            maintenance_per_m2,
+            useful_life,
+            calc_year,
+            gross_rental_yield,
+            is_primary_residence,
+            is_resident_for_tax_purposes,
+        )
+        self.shape = self.purchase_price.shape  # Broadcast shape of inputs, and shape of all derived fields
+
+        # Derived fields that will be calculated (see RealEstateCalc for descriptions)
+
+        # Acquisition derived fields
+        self.purchase_price_financed = None
+        self.has_mortgage = None  # True where a mortgage is taken out (i.e. where RealEstateCalc.mortgage is not None)
+        self.mortgage = None  # MortgageBatch() object
+        self.mortgage_monthly_payment = None  # Total monthly payment, 0 where there is no mortgage
+        self.purchase_price_building = None
+        self.purchase_price_land = None
+        self.purchase_agent_fee = None
+        self.purchase_other_transaction_fees = None
+        self.purchase_price_and_fees = None
+        self.purchase_initial_outlay = None
+
+        # Ongoing derived fields
+        self.depreciation_years = None
+        self.depreciation_percentage = None
+        self.depreciation_annual = None
+        self.depreciation_schedule = None  # DepreciationSchedule() object, whose components are arrays
+        self.rental_income = None
+        self.renewal_income = None
+        self.total_income = None
+        self.maintenance_expense = None
+        self.monthly_fees_annualized = None
+        self.rental_management_renewal_expense = None
+        self.rental_management_rental_expense = None
+        self.rental_management_total_expense = None
+        self.property_tax_expense = None
+        self.calc_date = None  # datetime64[D] array
+        self.total_expense = None
+        self.net_income_before_taxes = None
+        self.depreciation = None
+        self.net_income_taxable = None
+        self.home_loan_deduction = None
+        self.income_tax = None
+        self.income_tax_real_estate = None
+        self.income_tax_shield = None
+        self.net_income_after_taxes = None
+        self.cumulative_net_income = None
+        self.mortgage_amount_outstanding = None
+
+        # Disposal derived fields
+        self.depreciation_cumulative = None
+        self.sale_agent_fee = None
+        self.sale_other_transaction_fees = None
+        self.depreciated_building_value = None
+        self.book_value = None
+        self.equity_value = None
+        self.sale_proceeds_after_fees = None
+        self.acquisition_cost = None
+        self.capital_gains_tax_primary_residence_deduction = None
+        self.capital_gains = None
+        self.capital_gains_tax_rate = None
+        self.capital_gains_tax = None
+        self.sale_proceeds_net = None
+        self.net_profit_on_realestate = None
+
+        # Calculate!
+        self.calculate_all_fields()
+
+    def calculate_all_fields(self):
+        # Default inputs
+        self._calculate_purchase_date()
+        self._calculate_renewal_income_rate()
+        self._calculate_rental_management_rental_fee()
+        self._calculate_rental_management_renewal_fee()
+
+        # Acquisition derived fields
+        self._calculate_purchase_price_financed()
+        self._calculate_mortgage()
+        self._calculate_purchase_price_building()
+        self._calculate_purchase_price_land()
+        self._calculate_purchase_agent_fee()
+        self._calculate_purchase_other_transaction_fees()
+        self._calculate_purchase_price_and_fees()
+        self._calculate_purchase_initial_outlay()
+
+        # Ongoing derived fields
+        self._calculate_depreciation_years()
+        self._calculate_depreciation_percentage()
+        self._calculate_depreciation_annual()
+        self._calculate_depreciation_schedule()
+        self._calculate_rental_income()
+        self._calculate_renewal_income()
+        self._calculate_total_income()
+        self._calculate_maintenance_expense()
+        self._calculate_monthly_fees_annualized()
+        self._calculate_rental_management_renewal_expense()
+        self._calculate_rental_management_rental_expense()
+        self._calculate_rental_management_total_expense()
+        self._calculate_property_tax_expense()
+        self._calculate_total_expense()
+        self._calculate_depreciation()
+        self._calculate_calc_date()
+        self._calculate_net_income_before_taxes()
+        self._calculate_net_income_taxable()
+        self._calculate_home_loan_deduction()
+        self._calculate_income_tax()
+        self._calculate_income_tax_real_estate()
+        self._calculate_income_tax_shield()
+        self._calculate_net_income_after_taxes()
+        self._calculate_cumulative_net_income()
+        self._calculate_mortgage_amount_outstanding()
+
+        # Disposal derived fields
+        self._calculate_depreciation_cumulative()
+        self._calculate_depreciated_building_value()
+        self._calculate_book_value()
+        self._calculate_equity_value()
+        self._calculate_sale_price()
+        self._calculate_sale_agent_fee()
+        self._calculate_sale_other_transaction_fees()
+        self._calculate_sale_proceeds_after_fees()
+        self._calculate_acquisition_cost()
+        self._calculate_capital_gains_tax_primary_residence_deduction()
+        self._calculate_capital_gains()
+        self._calculate_capital_gains_tax_rate()
+        self._calculate_capital_gains_tax()
+        self._calculate_sale_proceeds_net()
+        self._calculate_net_profit_on_realestate()
+
+    def cash_flows(self):
+        """
+        Returns the yearly cash flows of every scenario (see RealEstateCalc.cash_flows) as an array of shape
+        shape + (largest calc_year + 2,), padded with zeros after the sale of scenarios with a smaller calc_year.
+        """
+        calc_year = np.clip(self.calc_year, 0, None)
+        cash_flows = np.zeros(self.shape + (int(calc_year.max(initial=0)) + 2,), dtype=np.int64)
+        cash_flows[..., 0] = -self.purchase_initial_outlay
+        for year, net_income_after_taxes in self._previous_years_net_income_after_taxes():
+            cash_flows[..., year + 1] = np.where(year < self.calc_year, net_income_after_taxes, 0)
+
+        last_cash_flow = self.net_income_after_taxes + self.sale_proceeds_net - self.mortgage_amount_outstanding
+        np.put_along_axis(cash_flows, (calc_year + 1)[..., np.newaxis], last_cash_flow[..., np.newaxis], axis=-1)
+        return cash_flows
+
+    def npv(self, discount_rate):
+        """Net present value of cash_flows() at the input yearly discount rate(s), for every scenario"""
+        return returns.npv(discount_rate, self.cash_flows())
+
+    def irr(self):
+        """Internal rate of return of cash_flows() for every scenario, solved for all scenarios at once"""
+        return returns.irr(self.cash_flows())
+
+    def equity_multiple(self):
+        """Total cash returned by cash_flows() per unit of initial outlay, for every scenario"""
+        return returns.equity_multiple(self.cash_flows())
+
+    def _calculate_purchase_date(self):
+        if self.purchase_date is None:
+            self.purchase_date = dt.date.today()
+
+    def _calculate_renewal_income_rate(self):
+        if self.renewal_income_rate is None:
+            self.renewal_income_rate = RealEstateCalc._RENEWAL_INCOME_RATE_DEFAULT
+        self.renewal_income_rate = np.broadcast_to(self.renewal_income_rate, self.shape)
+
+    def _calculate_rental_management_rental_fee(self):
+        if self.rental_management_rental_fee is None:
+            self.rental_management_rental_fee = RealEstateCalc._RENTAL_MANAGEMENT_FEE_DEFAULT
+        self.rental_management_rental_fee = np.broadcast_to(self.rental_management_rental_fee, self.shape)
+
+    def _calculate_rental_management_renewal_fee(self):
+        if self.rental_management_renewal_fee is None:
+            self.rental_management_renewal_fee = RealEstateCalc._RENTAL_MANAGEMENT_RENEWAL_DEFAULT
+        self.rental_management_renewal_fee = np.broadcast_to(self.rental_management_renewal_fee, self.shape)
+
+    def _calculate_purchase_price_financed(self):
+        self.purchase_price_financed = _int(
+            self.purchase_price *
+            self.bank_valuation_to_actual *
+            self.mortgage_loan_to_value
+        )
+
+    def _calculate_mortgage(self):
+        self.has_mortgage = self.purchase_price_financed > 0
+
+        # Scenarios without a mortgage all share a single empty loan
+        self.mortgage = MortgageBatch(
+            principal=np.where(self.has_mortgage, self.purchase_price_financed, 0),
+            tenor=np.where(self.has_mortgage, self.mortgage_tenor, 0),
+            rate=np.where(self.has_mortgage, self.mortgage_rate, 0)
+        )
+        self.mortgage_monthly_payment = self.mortgage.monthly_payment
+
+    def _calculate_purchase_price_building(self):
+        purchase_price_building = _int(self.purchase_price * self.building_to_land_ratio)
+        self.purchase_price_building = np.where(
+            self.age == 0,  # Consumption tax for new properties, see RealEstateCalc
+            purchase_price_building * (1 + taxconstants.CONSUMPTION_TAX),
+            purchase_price_building
+        )
+
+    def _calculate_purchase_price_land(self):
+        self.purchase_price_land = self.purchase_price - self.purchase_price_building
+
+    def _calculate_purchase_agent_fee(self):
+        self.purchase_agent_fee = _int(
+            (self.purchase_price * self.agent_fee_variable + self.agent_fee_fixed) *
+            (1 + taxconstants.CONSUMPTION_TAX)
+        )
+
+    def _calculate_purchase_other_transaction_fees(self):
+        self.purchase_other_transaction_fees = _int(self.purchase_price * self.other_transaction_fees)
+
+    def _calculate_purchase_price_and_fees(self):
+        self.purchase_price_and_fees = _int(
+            self.purchase_price +
+            self.purchase_agent_fee +
+            self.purchase_other_transaction_fees +
+            self.mortgage_initiation_fees +
+            self.renovation_cost
+        )
+
+    def _calculate_purchase_initial_outlay(self):
+        self.purchase_initial_outlay = self.purchase_price_and_fees - self.purchase_price_financed
+
+    def _calculate_depreciation_years(self):
+        age_for_depreciation = (np.minimum(self.useful_life, self.age) *
+                                RealEstateCalc._DEPRECIATION_AGE_FACTOR_IF_SECOND_HAND)
+        self.depreciation_years = np.where(
+            self.age == 0,
+            self.useful_life,
+            _int(self.useful_life - age_for_depreciation)
+        )
+
+    def _calculate_depreciation_percentage(self):
+        with np.errstate(divide='ignore'):
+            self.depreciation_percentage = np.where(self.depreciation_years == 0, 0, 1 / self.depreciation_years)
+
+    def _calculate_depreciation_annual(self):
+        self.depreciation_annual = _int(self.purchase_price_building * self.depreciation_percentage)
+
+    def _calculate_depreciation_schedule(self):
+        self.depreciation_schedule = DepreciationSchedule(annual_amount=self.depreciation_annual,
+                                                          years=self.depreciation_years)
+
+    def _calculate_rental_income(self):
+        self.rental_income = _int(self.purchase_price * self.gross_rental_yield)
+
+    def _calculate_renewal_income(self):
+        self.renewal_income = _int(self.renewal_income_rate * self.rental_income)
+
+    def _calculate_total_income(self):
+        self.total_income = _int(self.rental_income + self.renewal_income)
+
+    def _calculate_maintenance_expense(self):
+        self.maintenance_expense = _int(self.maintenance_per_m2 * self.size)
+
+    def _calculate_monthly_fees_annualized(self):
+        self.monthly_fees_annualized = self.monthly_fees * 12
+
+    def _calculate_rental_management_renewal_expense(self):
+        self.rental_management_renewal_expense = _int(
+            self.rental_income *
+            self.rental_management_renewal_fee *
+            (1 + taxconstants.CONSUMPTION_TAX)
+        )
+
+    def _calculate_rental_management_rental_expense(self):
+        self.rental_management_rental_expense = _int(
+            self.rental_income *
+            self.rental_management_rental_fee *
+            (1 + taxconstants.CONSUMPTION_TAX)
+        )
+
+    def _calculate_rental_management_total_expense(self):
+        self.rental_management_total_expense = _int(
+            self.rental_management_renewal_expense +
+            self.rental_management_rental_expense
+        )
+
+    def _calculate_property_tax_expense(self):
+        self.property_tax_expense = _int(self.purchase_price * self.property_tax_rate)
+
+    def _calculate_calc_date(self):
+        """Dates are calculated once per distinct calc_year, since relativedelta is not vectorized"""
+        years, inverse = np.unique(self.calc_year, return_inverse=True)
+        dates = np.array([self.purchase_date + relativedelta(years=int(year)) for year in years],
+                         dtype='datetime64[D]')
+        self.calc_date = dates[inverse].reshape(self.shape)
+
+    def _calculate_total_expense(self):
+        self.total_expense = _int(
+            self.maintenance_expense +
+            self.monthly_fees_annualized +
+            self.rental_management_total_expense +
+            self.property_tax_expense
+        )
+
+    def _calculate_net_income_before_taxes(self):
+        is_mortgage_active = self.has_mortgage & (self.calc_year < self.mortgage_tenor)
+        mortgage_payment_for_year = np.where(is_mortgage_active, _int(self.mortgage_monthly_payment * 12), 0)
+        self.net_income_before_taxes = self.total_income - self.total_expense - mortgage_payment_for_year
+
+    def _calculate_depreciation(self):
+        self.depreciation = self.depreciation_schedule.depreciation_for_year(self.calc_year)
+
+    def _calculate_net_income_taxable(self):
+        is_mortgage_active = self.has_mortgage & (self.calc_year < self.mortgage_tenor)
+        interest_payment_for_year = np.where(is_mortgage_active, _int(self.mortgage.interest_in_year(self.calc_year)), 0)
+
+        net_income_taxable = self.total_income - self.total_expense - self.depreciation - interest_payment_for_year
+        self.net_income_taxable = np.where(self.is_primary_residence != 0, 0, net_income_taxable)
+
+    def _calculate_home_loan_deduction(self):
+        is_qualified_for_deduction = ((self.is_primary_residence != 0) &
+                                      (self.calc_year < 10) &
+                                      (self.size > 50) &
+                                      self.has_mortgage &
+                                      (self.calc_year < self.mortgage_tenor) &
+                                      (self.income_tax_calculator is not None and
+                                       self.income_tax_calculator.taxable_income < 30000000))
+
+        home_loan_deduction = np.where(self.age == 0, 400000, 200000)
+
+        # Payments from the start of calc_year, i.e. after the previous year ends
+        remaining_loan_balance = self.mortgage.remaining_payments_after_year(np.maximum(self.calc_year - 1, -1))
+
+        self.home_loan_deduction = np.where(
+            is_qualified_for_deduction,
+            _int(np.minimum(home_loan_deduction, remaining_loan_balance)),
+            0
+        )
+
+    def _calculate_income_tax(self):
+        """See RealEstateCalc._calculate_income_tax. All scenarios are evaluated at once by IncomeTaxCalcBatch."""
+        self.income_tax = np.zeros(self.shape, dtype=np.int64)
+        if self.income_tax_calculator is not None:
+            income_tax_calc_batch = IncomeTaxCalcBatch.from_income_tax_calc(
+                self.income_tax_calculator,
+                current_date=self.calc_date,
+                other_income=self.income_tax_calculator.other_income + self.net_income_taxable,
+                tax_deduction=self.income_tax_calculator.tax_deduction + self.home_loan_deduction,
+            )
+            self.income_tax = _int(income_tax_calc_batch.total_income_tax)
+
+    def _calculate_income_tax_real_estate(self):
+        self.income_tax_real_estate = np.zeros(self.shape, dtype=np.int64)
+        if self.income_tax_calculator is not None:
+            self.income_tax_real_estate = _int(
+                np.maximum(0, self.income_tax - self.income_tax_calculator.total_income_tax)
+            )
+
+    def _calculate_income_tax_shield(self):
+        self.income_tax_shield = np.zeros(self.shape, dtype=np.int64)
+        if self.income_tax_calculator is not None:
+            self.income_tax_shield = _int(
+                np.maximum(0, self.income_tax_calculator.total_income_tax - self.income_tax)
+            )
+
+    def _calculate_net_income_after_taxes(self):
+        self.net_income_after_taxes = (
+            self.net_income_before_taxes -
+            self.income_tax_real_estate +
+            self.income_tax_shield
+        )
+
+    def _previous_years_net_income_after_taxes(self):
+        """
+        Yields (year, net_income_after_taxes of every scenario for year) for every year before the largest calc_year.
+        As in Projection, a shallow copy is stepped forward through the years (one vectorized pass per year, rather
+        than one recalculation per scenario and year).
+        """
+        year_calc = copy.copy(self)
+        for year in range(0, int(self.calc_year.max(initial=0))):
+            year_calc.calc_year = np.full(self.shape, year)
+            year_calc._calculate_depreciation()
+            year_calc._calculate_calc_date()
+            year_calc._calculate_net_income_before_taxes()
+            year_calc._calculate_net_income_taxable()
+            year_calc._calculate_home_loan_deduction()
+            year_calc._calculate_income_tax()
+            year_calc._calculate_income_tax_real_estate()
+            year_calc._calculate_income_tax_shield()
+            year_calc._calculate_net_income_after_taxes()
+            yield year, year_calc.net_income_after_taxes
+
+    def _calculate_cumulative_net_income(self):
+        """Sum up all income from 0 to calc_year"""
+        self.cumulative_net_income = np.where(self.calc_year < 0, 0, self.net_income_after_taxes)
+        for year, net_income_after_taxes in self._previous_years_net_income_after_taxes():
+            self.cumulative_net_income = self.cumulative_net_income + np.where(
+                year < self.calc_year,
+                net_income_after_taxes,
+                0
+            )
+
+    def _calculate_mortgage_amount_outstanding(self):
+        self.mortgage_amount_outstanding = np.where(
+            self.has_mortgage,
+            _int(self.mortgage.balance_after_year(np.maximum(self.calc_year, -1))),
+            0
+        )
+
+    def _calculate_depreciation_cumulative(self):
+        self.depreciation_cumulative = self.depreciation_schedule.cumulative_depreciation_for_year(self.calc_year)
+
+    def _calculate_depreciated_building_value(self):
+        self.depreciated_building_value = _int(self.purchase_price_building - self.depreciation_cumulative)
+
+    def _calculate_book_value(self):
+        self.book_value = _int(self.purchase_price_land + self.depreciated_building_value)
+
+    def _calculate_equity_value(self):
+        self.equity_value = _int(self.book_value - self.mortgage_amount_outstanding)
+
+    def _calculate_sale_price(self):
+        if self.sale_price is None:
+            self.sale_price = self.book_value
+        else:
+            sale_price = np.broadcast_to(self.sale_price, self.shape)
+            self.sale_price = np.where(np.isnan(sale_price), self.book_value, sale_price)
+
+    def _calculate_sale_agent_fee(self):
+        self.sale_agent_fee = _int(
+            (self.sale_price * self.agent_fee_variable + self.agent_fee_fixed) *
+            (1 + taxconstants.CONSUMPTION_TAX)
+        )
+
+    def _calculate_sale_other_transaction_fees(self):
+        self.sale_other_transaction_fees = _int(self.sale_price * self.other_transaction_fees)
+
+    def _calculate_sale_proceeds_after_fees(self):
+        self.sale_proceeds_after_fees = self.sale_price - self.sale_agent_fee - self.sale_other_transaction_fees
+
+    def _calculate_acquisition_cost(self):
+        self.acquisition_cost = (
+            self.purchase_price +
+            self.purchase_agent_fee +
+            self.purchase_other_transaction_fees +
+            self.renovation_cost
+        )
+
+    def _calculate_capital_gains_tax_primary_residence_deduction(self):
+        if not np.isin(self.is_primary_residence, [0, 1, 2]).all():
+            raise ValueError("{} is not a valid value for is_primary_residence".format(
+                np.unique(self.is_primary_residence[~np.isin(self.is_primary_residence, [0, 1, 2])])
+            ))
+        self.capital_gains_tax_primary_residence_deduction = (
+            RealEstateCalc._CAPITAL_GAINS_TAX_PRIMARY_RESIDENCE_DEDUCTION * self.is_primary_residence
+        )
+
+    def _calculate_capital_gains(self):
+        self.capital_gains = np.maximum(
+            0,
+            self.sale_proceeds_after_fees - (self.acquisition_cost - self.depreciation_cumulative)
+        )
+
+    def _calculate_capital_gains_tax_rate(self):
+        is_resident = self.is_resident_for_tax_purposes.astype(bool)
+        short_term_rate = np.where(
+            is_resident,
+            RealEstateCalc._CAPITAL_GAINS_TAX_SHORT_NATIONAL + RealEstateCalc._CAPITAL_GAINS_TAX_SHORT_MUNICIPAL,
+            RealEstateCalc._CAPITAL_GAINS_TAX_SHORT_NATIONAL
+        )
+        long_term_rate = np.where(
+            is_resident,
+            RealEstateCalc._CAPITAL_GAINS_TAX_LONG_NATIONAL + RealEstateCalc._CAPITAL_GAINS_TAX_LONG_MUNICIPAL,
+            RealEstateCalc._CAPITAL_GAINS_TAX_LONG_NATIONAL
+        )
+        capital_gains_tax_rate = np.where(self.calc_year < 5, short_term_rate, long_term_rate)
+
+        is_restoration_tax = self.calc_date < np.datetime64(taxconstants.RESTORATION_TAX_EXPIRY)
+        self.capital_gains_tax_rate = np.where(
+            is_restoration_tax,
+            capital_gains_tax_rate * (1 + taxconstants.RESTORATION_TAX),
+            capital_gains_tax_rate
+        )
+
+    def _calculate_capital_gains_tax(self):
+        self.capital_gains_tax = np.maximum(
+            0,
+            _int(self.capital_gains * self.capital_gains_tax_rate - self.capital_gains_tax_primary_residence_deduction)
+        )
+
+    def _calculate_sale_proceeds_net(self):
+        self.sale_proceeds_net = self.sale_proceeds_after_fees - self.capital_gains_tax
+
+    def _calculate_net_profit_on_realestate(self):
+        self.net_profit_on_realestate = (self.sale_proceeds_net +
+                                         self.cumulative_net_income -
+                                         self.purchase_initial_outlay -
+                                         self.mortgage_amount_outstanding)
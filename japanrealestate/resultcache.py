@@ -0,0 +1,242 @@
+from japanrealestate import taxconstants
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.realestatecalc import RealEstateCalc
+import abc
+import datetime as dt
+import hashlib
+import inspect
+import json
+import pickle
+import re
+import sqlite3
+import numpy as np
+
+# Version of the calculations, to be increased when a change of the calculators changes their results (changes of the
+# tax rules, i.e. of taxconstants and of the constants and tables of the calculators, are detected automatically)
+RESULTS_VERSION = 1
+
+# Maximum number of parameters of a single SQLite statement (the default limit of older SQLite versions is 999)
+_SQLITE_MAX_PARAMETERS = 500
+
+
+def _tax_rules():
+    """Returns a dict of the tax rules: taxconstants, and the upper case constants and tables of the calculators"""
+    rules = {}
+    for namespace in (taxconstants, IncomeTaxCalc, RealEstateCalc):
+        for name, value in vars(namespace).items():
+            if re.match(r'^_?[A-Z][A-Z0-9_]*$', name) and isinstance(value, (int, float, str, list, tuple, dict,
+                                                                             dt.date)):
+                rules['{}.{}'.format(namespace.__name__, name)] = value
+    return rules
+
+
+def version_stamp():
+    """
+    Returns a stamp of RESULTS_VERSION and of the tax rules, which changes whenever cached results may be out of date
+    """
+    rules = repr(sorted(_tax_rules().items()))
+    return '{}-{}'.format(RESULTS_VERSION, hashlib.sha256(rules.encode()).hexdigest()[:16])
+
+
+def _full_params(calculator_class, params):
+    """Returns params with the defaults of calculator_class for every missing input, and today for missing dates"""
+    signature = inspect.signature(calculator_class.__init__)
+    full_params = {name: parameter.default for name, parameter in signature.parameters.items()
+                   if name not in ('self', 'outputs', 'income_tax_calculator')}
+    full_params.update(params)
+    for name in ('purchase_date', 'current_date'):
+        if name in full_params and full_params[name] is None:
+            full_params[name] = dt.date.today()
+    return full_params
+
+
+def _json_default(value):
+    """Canonical JSON form of the values which are not JSON types (dates and NumPy scalars)"""
+    if isinstance(value, dt.date):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError("{} cannot be part of a fingerprint".format(type(value).__name__))
+
+
+def fingerprint(scenario, outputs=None, per_year=False, version=None):
+    """
+    Returns a stable hash of the full inputs of a scenario (see sweeprunner.scenario_calculators), i.e. the same for
+    scenarios which only differ by inputs given or left to their default value, or by dates given as dates or as ISO
+    format strings.
+
+    :param outputs: Names of the output fields of the results (see sweeprunner.run_scenario).
+    :param per_year: True for the results of every year (see sweeprunner.run_scenario_years).
+    :param version: Version stamp of the results. Defaults to version_stamp().
+    """
+    income_tax_calc_params = scenario.get('income_tax_calc_params')
+    if income_tax_calc_params is not None:
+        income_tax_calc_params = _full_params(IncomeTaxCalc, income_tax_calc_params)
+
+    canonical = json.dumps(
+        {
+            'income_tax_calc_params': income_tax_calc_params,
+            'real_estate_calc_params': _full_params(RealEstateCalc, scenario['real_estate_calc_params']),
+            'outputs': None if outputs is None else list(outputs),
+            'per_year': per_year,
+            'version': version or version_stamp(),
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        default=_json_default,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache(abc.ABC):
+    """
+    Interface of the caches of scenario results, keyed by fingerprint (see fingerprint()).
+
+    Subclasses implement get_many(), put_many(), clear() and __len__() (a subclass missing any of them cannot be
+    created). Results are any picklable object (e.g. the dicts returned by sweeprunner.run_scenario), and caches count
+    their hits and misses.
+    """
+
+    def __init__(self):
+        self.version = version_stamp()  # Version stamp of the results in the cache
+
+        self.hits = 0  # Number of results found in the cache
+        self.misses = 0  # Number of results not found in the cache
+
+    def fingerprint(self, scenario, outputs=None, per_year=False):
+        """Returns the key of the results of scenario (see fingerprint())"""
+        return fingerprint(scenario, outputs, per_year, self.version)
+
+    def get(self, key):
+        """Returns the result stored under key, or None"""
+        return self.get_many([key])[0]
+
+    def put(self, key, result):
+        """Stores result under key"""
+        self.put_many([(key, result)])
+
+    @abc.abstractmethod
+    def get_many(self, keys):
+        """Returns a list of the results stored under each key, with None for the keys which are not in the cache"""
+
+    @abc.abstractmethod
+    def put_many(self, items):
+        """Stores results from an iterable of (key, result) tuples"""
+
+    @abc.abstractmethod
+    def clear(self):
+        """Removes all results from the cache and resets the counters"""
+
+    @abc.abstractmethod
+    def __len__(self):
+        """Returns the number of results in the cache"""
+
+
+class SQLiteResultCache(ResultCache):
+    """
+    ResultCache persisted in a SQLite database (e.g. shared by all the runs on a machine).
+
+    Results are pickled, and the least recently used results are evicted when there are more than max_size. The version
+    stamp of the results is stored in the database: when the calculations or the tax rules changed since the results
+    were stored (see version_stamp()), all results are removed on opening the database.
+
+    e.g.
+       with SQLiteResultCache('results.sqlite') as cache, SweepRunner(cache=cache) as runner:
+           ...
+    """
+
+    def __init__(self, path=':memory:', max_size=1000000):
+        """
+        :param path: Path of the SQLite database file, created if it does not exist. Defaults to an in-memory database.
+        :param max_size: Maximum number of results kept in the cache.
+        """
+        super().__init__()
+        self.path = path
+        self.max_size = max_size
+
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result BLOB, last_used INTEGER)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        self._invalidate_other_versions()
+        self._connection.commit()
+
+        # Logical clock of the accesses, for the least recently used eviction
+        self._clock = self._connection.execute('SELECT MAX(last_used) FROM results').fetchone()[0] or 0
+
+        # Number of results, counted once and then kept up to date by put_many() and clear(), as COUNT(*) scans the
+        # whole table
+        self._size = self._connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._size
+
+    def close(self):
+        """Closes the database"""
+        self._connection.close()
+
+    def _invalidate_other_versions(self):
+        """Removes all results if they were stored with another version stamp"""
+        row = self._connection.execute("SELECT value FROM metadata WHERE name = 'version'").fetchone()
+        if row is None or row[0] != self.version:
+            self._connection.execute('DELETE FROM results')
+            self._connection.execute("INSERT OR REPLACE INTO metadata VALUES ('version', ?)", (self.version,))
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def get_many(self, keys):
+        keys = list(keys)
+        results = {}
+        last_used = self._tick()
+        for start in range(0, len(keys), _SQLITE_MAX_PARAMETERS):
+            chunk = keys[start:start + _SQLITE_MAX_PARAMETERS]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._connection.execute(
+                'SELECT key, result FROM results WHERE key IN ({})'.format(placeholders), chunk).fetchall()
+            results.update((key, pickle.loads(result)) for key, result in rows)
+            self._connection.execute(
+                'UPDATE results SET last_used = ? WHERE key IN ({})'.format(placeholders), [last_used] + chunk)
+        self._connection.commit()
+
+        self.hits += sum(key in results for key in keys)
+        self.misses += sum(key not in results for key in keys)
+        return [results.get(key) for key in keys]
+
+    def put_many(self, items):
+        items = dict(items)  # The last result of each key, as it is the one stored by INSERT OR REPLACE
+        keys = list(items)
+        existing_keys = 0  # Keys already in the cache, whose results are replaced rather than added
+        for start in range(0, len(keys), _SQLITE_MAX_PARAMETERS):
+            chunk = keys[start:start + _SQLITE_MAX_PARAMETERS]
+            placeholders = ','.join('?' * len(chunk))
+            existing_keys += self._connection.execute(
+                'SELECT COUNT(*) FROM results WHERE key IN ({})'.format(placeholders), chunk).fetchone()[0]
+
+        last_used = self._tick()
+        self._connection.executemany(
+            'INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+            ((key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), last_used) for key, result in items.items()))
+        self._size += len(keys) - existing_keys
+
+        excess = self._size - self.max_size
+        if excess > 0:
+            evicted = self._connection.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)', (excess,))
+            self._size -= evicted.rowcount
+        self._connection.commit()
+
+    def clear(self):
+        self._connection.execute('DELETE FROM results')
+        self._connection.commit()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
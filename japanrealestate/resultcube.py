@@ -0,0 +1,197 @@
+from japanrealestate.projection import Projection
+from japanrealestate.realestatecalcbatch import RealEstateCalcBatch
+from japanrealestate.resultcache import version_stamp
+import datetime as dt
+import hashlib
+import inspect
+import json
+import os
+import numpy as np
+
+_MANIFEST_FILE_NAME = 'manifest.json'
+_VALUES_FILE_NAME = 'values.dat'
+
+# Year-varying numeric fields of RealEstateCalc (calc_date is the only field which is not numeric)
+_DEFAULT_FIELDS = [field for field in Projection._YEARLY_FIELDS if field != 'calc_date']
+
+
+def _inputs_fingerprint(inputs):
+    """Returns a hash of the inputs of a cube (arrays by value, and calculators by their inputs)"""
+    digest = hashlib.sha256()
+    for name, value in sorted(inputs.items()):
+        digest.update(name.encode())
+        if isinstance(value, np.ndarray):
+            digest.update('{}{}'.format(value.dtype.str, value.shape).encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        elif value is None or isinstance(value, (int, float, bool, str, dt.date, np.generic)):
+            digest.update(repr(value).encode())
+        else:
+            parameters = inspect.signature(type(value).__init__).parameters
+            digest.update(repr(sorted((name, getattr(value, name, None)) for name in parameters
+                                      if name not in ('self', 'outputs'))).encode())
+    return digest.hexdigest()
+
+
+def _read_manifest(path):
+    with open(os.path.join(path, _MANIFEST_FILE_NAME)) as file:
+        return json.load(file)
+
+
+def open_result_cube(path):
+    """
+    Returns a dict of field name to the values of the field in the cube at path, as read-only 2-D (scenario x year)
+    views of the file on disk, i.e. without loading the cube into memory. Chunks which were not calculated yet (see
+    the completed_chunks of the manifest) are 0.
+    """
+    manifest = _read_manifest(path)
+    values = np.memmap(os.path.join(path, _VALUES_FILE_NAME), dtype=manifest['dtype'], mode='r',
+                       shape=tuple(manifest['shape']))
+    return {field: values[:, :, i] for i, field in enumerate(manifest['fields'])}
+
+
+class ResultCube:
+    """
+    Class to calculate fields of RealEstateCalcBatch for every scenario and year into a 3-D (scenario x year x field)
+    array on disk, for sweeps too large to be held in memory.
+
+    The cube is a directory with the values, as a file mapped in memory with np.memmap, and a JSON manifest recording
+    its shape, its fields and the chunks of scenarios already calculated. Chunks are calculated one at a time (all their
+    years at once in a single RealEstateCalcBatch) and written to disk before being recorded in the manifest, so an
+    interrupted fill() can be resumed: creating a ResultCube on an existing directory (with the same inputs) only
+    calculates the remaining chunks. Values can then be read with open_result_cube() without loading them into memory.
+
+    e.g.
+       cube = ResultCube('sweep', inputs=dict(purchase_price=prices, gross_rental_yield=yields, ...), num_years=35)
+       cube.fill()
+       net_income_after_taxes = open_result_cube('sweep')['net_income_after_taxes']
+    """
+
+    def __init__(
+            self,
+            path,
+            inputs=None,
+            num_years=1,
+            fields=None,
+            chunk_size=10000,
+            dtype='float64',
+    ):
+        """
+        :param path: Directory of the cube, created if it does not exist.
+        :param inputs: Dict of the inputs of RealEstateCalcBatch (except calc_year), where 1-D arrays have one element
+               per scenario and other values are shared by all scenarios.
+        :param num_years: Number of years of every scenario, i.e. calc_year from 0 until num_years - 1.
+        :param fields: Names of the numeric fields of RealEstateCalcBatch to store. Defaults to the fields of
+               RealEstateCalc which vary by year (except calc_date).
+        :param chunk_size: Number of scenarios calculated at once, which bounds memory use (a chunk needs about
+               chunk_size x num_years x the number of derived fields of RealEstateCalcBatch values in memory).
+        :param dtype: Type of the values stored. float64 holds amounts in yen exactly.
+        """
+        # Initialize class fields from arguments
+        self.path = path
+        self.inputs = {name: np.asarray(value) if isinstance(value, (list, tuple)) else value
+                       for name, value in (inputs or {}).items()}
+        self.num_years = num_years
+        self.fields = list(fields or _DEFAULT_FIELDS)
+        self.chunk_size = chunk_size
+        self.dtype = np.dtype(dtype).name
+
+        # Derived fields that will be calculated
+        self.num_scenarios = None  # Number of scenarios, i.e. length of the 1-D arrays of inputs
+        self.num_chunks = None
+        self.manifest = None  # Dict of the contents of the manifest (see _new_manifest)
+        self.values = None  # np.memmap (scenario x year x field) of the values
+
+        # Calculate!
+        self.calculate_all_fields()
+
+    def calculate_all_fields(self):
+        """Calculate value for all derived fields"""
+        self._calculate_num_scenarios()
+        self._calculate_num_chunks()
+        self._calculate_manifest()
+        self._calculate_values()
+
+    def is_complete(self):
+        """Returns True when every chunk has been calculated"""
+        return len(self.manifest['completed_chunks']) == self.num_chunks
+
+    def fill(self, max_chunks=None):
+        """
+        Calculates the chunks which have not been calculated yet, and returns the number of chunks calculated.
+
+        :param max_chunks: Maximum number of chunks to calculate in this call. Defaults to all remaining chunks.
+        """
+        completed_chunks = set(self.manifest['completed_chunks'])
+        remaining_chunks = [chunk for chunk in range(self.num_chunks) if chunk not in completed_chunks]
+        for chunk in remaining_chunks[:max_chunks]:
+            self._fill_chunk(chunk)
+        return len(remaining_chunks[:max_chunks])
+
+    def _fill_chunk(self, chunk):
+        start = chunk * self.chunk_size
+        stop = min(start + self.chunk_size, self.num_scenarios)
+        chunk_inputs = {name: value[start:stop, np.newaxis] if np.ndim(value) == 1 else value
+                        for name, value in self.inputs.items()}
+        real_estate_calc_batch = RealEstateCalcBatch(calc_year=np.arange(self.num_years)[np.newaxis, :], **chunk_inputs)
+
+        for i, field in enumerate(self.fields):
+            self.values[start:stop, :, i] = np.broadcast_to(getattr(real_estate_calc_batch, field),
+                                                            (stop - start, self.num_years))
+        self.values.flush()
+
+        # The chunk is only recorded once its values are on disk
+        self.manifest['completed_chunks'].append(chunk)
+        self._write_manifest()
+
+    def _write_manifest(self):
+        """Replaces the manifest atomically, so that it is never left partially written"""
+        manifest_path = os.path.join(self.path, _MANIFEST_FILE_NAME)
+        with open(manifest_path + '.tmp', 'w') as file:
+            json.dump(self.manifest, file)
+        os.replace(manifest_path + '.tmp', manifest_path)
+
+    def _new_manifest(self):
+        return {
+            'shape': [self.num_scenarios, self.num_years, len(self.fields)],
+            'fields': self.fields,
+            'dtype': self.dtype,
+            'chunk_size': self.chunk_size,
+            'inputs_fingerprint': _inputs_fingerprint(self.inputs),
+            'version': version_stamp(),
+            'completed_chunks': [],
+        }
+
+    def _calculate_num_scenarios(self):
+        if 'calc_year' in self.inputs:
+            raise ValueError("calc_year is given by the year axis of the cube, not by inputs")
+        lengths = {len(value) for value in self.inputs.values() if np.ndim(value) == 1}
+        if len(lengths) > 1 or any(np.ndim(value) > 1 for value in self.inputs.values()):
+            raise ValueError("Array inputs must be 1-D arrays with one element per scenario")
+        self.num_scenarios = lengths.pop() if lengths else 1
+
+    def _calculate_num_chunks(self):
+        self.num_chunks = -(-self.num_scenarios // self.chunk_size)
+
+    def _calculate_manifest(self):
+        """Loads the manifest of an existing cube, which must have been created with the same arguments"""
+        self.manifest = self._new_manifest()
+        if not os.path.exists(os.path.join(self.path, _MANIFEST_FILE_NAME)):
+            os.makedirs(self.path, exist_ok=True)
+            return
+
+        existing_manifest = _read_manifest(self.path)
+        for key, value in self.manifest.items():
+            if key != 'completed_chunks' and existing_manifest.get(key) != value:
+                raise ValueError("Cannot resume the cube at {}, as its {} is different".format(self.path, key))
+        self.manifest = existing_manifest
+
+    def _calculate_values(self):
+        """The values file of a new cube is created (filled with zeros) before its manifest"""
+        values_path = os.path.join(self.path, _VALUES_FILE_NAME)
+        shape = tuple(self.manifest['shape'])
+        if os.path.exists(os.path.join(self.path, _MANIFEST_FILE_NAME)):
+            self.values = np.memmap(values_path, dtype=self.dtype, mode='r+', shape=shape)
+        else:
+            self.values = np.memmap(values_path, dtype=self.dtype, mode='w+', shape=shape)
+            self.values.flush()
+            self._write_manifest()
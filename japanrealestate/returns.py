@@ -0,0 +1,104 @@
+"""
+Return metrics of yearly cash flows, vectorized over many scenarios at once.
+
+Cash flows are arrays whose last axis is time in years, i.e. element t is the cash flow at the end of year t (element 0
+is the initial outlay, as a negative cash flow, at purchase). Any leading axes are scenarios. Shorter cash flows can be
+padded with zeros at the end, which does not change any of the metrics.
+"""
+
+import numpy as np
+
+_IRR_TOLERANCE = 1e-10  # Precision of irr(), in NPV per unit of initial outlay
+_IRR_MAX_ITERATIONS = 100
+_IRR_MIN_RATE = -0.99  # Lowest rate searched (rates must be greater than -100%)
+
+
+def _discounted(cash_flows, rate, derivative=False):
+    """
+    Returns the NPV of every scenario at its rate (and the derivative of the NPV with respect to the rate).
+    The NPV is a polynomial of the discount factor 1 / (1 + rate), evaluated with Horner's method (one multiply-add per
+    year over all scenarios, rather than raising the discount factor to the power of every year).
+    """
+    discount_factor = 1 / (1 + rate)
+    npv = np.zeros(cash_flows.shape[:-1])
+    npv_derivative = np.zeros(cash_flows.shape[:-1])  # With respect to the discount factor
+    for period in range(cash_flows.shape[-1] - 1, -1, -1):
+        if derivative:
+            npv_derivative = npv_derivative * discount_factor + npv
+        npv = npv * discount_factor + cash_flows[..., period]
+    if not derivative:
+        return npv
+    return npv, -npv_derivative * discount_factor ** 2
+
+
+def npv(rate, cash_flows):
+    """
+    Returns the net present value of cash flows discounted at rate (which is broadcast against the scenarios of
+    cash_flows).
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    rate = np.broadcast_to(np.asarray(rate, dtype=float), cash_flows.shape[:-1])
+    return _discounted(cash_flows, rate)
+
+
+def equity_multiple(cash_flows):
+    """Returns the total cash returned after the initial outlay, per unit of initial outlay (NaN without an outlay)"""
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    initial_outlay = -cash_flows[..., 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(initial_outlay > 0, cash_flows[..., 1:].sum(axis=-1) / initial_outlay, np.nan)
+
+
+def irr(cash_flows, max_rate=1.0):
+    """
+    Returns the internal rate of return of cash flows, i.e. the rate where their NPV is 0, solved for all scenarios at
+    once.
+
+    A Newton/bisection hybrid is used: each iteration takes a Newton step in every scenario, unless the step would leave
+    the bracket known to contain the root, in which case the bracket is bisected instead. The bracket starts from
+    [-99%, max_rate] and max_rate is increased (a few times) for scenarios without a sign change. Scenarios without a
+    root in the bracket (e.g. when no cash flow is negative) get NaN, as do scenarios whose cash flows are all zero
+    (where every rate is a root). When there are several roots (cash flows changing
+    sign more than once), one of them is returned.
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    shape = cash_flows.shape[:-1]
+    cash_flows = cash_flows.reshape(-1, cash_flows.shape[-1])
+    scale = np.maximum(np.abs(cash_flows).max(axis=-1, initial=0), 1)  # Tolerance is relative to the cash flows
+
+    low = np.full(len(cash_flows), _IRR_MIN_RATE)
+    high = np.full(len(cash_flows), float(max_rate))
+    npv_low = _discounted(cash_flows, low)
+    npv_high = _discounted(cash_flows, high)
+    for _ in range(10):
+        is_not_bracketed = np.sign(npv_low) == np.sign(npv_high)
+        if not is_not_bracketed.any():
+            break
+        high[is_not_bracketed] = high[is_not_bracketed] * 2 + 1
+        npv_high[is_not_bracketed] = _discounted(cash_flows[is_not_bracketed], high[is_not_bracketed])
+    is_bracketed = (np.sign(npv_low) != np.sign(npv_high)) | (npv_low == 0) | (npv_high == 0)
+    is_bracketed &= (cash_flows != 0).any(axis=-1)
+
+    # Only the scenarios which have not converged yet are iterated on
+    rate = (low + high) / 2
+    active = np.flatnonzero(is_bracketed)
+    for _ in range(_IRR_MAX_ITERATIONS):
+        value, derivative = _discounted(cash_flows[active], rate[active], derivative=True)
+        is_converged = np.abs(value) <= _IRR_TOLERANCE * scale[active]
+        active, value, derivative = active[~is_converged], value[~is_converged], derivative[~is_converged]
+        if not len(active):
+            break
+
+        # Shrink the bracket to the side of the root
+        is_same_sign_as_low = np.sign(value) == np.sign(npv_low[active])
+        low[active] = np.where(is_same_sign_as_low, rate[active], low[active])
+        npv_low[active] = np.where(is_same_sign_as_low, value, npv_low[active])
+        high[active] = np.where(is_same_sign_as_low, high[active], rate[active])
+        npv_high[active] = np.where(is_same_sign_as_low, npv_high[active], value)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton_rate = rate[active] - value / derivative
+        is_newton_in_bracket = np.isfinite(newton_rate) & (newton_rate > low[active]) & (newton_rate < high[active])
+        rate[active] = np.where(is_newton_in_bracket, newton_rate, (low[active] + high[active]) / 2)
+
+    return np.where(is_bracketed, rate, np.nan).reshape(shape)
@@ -0,0 +1,147 @@
+from japanrealestate.realestatecalcbatch import RealEstateCalcBatch
+import numpy as np
+
+
+class Sensitivity:
+    """
+    Class to calculate the sensitivity of outputs of a RealEstateCalc to its numeric inputs, by central finite
+    differences.
+
+    Every input in parameters is bumped down and up by relative_bump (e.g. 1% of its value), and the base scenario and
+    all 2 x len(parameters) bumped scenarios are calculated at once by a single RealEstateCalcBatch, rather than as
+    separate RealEstateCalc objects. Outputs can be any derived field of RealEstateCalcBatch (for calc_year of the
+    inputs), or one of the return metrics 'irr' and 'equity_multiple' (see RealEstateCalc.cash_flows).
+
+    e.g. for a tornado chart of the IRR of a property:
+       sensitivity = Sensitivity(inputs=dict(purchase_price=50e6, ...), outputs=['irr'], relative_bump=0.1)
+       sensitivity.tornado('irr')
+    """
+
+    def __init__(
+            self,
+            inputs=None,
+            outputs=('net_profit_on_realestate', 'irr'),
+            parameters=None,
+            relative_bump=0.01,
+    ):
+        """
+        :param inputs: Dict of the inputs of RealEstateCalc for the base scenario (as scalars).
+        :param outputs: Names of the outputs to calculate the sensitivity of.
+        :param parameters: Names of the inputs to bump. Defaults to every input of _PARAMETERS which is given (and not
+               None) in inputs.
+        :param relative_bump: Size of the bump of each input, relative to its value (inputs which are 0 are bumped by
+               relative_bump itself).
+        """
+
+        # Initialize class fields from arguments
+        self.inputs = inputs
+        self.outputs = list(outputs)
+        self.parameters = parameters
+        self.relative_bump = relative_bump
+
+        # Derived fields that will be calculated (dicts of output name to array, where element i is for parameters[i])
+        self.bump = None  # Array where element i is the size of the bump of parameters[i]
+        self.real_estate_calc_batch = None  # Batch of the base scenario, then the down bumps, then the up bumps
+        self.base = None  # Dict of output name to value for the base scenario
+        self.low = None  # Output when the parameter is bumped down
+        self.high = None  # Output when the parameter is bumped up
+        self.derivative = None  # Partial derivative of the output with respect to the parameter
+        self.elasticity = None  # Relative change of the output per relative change of the parameter
+
+        # Calculate!
+        self.calculate_all_fields()
+
+    # Continuous numeric inputs of RealEstateCalc (integer inputs such as mortgage_tenor or age cannot be bumped)
+    _PARAMETERS = [
+        'purchase_price',
+        'building_to_land_ratio',
+        'size',
+        'mortgage_loan_to_value',
+        'bank_valuation_to_actual',
+        'mortgage_rate',
+        'mortgage_initiation_fees',
+        'renovation_cost',
+        'agent_fee_variable',
+        'agent_fee_fixed',
+        'other_transaction_fees',
+        'monthly_fees',
+        'property_tax_rate',
+        'maintenance_per_m2',
+        'gross_rental_yield',
+        'renewal_income_rate',
+        'rental_management_rental_fee',
+        'rental_management_renewal_fee',
+        'sale_price',
+    ]
+
+    # Outputs which are return metrics of RealEstateCalcBatch, rather than derived fields
+    _METRICS = ('irr', 'equity_multiple')
+
+    def calculate_all_fields(self):
+        """Calculate value for all derived fields"""
+        self._calculate_parameters()
+        self._calculate_bump()
+        self._calculate_real_estate_calc_batch()
+        self._calculate_outputs()
+        self._calculate_derivative()
+        self._calculate_elasticity()
+
+    def tornado(self, output):
+        """
+        Returns (parameter, low, high) tuples of output, sorted from the largest to the smallest swing (high - low),
+        i.e. the bars of a tornado chart from top to bottom.
+        """
+        swings = np.abs(self.high[output] - self.low[output])
+        order = np.argsort(-swings, kind='stable')
+        return [(self.parameters[i], self.low[output][i], self.high[output][i]) for i in order]
+
+    def _calculate_parameters(self):
+        if self.parameters is None:
+            self.parameters = [parameter for parameter in self._PARAMETERS if self.inputs.get(parameter) is not None]
+        for parameter in self.parameters:
+            if parameter not in self._PARAMETERS:
+                raise ValueError("'{}' is not a continuous numeric input".format(parameter))
+            if self.inputs.get(parameter) is None:
+                raise ValueError("'{}' must be given in inputs to be bumped".format(parameter))
+
+    def _calculate_bump(self):
+        values = np.array([self.inputs[parameter] for parameter in self.parameters], dtype=float)
+        self.bump = np.where(values == 0, self.relative_bump, np.abs(values) * self.relative_bump)
+
+    def _calculate_real_estate_calc_batch(self):
+        """Scenario 0 is the base, scenario 1 + i bumps parameters[i] down, and 1 + K + i bumps it up"""
+        num_parameters = len(self.parameters)
+        batch_inputs = dict(self.inputs)
+        batch_inputs['purchase_price'] = np.full(1 + 2 * num_parameters, self.inputs.get('purchase_price', 0))
+        for i, parameter in enumerate(self.parameters):
+            values = np.full(1 + 2 * num_parameters, float(self.inputs[parameter]))
+            values[1 + i] -= self.bump[i]
+            values[1 + num_parameters + i] += self.bump[i]
+            batch_inputs[parameter] = values
+
+        self.real_estate_calc_batch = RealEstateCalcBatch(**batch_inputs)
+
+    def _calculate_outputs(self):
+        num_parameters = len(self.parameters)
+        self.base, self.low, self.high = {}, {}, {}
+        for output in self.outputs:
+            if output in self._METRICS:
+                values = getattr(self.real_estate_calc_batch, output)()
+            else:
+                values = getattr(self.real_estate_calc_batch, output)
+            values = np.broadcast_to(values, self.real_estate_calc_batch.shape).astype(float)
+
+            self.base[output] = values[0]
+            self.low[output] = values[1:1 + num_parameters]
+            self.high[output] = values[1 + num_parameters:]
+
+    def _calculate_derivative(self):
+        self.derivative = {output: (self.high[output] - self.low[output]) / (2 * self.bump) for output in self.outputs}
+
+    def _calculate_elasticity(self):
+        values = np.array([self.inputs[parameter] for parameter in self.parameters], dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.elasticity = {
+                output: np.where(self.base[output] == 0, np.nan, self.derivative[output] * values / self.base[output])
+                for output in self.outputs
+            }
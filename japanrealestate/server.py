@@ -0,0 +1,384 @@
+"""
+Local HTTP server evaluating real estate scenarios, e.g. for a pricing UI sending many small requests:
+   python -m japanrealestate.server --port 8000
+
+   POST /evaluate with a scenario (in the shape of examples/config1.json, with an optional list of 'outputs' field
+   names) as JSON body returns the outputs of the scenario as a JSON object.
+   GET /stats returns the counters of the server (see EvaluationServer.stats).
+
+Concurrent requests are coalesced into micro-batches, each calculated by RealEstateCalcBatch (see EvaluationServer).
+Only the standard library (asyncio) is used for the server itself.
+"""
+
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.realestatecalc import RealEstateCalc
+from japanrealestate.realestatecalcbatch import RealEstateCalcBatch
+import argparse
+import asyncio
+import datetime as dt
+import inspect
+import json
+import time
+import numpy as np
+
+DEFAULT_OUTPUTS = ['net_income_before_taxes', 'net_income_after_taxes', 'cumulative_net_income', 'sale_proceeds_net',
+                   'net_profit_on_realestate']
+
+# Inputs of RealEstateCalc which are None by default, and the value of RealEstateCalcBatch for individual scenarios
+_BATCH_DEFAULTS = {
+    'renewal_income_rate': RealEstateCalc._RENEWAL_INCOME_RATE_DEFAULT,
+    'rental_management_rental_fee': RealEstateCalc._RENTAL_MANAGEMENT_FEE_DEFAULT,
+    'rental_management_renewal_fee': RealEstateCalc._RENTAL_MANAGEMENT_RENEWAL_DEFAULT,
+    'sale_price': np.nan,
+}
+
+_MAX_BODY_SIZE = 1 << 20
+
+_HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+                 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class _BatchError(Exception):
+    """Raised for every request of a batch whose evaluation failed as a whole (a server error, not a bad request)"""
+
+
+def _parse_date(value):
+    return dt.date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _scenario_inputs(scenario):
+    """
+    Returns the inputs of RealEstateCalcBatch of a single scenario, with purchase_date parsed and the inputs which are
+    None replaced by _BATCH_DEFAULTS. Raises ValueError if the scenario has any input which is not an input of
+    RealEstateCalc, or which is not a number (or a date for purchase_date), so that it cannot fail the other scenarios
+    calculated in the same batch.
+    """
+    if not isinstance(scenario, dict) or not isinstance(scenario.get('real_estate_calc_params'), dict):
+        raise ValueError("A scenario must be an object with real_estate_calc_params")
+
+    signature = inspect.signature(RealEstateCalc.__init__).parameters
+    inputs = {}
+    for name, value in scenario['real_estate_calc_params'].items():
+        if name not in signature or name in ('self', 'outputs', 'income_tax_calculator'):
+            raise ValueError("'{}' is not an input of RealEstateCalc".format(name))
+
+        if name == 'purchase_date':
+            value = _parse_date(value)
+            if value is not None and not isinstance(value, dt.date):
+                raise ValueError("purchase_date must be an ISO format date, not {!r}".format(value))
+        elif value is None and name in _BATCH_DEFAULTS:
+            value = _BATCH_DEFAULTS[name]
+        elif not isinstance(value, (int, float)):
+            raise ValueError("{} must be a number, not {!r}".format(name, value))
+        inputs[name] = value
+    return inputs
+
+
+def _group_key(scenario, inputs):
+    """Scenarios with the same key can be calculated by a single RealEstateCalcBatch (see _evaluate_group)"""
+    outputs = scenario.get('outputs') or DEFAULT_OUTPUTS
+    if not isinstance(outputs, list) or not all(isinstance(output, str) for output in outputs):
+        raise ValueError("outputs must be a list of field names")
+
+    return (
+        inputs.get('purchase_date'),
+        json.dumps(scenario.get('income_tax_calc_params'), sort_keys=True, default=str),
+        tuple(outputs),
+    )
+
+
+def _evaluate_group(group_key, scenario_inputs):
+    """
+    Returns the outputs of the scenarios of a group (see _group_key), calculated from their inputs (see
+    _scenario_inputs) by a single RealEstateCalcBatch
+    """
+    purchase_date, income_tax_calc_params, outputs = group_key
+
+    income_tax_calc = None
+    income_tax_calc_params = json.loads(income_tax_calc_params)
+    if income_tax_calc_params is not None:
+        income_tax_calc_params['current_date'] = _parse_date(income_tax_calc_params.get('current_date'))
+        income_tax_calc = IncomeTaxCalc(**income_tax_calc_params)
+
+    signature = inspect.signature(RealEstateCalc.__init__).parameters
+    names = set().union(*scenario_inputs) - {'purchase_date'}
+    inputs = {}
+    for name in names:
+        default = _BATCH_DEFAULTS.get(name, signature[name].default)
+        inputs[name] = np.array([values.get(name, default) for values in scenario_inputs])
+
+    real_estate_calc_batch = RealEstateCalcBatch(purchase_date=purchase_date,
+                                                 income_tax_calculator=income_tax_calc,
+                                                 **inputs)
+    columns = {}
+    for output in outputs:
+        values = getattr(real_estate_calc_batch, output, None)
+        if not isinstance(values, np.ndarray):
+            raise ValueError("'{}' is not an output of RealEstateCalcBatch".format(output))
+        columns[output] = np.broadcast_to(values, real_estate_calc_batch.shape).tolist()
+    return [{output: columns[output][i] for output in outputs} for i in range(len(scenario_inputs))]
+
+
+def _evaluate_one(group_key, inputs):
+    """Returns the outputs of a single scenario, or the exception raised while calculating it"""
+    try:
+        return _evaluate_group(group_key, [inputs])[0]
+    except Exception as error:
+        return error
+
+
+def evaluate_scenarios(scenarios):
+    """
+    Returns a list with the outputs (dict of field name to value) of every scenario, or the exception raised while
+    calculating it. Scenarios sharing their purchase_date, IncomeTaxCalc inputs and outputs are calculated at once.
+
+    The inputs of every scenario are validated before being batched, and a batch which still fails (e.g. for an input
+    out of range) is calculated again one scenario at a time, so that an invalid scenario only fails itself.
+    """
+    results = [None] * len(scenarios)
+    scenario_inputs = [None] * len(scenarios)
+    groups = {}  # Group key to indexes of its scenarios
+    for i, scenario in enumerate(scenarios):
+        try:
+            scenario_inputs[i] = _scenario_inputs(scenario)
+            groups.setdefault(_group_key(scenario, scenario_inputs[i]), []).append(i)
+        except (ValueError, TypeError) as error:
+            results[i] = error
+
+    for group_key, indexes in groups.items():
+        try:
+            group_results = _evaluate_group(group_key, [scenario_inputs[i] for i in indexes])
+        except Exception as error:
+            group_results = [error] if len(indexes) == 1 else [_evaluate_one(group_key, scenario_inputs[i])
+                                                                for i in indexes]
+        for i, result in zip(indexes, group_results):
+            results[i] = result
+    return results
+
+
+class EvaluationServer:
+    """
+    asyncio HTTP server evaluating scenarios, which coalesces the requests arriving within batch_window seconds of each
+    other into a single vectorized calculation (see evaluate_scenarios), and fans the results back out to each request.
+
+    Requests wait in a queue of at most max_queue_size scenarios while the previous batch is calculated (in a thread, so
+    that the server keeps accepting requests). When the queue is full, requests are rejected immediately with 503
+    (backpressure), rather than queueing up unbounded latency.
+
+    e.g.
+       server = EvaluationServer(port=8000)
+       asyncio.run(server.serve_forever())
+    """
+
+    def __init__(
+            self,
+            host='127.0.0.1',
+            port=0,
+            batch_window=0.005,
+            max_batch_size=1000,
+            max_queue_size=10000,
+    ):
+        """
+        :param host: Address to listen on. Defaults to localhost only.
+        :param port: Port to listen on. Defaults to any free port (see port after start()).
+        :param batch_window: Seconds to wait for more requests after the first request of a batch.
+        :param max_batch_size: Maximum number of scenarios calculated in a single batch.
+        :param max_queue_size: Maximum number of scenarios waiting to be calculated.
+        """
+        self.host = host
+        self.port = port
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.max_queue_size = max_queue_size
+
+        # Counters (see stats)
+        self.requests = 0  # Scenarios received
+        self.rejected = 0  # Scenarios rejected because the queue was full
+        self.completed = 0  # Scenarios calculated successfully
+        self.errors = 0  # Scenarios whose calculation failed
+        self.batches = 0  # Batches calculated
+        self.largest_batch = 0
+        self.total_latency = 0  # Sum of the seconds between receiving and calculating each scenario
+        self.max_latency = 0
+
+        self._queue = None  # Queue of (scenario, future of its result, time received)
+        self._server = None
+        self._batcher = None
+        self._started = None  # Time when the server was started
+
+    async def start(self):
+        """Starts listening, and calculating the batches of requests"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._batcher = asyncio.ensure_future(self._run_batches())
+        self._started = time.perf_counter()
+
+    async def close(self):
+        """Stops listening and calculating"""
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    def stats(self):
+        """Returns a dict of the counters of the server, and the latency and throughput derived from them"""
+        uptime = time.perf_counter() - self._started if self._started is not None else 0
+        calculated = self.completed + self.errors
+        return {
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'completed': self.completed,
+            'errors': self.errors,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'batches': self.batches,
+            'mean_batch_size': calculated / self.batches if self.batches else 0,
+            'largest_batch': self.largest_batch,
+            'mean_latency_ms': 1000 * self.total_latency / calculated if calculated else 0,
+            'max_latency_ms': 1000 * self.max_latency,
+            'throughput_per_second': calculated / uptime if uptime else 0,
+        }
+
+    async def evaluate(self, scenario):
+        """
+        Returns the outputs of scenario, once calculated in a batch. Raises asyncio.QueueFull if the queue is full, the
+        exception raised by the calculation of the scenario, or _BatchError if the calculation of its batch failed.
+        """
+        self.requests += 1
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((scenario, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        return await future
+
+    async def _next_batch(self):
+        """Waits for a request, then for more requests during batch_window (or until max_batch_size)"""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            if self._queue.empty():
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run_batches(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._run_batch(batch)
+            except Exception as error:
+                # Fail the requests of this batch which are still waiting, but keep calculating the next batches
+                for _, future, _ in batch:
+                    if not future.done():
+                        self.errors += 1
+                        future.set_exception(_BatchError('Evaluation failed: {}'.format(error)))
+
+    async def _run_batch(self, batch):
+        """Calculates a batch of (scenario, future of its result, time received), and sets the result of each future"""
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(None, evaluate_scenarios, [scenario for scenario, _, _ in batch])
+
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        now = time.perf_counter()
+        for (_, future, received), result in zip(batch, results):
+            self.total_latency += now - received
+            self.max_latency = max(self.max_latency, now - received)
+            if future.cancelled():
+                continue
+            if isinstance(result, Exception):
+                self.errors += 1
+                future.set_exception(result)
+            else:
+                self.completed += 1
+                future.set_result(result)
+
+    async def _respond(self, method, path, body):
+        """Returns (HTTP status, JSON payload) of a request"""
+        if method == 'GET' and path == '/stats':
+            return 200, self.stats()
+        if method != 'POST' or path != '/evaluate':
+            return 404, {'error': 'Unknown request {} {}'.format(method, path)}
+
+        try:
+            scenario = json.loads(body)
+        except ValueError as error:
+            return 400, {'error': 'Invalid JSON: {}'.format(error)}
+        try:
+            return 200, await self.evaluate(scenario)
+        except asyncio.QueueFull:
+            return 503, {'error': 'Too many requests queued'}
+        except _BatchError as error:
+            return 500, {'error': str(error)}
+        except Exception as error:
+            return 400, {'error': str(error)}
+
+    async def _handle_connection(self, reader, writer):
+        """Serves the HTTP/1.1 requests of a connection, which is kept alive until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                content_length = int(headers.get('content-length', 0))
+                if content_length > _MAX_BODY_SIZE:
+                    status, payload = 413, {'error': 'Request body is too large'}
+                    headers['connection'] = 'close'
+                else:
+                    body = await reader.readexactly(content_length)
+                    status, payload = await self._respond(method, path, body)
+
+                content = json.dumps(payload, default=str).encode()  # Dates are returned in ISO format
+                writer.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n'.format(
+                    status, _HTTP_REASONS[status], len(content)).encode('latin-1') + content)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local HTTP server evaluating real estate scenarios.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--batch-window-ms', type=float, default=5,
+                        help='Milliseconds to wait for more requests after the first request of a batch')
+    parser.add_argument('--max-batch-size', type=int, default=1000)
+    parser.add_argument('--max-queue-size', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    server = EvaluationServer(host=args.host, port=args.port, batch_window=args.batch_window_ms / 1000,
+                              max_batch_size=args.max_batch_size, max_queue_size=args.max_queue_size)
+    asyncio.run(server.serve_forever())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.projection import Projection
+from japanrealestate.realestatecalc import RealEstateCalc
+import concurrent.futures
+import datetime as dt
+import itertools
+import os
+
+
+# Fields of RealEstateCalc holding other calculators rather than results, which are not returned by run_scenario()
+_CALCULATOR_FIELDS = ('income_tax_calculator', 'mortgage', 'depreciation_schedule')
+
+# Inputs which can be given as ISO format strings (e.g. '2017-01-24') in scenarios read from JSON
+_DATE_PARAMS = ('purchase_date', 'current_date')
+
+
+def _parse_dates(params):
+    """Returns a copy of params with the ISO format date strings of _DATE_PARAMS converted to dates"""
+    params = dict(params)
+    for name in _DATE_PARAMS:
+        if isinstance(params.get(name), str):
+            params[name] = dt.date.fromisoformat(params[name])
+    return params
+
+
+def scenario_calculators(scenario):
+    """
+    Returns the (IncomeTaxCalc, RealEstateCalc) calculated for a scenario.
+
+    :param scenario: Dict in the shape of examples/config1.json, i.e. with the parameters of IncomeTaxCalc under
+           'income_tax_calc_params' (optional, for no income taxes) and those of RealEstateCalc under
+           'real_estate_calc_params'.
+    """
+    income_tax_calc = None
+    if scenario.get('income_tax_calc_params') is not None:
+        income_tax_calc = IncomeTaxCalc(**_parse_dates(scenario['income_tax_calc_params']))
+
+    real_estate_calc = RealEstateCalc(income_tax_calculator=income_tax_calc,
+                                      **_parse_dates(scenario['real_estate_calc_params']))
+    return income_tax_calc, real_estate_calc
+
+
+def run_scenario(scenario, outputs=None):
+    """
+    Returns a dict of field name to value of the RealEstateCalc of a scenario (see scenario_calculators).
+
+    :param outputs: Names of the fields of RealEstateCalc to return (only those and the fields they depend on are
+           calculated). Defaults to all of them, except the fields holding other calculators (and private attributes).
+    """
+    if outputs is None:
+        _, real_estate_calc = scenario_calculators(scenario)
+        return {field: value for field, value in real_estate_calc.__dict__.items()
+                if field not in _CALCULATOR_FIELDS and not field.startswith('_')}
+
+    params = dict(scenario)
+    params['real_estate_calc_params'] = dict(scenario['real_estate_calc_params'], outputs=outputs)
+    _, real_estate_calc = scenario_calculators(params)
+    return {field: getattr(real_estate_calc, field) for field in outputs}
+
+
+def run_scenario_years(scenario, outputs=None):
+    """
+    Returns a list with a dict of field name to value for every year from 0 until the calc_year of a scenario (see
+    scenario_calculators), calculated in a single pass by a Projection. The dict of year i has calc_year i first.
+
+    :param outputs: Names of the fields of RealEstateCalc to return for every year. Fields which do not vary by year
+           (e.g. purchase_initial_outlay) have the same value every year. Defaults to all the fields of Projection.
+    """
+    fields = [field for field in (outputs or Projection._YEARLY_FIELDS) if field != 'calc_year']
+    yearly_fields = [field for field in fields if field in Projection._YEARLY_FIELDS]
+
+    # The calculator only calculates the fields which do not vary by year (requested or needed by the projection), so
+    # the yearly fields of its calc_year are not calculated a second time on top of the projection
+    scalar_fields = [field for field in RealEstateCalc._DEPENDENCY_GRAPH.upstream(fields)
+                     if field not in Projection._YEARLY_FIELDS]
+
+    params = dict(scenario)
+    params['real_estate_calc_params'] = dict(scenario['real_estate_calc_params'], outputs=scalar_fields)
+    _, real_estate_calc = scenario_calculators(params)
+    arrays = real_estate_calc.project(sale_price=scenario['real_estate_calc_params'].get('sale_price'),
+                                      fields=yearly_fields)
+
+    calc_years = arrays['calc_year'].tolist()
+    columns = {field: arrays[field].tolist() if field in arrays
+               else [getattr(real_estate_calc, field)] * len(calc_years)
+               for field in fields}
+    return [dict(calc_year=year, **{field: columns[field][i] for field in fields}) for i, year in enumerate(calc_years)]
+
+
+def _run_chunk(chunk, outputs, per_year):
+    """Runs a chunk of scenarios in a worker process (one task per chunk, to amortize the inter-process overhead)"""
+    if per_year:
+        return [run_scenario_years(scenario, outputs) for scenario in chunk]
+    return [run_scenario(scenario, outputs) for scenario in chunk]
+
+
+def _initialize_worker():
+    """
+    Warms up a new worker process once, rather than for every task: the calculator modules are imported when this
+    module is unpickled, and a first (cheap) calculation initializes the class-level caches (e.g. dependency graphs).
+    """
+    RealEstateCalc(purchase_date=dt.date(2000, 1, 1), outputs=['net_income_after_taxes'])
+
+
+class SweepRunner:
+    """
+    Runs large sweeps of scenarios (see scenario_calculators) over a pool of worker processes.
+
+    The calculators are CPU-bound pure-Python code, so threads would not run in parallel. Scenarios are instead sent in
+    chunks to a concurrent.futures.ProcessPoolExecutor, whose worker processes are started (and warmed up) once and then
+    re-used by every call to run() until close(). Scenarios are read lazily from their iterable, and only a bounded
+    number of chunks are in flight at any time, so sweeps can be larger than memory when results are consumed as they
+    are produced.
+
+    e.g.
+       with SweepRunner(chunk_size=100, outputs=['net_income_after_taxes']) as runner:
+           for index, result in runner.run(scenarios, ordered=False):
+               ...
+    """
+
+    def __init__(
+            self,
+            max_workers=None,
+            chunk_size=1,
+            outputs=None,
+            max_chunks_in_flight=None,
+            cache=None,
+            per_year=False,
+    ):
+        """
+        :param max_workers: Number of worker processes. Defaults to the number of CPUs.
+        :param chunk_size: Number of scenarios sent to a worker per task. Larger chunks reduce the inter-process
+               overhead, smaller chunks balance the load better.
+        :param outputs: Names of the fields of RealEstateCalc to return for each scenario (see run_scenario). Defaults
+               to all of them.
+        :param max_chunks_in_flight: Maximum number of chunks submitted but not yet returned by run(). Defaults to 2
+               chunks per worker, enough to keep every worker busy.
+        :param cache: ResultCache (see resultcache) of the results of scenarios. Scenarios found in the cache are not
+               sent to the workers, and the results of the others are added to the cache.
+        :param per_year: If True, the result of each scenario is the list of its results for every year until its
+               calc_year (see run_scenario_years), rather than its result for calc_year (see run_scenario).
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1, not {}".format(chunk_size))
+
+        # Initialize class fields from arguments
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.outputs = outputs
+        self.max_chunks_in_flight = max_chunks_in_flight or 2 * self.max_workers
+        self.cache = cache
+        self.per_year = per_year
+
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers,
+                                                               initializer=_initialize_worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Shuts down the worker processes"""
+        self.executor.shutdown()
+
+    def _chunks(self, scenarios):
+        """Yields (index of first scenario, list of scenarios) chunks of scenarios"""
+        scenarios = iter(scenarios)
+        for start in itertools.count(step=self.chunk_size):
+            chunk = list(itertools.islice(scenarios, self.chunk_size))
+            if not chunk:
+                return
+            yield start, chunk
+
+    def _submit(self, chunk):
+        """
+        Returns (future of the results of the chunk scenarios to calculate, keys of the chunk scenarios in the cache,
+        results of the chunk scenarios found in the cache or None)
+        """
+        if self.cache is None:
+            return self.executor.submit(_run_chunk, chunk, self.outputs, self.per_year), None, [None] * len(chunk)
+
+        keys = [self.cache.fingerprint(scenario, self.outputs, self.per_year) for scenario in chunk]
+        cached_results = self.cache.get_many(keys)
+        missing_scenarios = [scenario for scenario, result in zip(chunk, cached_results) if result is None]
+        if missing_scenarios:
+            future = self.executor.submit(_run_chunk, missing_scenarios, self.outputs, self.per_year)
+        else:
+            future = concurrent.futures.Future()
+            future.set_result([])
+        return future, keys, cached_results
+
+    def _results(self, future, keys, cached_results):
+        """Returns the results of a chunk, from the cache or from its future (whose results are added to the cache)"""
+        calculated_results = iter(future.result())
+        results = [next(calculated_results) if result is None else result for result in cached_results]
+        if keys is not None and any(result is None for result in cached_results):
+            self.cache.put_many((key, result) for key, result, cached_result in zip(keys, results, cached_results)
+                                if cached_result is None)
+        return results
+
+    def run(self, scenarios, ordered=True):
+        """
+        Runs every scenario, and yields (index of scenario in scenarios, result of run_scenario or run_scenario_years)
+        tuples as they become available.
+
+        :param scenarios: Iterable of scenario dicts (see scenario_calculators)
+        :param ordered: If True, results are yielded in the order of scenarios. Otherwise, they are yielded as soon as
+               their chunk is completed, which keeps the workers busier when the run time of scenarios varies.
+        """
+        chunks = self._chunks(scenarios)
+        in_flight = {}  # Future to (index of its first scenario, keys, cached results), in submission order
+        while True:
+            for start, chunk in itertools.islice(chunks, self.max_chunks_in_flight - len(in_flight)):
+                future, keys, cached_results = self._submit(chunk)
+                in_flight[future] = start, keys, cached_results
+            if not in_flight:
+                return
+
+            if ordered:
+                done = [next(iter(in_flight))]
+            else:
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for future in done:
+                start, keys, cached_results = in_flight.pop(future)
+                for offset, result in enumerate(self._results(future, keys, cached_results)):
+                    yield start + offset, result
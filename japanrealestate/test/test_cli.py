@@ -0,0 +1,98 @@
+from japanrealestate.cli import main, read_scenarios
+from japanrealestate.sweeprunner import run_scenario, run_scenario_years
+from unittest import TestCase, mock
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+
+
+class TestCli(TestCase):
+    @staticmethod
+    def _sample_scenario(calc_year=3):
+        return {
+            'income_tax_calc_params': {
+                'employment_income': 20000000,
+                'is_resident_for_tax_purposes': True,
+                'current_date': '2016-01-01',
+            },
+            'real_estate_calc_params': {
+                'purchase_date': '2017-01-24',
+                'purchase_price': 100000000,
+                'mortgage_loan_to_value': 0.9,
+                'mortgage_tenor': 30,
+                'mortgage_rate': 0.01,
+                'calc_year': calc_year,
+                'gross_rental_yield': 0.04,
+                'is_resident_for_tax_purposes': True,
+            },
+        }
+
+    def test_read_scenarios(self):
+        scenario = self._sample_scenario()
+        lines = [json.dumps(scenario) + '\n', '\n']
+        self.assertEqual(list(read_scenarios(lines, 'jsonl')), [scenario])
+
+        lines = [
+            'employment_income,purchase_date,purchase_price,mortgage_rate,is_resident_for_tax_purposes\n',
+            '20000000,2017-01-24,100000000,0.01,true\n',
+            ',2017-01-24,50000000,,true\n',
+        ]
+        self.assertEqual(list(read_scenarios(lines, 'csv')), [
+            {
+                'income_tax_calc_params': {'employment_income': 20000000, 'is_resident_for_tax_purposes': True},
+                'real_estate_calc_params': {'purchase_date': '2017-01-24', 'purchase_price': 100000000,
+                                            'mortgage_rate': 0.01, 'is_resident_for_tax_purposes': True},
+            },
+            {
+                'real_estate_calc_params': {'purchase_date': '2017-01-24', 'purchase_price': 50000000,
+                                            'is_resident_for_tax_purposes': True},
+            },
+        ])
+
+        with self.assertRaises(ValueError):
+            list(read_scenarios(['purchase_price,unknown\n', '1,2\n'], 'csv'))
+
+    def test_main(self):
+        scenarios = [self._sample_scenario(calc_year) for calc_year in (3, 1)]
+        fields = ['net_income_after_taxes', 'calc_date']
+
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, 'scenarios.jsonl')
+            with open(input_path, 'w') as file:
+                file.writelines(json.dumps(scenario) + '\n' for scenario in scenarios)
+
+            output_path = os.path.join(directory, 'results.csv')
+            main([input_path, '--output', output_path, '--fields', ','.join(fields), '--workers', '1'])
+            with open(output_path, newline='') as file:
+                rows = list(csv.DictReader(file))
+            expected = [dict(scenario=index, **run_scenario(scenario, fields))
+                        for index, scenario in enumerate(scenarios)]
+            self.assertEqual(rows, [{field: str(value) for field, value in row.items()} for row in expected])
+
+            output_path = os.path.join(directory, 'results.jsonl')
+            main([input_path, '-o', output_path, '-f', ','.join(fields), '-w', '1', '--per-year', '--cache',
+                  os.path.join(directory, 'cache.sqlite')])
+            with open(output_path) as file:
+                rows = [json.loads(line) for line in file]
+            expected = [dict(scenario=index, **row)
+                        for index, scenario in enumerate(scenarios)
+                        for row in run_scenario_years(scenario, fields)]
+            for row in expected:
+                row['calc_date'] = row['calc_date'].isoformat()
+            self.assertEqual(rows, expected)
+            self.assertEqual(len(rows), 4 + 2)
+
+    def test_stdin(self):
+        """Scenarios are read from standard input and results are written to standard output by default"""
+        stdin = io.StringIO(json.dumps(self._sample_scenario()) + '\n')
+        stdout = io.StringIO()
+        with mock.patch.object(sys, 'stdin', stdin), mock.patch.object(sys, 'stdout', stdout):
+            main(['-f', 'net_income_after_taxes', '-w', '1', '--output-format', 'jsonl'])
+        self.assertEqual(json.loads(stdout.getvalue()), {
+            'scenario': 0,
+            'net_income_after_taxes': run_scenario(self._sample_scenario(), ['net_income_after_taxes'])[
+                'net_income_after_taxes'],
+        })
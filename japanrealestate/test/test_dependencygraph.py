@@ -0,0 +1,42 @@
+from japanrealestate.dependencygraph import DependencyGraph
+from unittest import TestCase
+
+
+class TestDependencyGraph(TestCase):
+    def test___init__(self):
+        self.assertRaises(ValueError, DependencyGraph, [('b', ['a', 'c']), ('c', ['a'])])
+
+        graph = DependencyGraph([('a', ['a']), ('b', ['x', 'a'])])
+        self.assertEqual(graph.fields, ['a', 'b'])
+        self.assertEqual(graph.known_fields, {'a', 'b', 'x'})
+
+    def test_downstream(self):
+        graph = DependencyGraph([
+            ('b', ['a']),
+            ('c', ['b']),
+            ('d', ['x']),
+            ('e', ['c', 'd']),
+            ('f', ['f']),
+        ])
+
+        self.assertEqual(graph.downstream(['a']), ['b', 'c', 'e'])
+        self.assertEqual(graph.downstream(['x']), ['d', 'e'])
+        self.assertEqual(graph.downstream(['c', 'x']), ['d', 'e'])  # Overridden c is not recalculated itself
+        self.assertEqual(graph.downstream(['f']), ['f'])
+        self.assertEqual(graph.downstream([]), [])
+        self.assertRaises(ValueError, graph.downstream, ['y'])
+
+    def test_upstream(self):
+        graph = DependencyGraph([
+            ('b', ['a']),
+            ('c', ['b']),
+            ('d', ['x']),
+            ('e', ['c', 'd']),
+            ('f', ['f']),
+        ])
+
+        self.assertEqual(graph.upstream(['c']), ['b', 'c'])
+        self.assertEqual(graph.upstream(['e']), ['b', 'c', 'd', 'e'])
+        self.assertEqual(graph.upstream(['d', 'f']), ['d', 'f'])
+        self.assertEqual(graph.upstream(['a']), [])
+        self.assertRaises(ValueError, graph.upstream, ['y'])
@@ -0,0 +1,80 @@
+from japanrealestate.depreciationschedule import DepreciationSchedule
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.realestatecalc import RealEstateCalc
+from unittest import TestCase
+import datetime as dt
+import numpy as np
+
+
+class TestDepreciationSchedule(TestCase):
+    def test_depreciation_for_year(self):
+        schedule = DepreciationSchedule(annual_amount=1000000, years=10)
+        self.assertEqual(schedule.depreciation_for_year(0), 1000000)
+        self.assertEqual(schedule.depreciation_for_year(9), 1000000)
+        self.assertEqual(schedule.depreciation_for_year(10), 0)
+        self.assertIsInstance(schedule.depreciation_for_year(9), int)
+
+    def test_cumulative_depreciation_for_year(self):
+        schedule = DepreciationSchedule(annual_amount=1000000, years=10)
+        for year in range(-1, 15):
+            expected = sum(schedule.depreciation_for_year(x) for x in range(0, year + 1))
+            self.assertEqual(schedule.cumulative_depreciation_for_year(year), expected)
+        self.assertIsInstance(schedule.cumulative_depreciation_for_year(5), int)
+        self.assertEqual(schedule.total_depreciation, 10000000)
+
+    def test_components(self):
+        """Building body over 22 years and equipment over 15 years"""
+        schedule = DepreciationSchedule(annual_amount=[2000000, 500000], years=[22, 15])
+        self.assertEqual(schedule.depreciation_for_year(14), 2500000)
+        self.assertEqual(schedule.depreciation_for_year(15), 2000000)
+        self.assertEqual(schedule.depreciation_for_year(22), 0)
+        self.assertEqual(schedule.cumulative_depreciation_for_year(20), 21 * 2000000 + 15 * 500000)
+        self.assertEqual(schedule.cumulative_depreciation_for_year(30), schedule.total_depreciation)
+
+        with self.assertRaises(ValueError):
+            DepreciationSchedule(annual_amount=[2000000, 500000], years=[22])
+
+    def test_arrays(self):
+        """Components and years can be arrays (one element per scenario), as used by RealEstateCalcBatch"""
+        annual_amount = np.array([1000000, 2000000, 0])
+        years = np.array([10, 5, 0])
+        calc_year = np.array([9, 5, 3])
+        schedule = DepreciationSchedule(annual_amount=annual_amount, years=years)
+        np.testing.assert_array_equal(schedule.depreciation_for_year(calc_year), [1000000, 0, 0])
+        np.testing.assert_array_equal(schedule.cumulative_depreciation_for_year(calc_year), [10000000, 10000000, 0])
+
+        for i in range(len(calc_year)):
+            scalar_schedule = DepreciationSchedule(annual_amount=int(annual_amount[i]), years=int(years[i]))
+            self.assertEqual(schedule.cumulative_depreciation_for_year(calc_year)[i],
+                             scalar_schedule.cumulative_depreciation_for_year(int(calc_year[i])))
+
+    def test_real_estate_calc(self):
+        """A schedule with several components can be set on a RealEstateCalc"""
+        real_estate_calc = RealEstateCalc(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=100000000,
+            building_to_land_ratio=0.7,
+            size=100,
+            age=10,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=30,
+            mortgage_rate=0.01,
+            useful_life=47,
+            calc_year=3,
+            income_tax_calculator=IncomeTaxCalc(employment_income=20000000, current_date=dt.date(2016, 1, 1)),
+            gross_rental_yield=0.04,
+        )
+        self.assertEqual(real_estate_calc.depreciation_schedule,
+                         DepreciationSchedule(annual_amount=real_estate_calc.depreciation_annual,
+                                              years=real_estate_calc.depreciation_years))
+
+        equipment_annual = 1000000
+        real_estate_calc.update(depreciation_schedule=DepreciationSchedule(
+            annual_amount=[real_estate_calc.depreciation_annual - equipment_annual, equipment_annual],
+            years=[real_estate_calc.depreciation_years, 2]
+        ))
+        self.assertEqual(real_estate_calc.depreciation, real_estate_calc.depreciation_annual - equipment_annual)
+        self.assertEqual(real_estate_calc.depreciation_cumulative,
+                         4 * real_estate_calc.depreciation_annual - 2 * equipment_annual)
+        self.assertEqual(real_estate_calc.cumulative_net_income,
+                         sum(real_estate_calc.project(horizon=3)['net_income_after_taxes']))
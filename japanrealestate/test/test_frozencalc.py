@@ -0,0 +1,74 @@
+from japanrealestate.frozencalc import IncomeTaxInputs, RealEstateInputs, RealEstateResult, evaluate
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.realestatecalc import RealEstateCalc
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+import datetime as dt
+import itertools
+
+
+class TestFrozenCalc(TestCase):
+    @staticmethod
+    def _sample_inputs():
+        real_estate_inputs = RealEstateInputs(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=100000000,
+            size=50,
+            age=10,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=30,
+            mortgage_rate=0.01,
+            monthly_fees=20000,
+            property_tax_rate=0.014,
+            gross_rental_yield=0.05,
+            calc_year=5,
+        )
+        income_tax_inputs = IncomeTaxInputs(employment_income=20000000, current_date=dt.date(2016, 1, 1))
+        return real_estate_inputs, income_tax_inputs
+
+    def test_evaluate(self):
+        real_estate_inputs, income_tax_inputs = self._sample_inputs()
+        result = evaluate(real_estate_inputs, income_tax_inputs)
+
+        expected = RealEstateCalc(income_tax_calculator=IncomeTaxCalc(**income_tax_inputs._asdict()),
+                                  **real_estate_inputs._asdict())
+        self.assertIsInstance(result, RealEstateResult)
+        for field in RealEstateResult._fields:
+            self.assertEqual(getattr(result, field), getattr(expected, field), field)
+
+    def test_evaluate_outputs(self):
+        real_estate_inputs, income_tax_inputs = self._sample_inputs()
+        result = evaluate(real_estate_inputs, income_tax_inputs, outputs=['net_income_after_taxes'])
+        self.assertEqual(result.net_income_after_taxes,
+                         evaluate(real_estate_inputs, income_tax_inputs).net_income_after_taxes)
+        self.assertIsNone(result.net_profit_on_realestate)
+
+    def test_evaluate_without_income_taxes(self):
+        real_estate_inputs, _ = self._sample_inputs()
+        result = evaluate(real_estate_inputs)
+        self.assertEqual(result.income_tax_shield, RealEstateCalc(**real_estate_inputs._asdict()).income_tax_shield)
+
+    def test_immutable(self):
+        real_estate_inputs, income_tax_inputs = self._sample_inputs()
+        result = evaluate(real_estate_inputs, income_tax_inputs)
+        with self.assertRaises(AttributeError):
+            real_estate_inputs.purchase_price = 0
+        with self.assertRaises(AttributeError):
+            result.net_income_after_taxes = 0
+
+        variant = real_estate_inputs._replace(purchase_price=80000000)
+        self.assertEqual(real_estate_inputs.purchase_price, 100000000)
+        self.assertEqual(variant.purchase_price, 80000000)
+        self.assertEqual(variant.monthly_fees, real_estate_inputs.monthly_fees)
+
+    def test_evaluate_concurrently(self):
+        real_estate_inputs, income_tax_inputs = self._sample_inputs()
+        variants = [real_estate_inputs._replace(purchase_price=purchase_price, gross_rental_yield=gross_rental_yield)
+                    for purchase_price, gross_rental_yield in itertools.product(range(50000000, 150000000, 10000000),
+                                                                                 [0.03, 0.04, 0.05, 0.06])]
+        expected = [evaluate(variant, income_tax_inputs) for variant in variants]
+
+        RealEstateCalc.mortgage_cache.clear()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(evaluate, variants * 5, itertools.repeat(income_tax_inputs)))
+        self.assertEqual(results, expected * 5)
@@ -0,0 +1,91 @@
+from japanrealestate.goalseek import GoalSeek
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.incometaxcalcbatch import IncomeTaxCalcBatch
+from japanrealestate.realestatecalc import RealEstateCalc
+from japanrealestate.realestatecalcbatch import RealEstateCalcBatch
+from unittest import TestCase
+import datetime as dt
+import numpy as np
+
+
+class TestGoalSeek(TestCase):
+    @staticmethod
+    def _sample_inputs():
+        return dict(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=np.array([30000000, 68000000, 100000000]),
+            size=62.06,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=35,
+            mortgage_rate=0.01,
+            monthly_fees=20000,
+            property_tax_rate=0.005,
+            income_tax_calculator=IncomeTaxCalc(employment_income=20000000, current_date=dt.date(2016, 1, 1)),
+            calc_year=1,
+        )
+
+    def test_break_even_yield(self):
+        inputs = self._sample_inputs()
+        goal_seek = GoalSeek(calculator_class=RealEstateCalcBatch,
+                             inputs=inputs,
+                             parameter='gross_rental_yield',
+                             output='net_income_after_taxes',
+                             target=0,
+                             lower=0,
+                             upper=0.1)
+        self.assertTrue(goal_seek.is_converged.all())
+        self.assertLess(goal_seek.evaluations, 30)
+
+        for i, purchase_price in enumerate(inputs['purchase_price']):
+            scalar_inputs = dict(inputs, purchase_price=int(purchase_price))
+            at_solution = RealEstateCalc(gross_rental_yield=goal_seek.solution[i], **scalar_inputs)
+            self.assertEqual(at_solution.net_income_after_taxes, goal_seek.value[i])
+            self.assertAlmostEqual(at_solution.net_income_after_taxes, 0, delta=1)
+
+            # The break-even yield is the smallest yield without a loss
+            below_solution = RealEstateCalc(gross_rental_yield=goal_seek.solution[i] * (1 - 1e-6), **scalar_inputs)
+            self.assertLess(below_solution.net_income_after_taxes, 0)
+
+    def test_target_irr(self):
+        inputs = dict(self._sample_inputs(), purchase_price=68000000, gross_rental_yield=np.array([0.04, 0.06]),
+                      calc_year=10, sale_price=70000000)
+        goal_seek = GoalSeek(inputs=inputs,
+                             parameter='purchase_price',
+                             output='irr',
+                             target=0.05,
+                             lower=10000000,
+                             upper=60000000,  # The bracket is expanded to include the solution
+                             output_tolerance=1e-6)
+        self.assertTrue(goal_seek.is_converged.all())
+        for i, gross_rental_yield in enumerate(inputs['gross_rental_yield']):
+            real_estate_calc = RealEstateCalc(**dict(inputs, purchase_price=goal_seek.solution[i],
+                                                     gross_rental_yield=gross_rental_yield))
+            self.assertAlmostEqual(real_estate_calc.irr(), 0.05, places=6)
+
+    def test_target_net_income_after_tax(self):
+        """Tax tables are piecewise linear, so the employment income of many targets is found in a few iterations"""
+        target = np.array([3000000, 10000000, 50000000])
+        goal_seek = GoalSeek(calculator_class=IncomeTaxCalcBatch,
+                             inputs=dict(current_date=np.datetime64('2016-01-01')),
+                             parameter='employment_income',
+                             output='net_income_after_tax',
+                             target=target,
+                             lower=0,
+                             upper=10000000,
+                             output_tolerance=1)
+        self.assertTrue(goal_seek.is_converged.all())
+        self.assertLess(goal_seek.evaluations, 20)
+        for i in range(len(target)):
+            income_tax_calc = IncomeTaxCalc(employment_income=goal_seek.solution[i], current_date=dt.date(2016, 1, 1))
+            self.assertAlmostEqual(income_tax_calc.net_income_after_tax, target[i], delta=1)
+
+    def test_no_solution(self):
+        goal_seek = GoalSeek(calculator_class=IncomeTaxCalcBatch,
+                             parameter='employment_income',
+                             output='net_income_after_tax',
+                             target=np.array([-1, 1000000]),
+                             lower=0,
+                             upper=10000000)
+        self.assertTrue(np.isnan(goal_seek.solution[0]))
+        self.assertFalse(goal_seek.is_converged[0])
+        self.assertTrue(goal_seek.is_converged[1])
@@ -0,0 +1,72 @@
+from japanrealestate.holdingperiod import HoldingPeriod
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.realestatecalc import RealEstateCalc
+from unittest import TestCase
+import datetime as dt
+import numpy as np
+
+
+class TestHoldingPeriod(TestCase):
+    @staticmethod
+    def _sample_real_estate_calc(calc_year=0, sale_price=None):
+        income_tax_calc = IncomeTaxCalc(
+            employment_income=20000000,
+            rent=2400000,
+            is_rent_program=True,
+            other_income=1000000,
+            number_of_dependents=2,
+            social_security_expense=None,
+            tax_deduction=100000,
+            is_resident_for_tax_purposes=True,
+            current_date=dt.date(year=2016, month=1, day=1)
+        )
+
+        return RealEstateCalc(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=100000000,
+            building_to_land_ratio=0.7,
+            size=100,
+            age=10,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=30,
+            mortgage_rate=0.01,
+            agent_fee_variable=0.03,
+            agent_fee_fixed=20000,
+            other_transaction_fees=0.01,
+            monthly_fees=20000,
+            property_tax_rate=0.005,
+            calc_year=calc_year,
+            income_tax_calculator=income_tax_calc,
+            gross_rental_yield=0.06,
+            is_resident_for_tax_purposes=True,
+            sale_price=sale_price,
+        )
+
+    def test__calculate_all_fields(self):
+        """Every sale year should match a RealEstateCalc with that calc_year"""
+        for sale_price in [None, 110000000]:
+            holding_period = HoldingPeriod(real_estate_calc=self._sample_real_estate_calc(sale_price=sale_price),
+                                           horizon=12,
+                                           sale_price=sale_price)
+            np.testing.assert_array_equal(holding_period.sale_year, np.arange(13))
+
+            for year in holding_period.sale_year:
+                real_estate_calc = self._sample_real_estate_calc(calc_year=int(year), sale_price=sale_price)
+                cash_flows = real_estate_calc.cash_flows()
+                self.assertEqual(list(holding_period.cash_flows[year]), cash_flows + [0] * (13 - len(cash_flows) + 1))
+                self.assertEqual(holding_period.net_profit_on_realestate[year], real_estate_calc.net_profit_on_realestate)
+                self.assertAlmostEqual(holding_period.irr[year], real_estate_calc.irr())
+                self.assertAlmostEqual(holding_period.annualized_return[year],
+                                       real_estate_calc.equity_multiple() ** (1 / (year + 1)) - 1)
+
+    def test_optimal_sale_year(self):
+        holding_period = HoldingPeriod(real_estate_calc=self._sample_real_estate_calc(), horizon=50,
+                                       sale_price=110000000)
+        self.assertEqual(holding_period.optimal_sale_year('net_profit_on_realestate'),
+                         int(np.argmax(holding_period.net_profit_on_realestate)))
+        self.assertEqual(holding_period.optimal_sale_year(), int(np.nanargmax(holding_period.irr)))
+        self.assertIn(holding_period.optimal_sale_year('annualized_return'), range(51))
+        self.assertRaises(ValueError, holding_period.optimal_sale_year, 'book_value')
+
+        # Capital gains are taxed at the short term rate until year 4, so selling in year 5 beats year 4
+        self.assertGreater(holding_period.net_profit_on_realestate[5], holding_period.net_profit_on_realestate[4])
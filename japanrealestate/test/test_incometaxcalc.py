@@ -1,4 +1,5 @@
 from japanrealestate.incometaxcalc import IncomeTaxCalc
+import copy
 from unittest import TestCase
 import datetime as dt
 
@@ -61,6 +62,13 @@ class TestIncomeTaxCalc(TestCase):
         income_tax_calc._calculate_employment_income_for_tax()
         self.assertEquals(income_tax_calc.employment_income_for_tax, 7800000)
 
+        income_tax_calc.employment_income_after_rent_program = 2345678  # Rule with rounding
+        income_tax_calc._calculate_employment_income_for_tax()
+        self.assertEquals(income_tax_calc.employment_income_for_tax, 586000 * 2.8 - 180000)
+
+        income_tax_calc.employment_income_after_rent_program = 650999.5  # Between the bounds of two rules
+        self.assertRaises(ValueError, income_tax_calc._calculate_employment_income_for_tax)
+
     def test__calculate_total_income_for_tax(self):
         income_tax_calc = IncomeTaxCalc()
         income_tax_calc.employment_income_for_tax = 9000000
@@ -106,6 +114,13 @@ class TestIncomeTaxCalc(TestCase):
         income_tax_calc._calculate_national_income_tax_bracket()
         self.assertEquals(income_tax_calc.national_income_tax_bracket, income_tax_calc._NATIONAL_INCOME_TAX_TABLE[-1])
 
+        income_tax_calc.taxable_income = 1950001
+        income_tax_calc._calculate_national_income_tax_bracket()
+        self.assertEquals(income_tax_calc.national_income_tax_bracket, income_tax_calc._NATIONAL_INCOME_TAX_TABLE[1])
+
+        income_tax_calc.taxable_income = -1
+        self.assertRaises(ValueError, income_tax_calc._calculate_national_income_tax_bracket)
+
     def test__calculate_national_income_tax_rate(self):
         income_tax_calc = IncomeTaxCalc()
         income_tax_calc.national_income_tax_bracket = {
@@ -182,6 +197,87 @@ class TestIncomeTaxCalc(TestCase):
         income_tax_calc._calculate_effective_tax_rate()
         self.assertEquals(income_tax_calc.effective_tax_rate, 0.5)
 
+    def test_adjusted_total_income_tax(self):
+        """Should match a copy of the calculator with the adjusted fields, and leave the original untouched"""
+        income_tax_calc = IncomeTaxCalc(
+            employment_income=20000000,
+            rent=2400000,
+            is_rent_program=True,
+            other_income=1000000,
+            number_of_dependents=2,
+            tax_deduction=100000,
+            current_date=dt.date(year=2016, month=1, day=1)
+        )
+        original_fields = dict(income_tax_calc.__dict__)
+
+        for additional_other_income in [-30000000, -1000000, 0, 2500000, 50000000]:
+            for additional_tax_deduction in [0, 400000]:
+                for current_date in [None, dt.date(year=2040, month=1, day=1)]:
+                    copied_calc = copy.deepcopy(income_tax_calc)
+                    copied_calc.other_income += additional_other_income
+                    copied_calc.tax_deduction += additional_tax_deduction
+                    copied_calc.current_date = current_date or income_tax_calc.current_date
+                    copied_calc.calculate_all_fields()
+
+                    self.assertEqual(
+                        income_tax_calc.adjusted_total_income_tax(
+                            additional_other_income=additional_other_income,
+                            additional_tax_deduction=additional_tax_deduction,
+                            current_date=current_date,
+                        ),
+                        copied_calc.total_income_tax
+                    )
+
+        self.assertEqual(income_tax_calc.__dict__, original_fields)
+
+    def test_recalculate(self):
+        """Recalculating after changing any input should give the same result as a new calculator with that input"""
+        inputs = dict(
+            employment_income=20000000,
+            rent=2400000,
+            other_income=1000000,
+            current_date=dt.date(year=2016, month=1, day=1)
+        )
+        income_tax_calc = IncomeTaxCalc(**inputs)
+
+        changes = [
+            ('employment_income', 5000000), ('rent', 1200000), ('is_rent_program', True), ('other_income', -500000),
+            ('life_insurance_premium', 40000), ('medical_expense', 3000000), ('number_of_dependents', 2),
+            ('social_security_expense', 500000), ('tax_deduction', 200000), ('is_resident_for_tax_purposes', False),
+            ('current_date', dt.date(year=2040, month=1, day=1)),
+        ]
+
+        for field, value in changes:
+            expected = IncomeTaxCalc(**dict(inputs, **{field: value}))
+
+            actual = copy.copy(income_tax_calc)
+            actual.update(**{field: value})
+            self.assertEqual(actual.__dict__, expected.__dict__, "Mismatch after changing {}".format(field))
+
+        self.assertNotIn('social_security_expense', IncomeTaxCalc._DEPENDENCY_GRAPH.downstream(['other_income']))
+
+        calculate_methods = [name for name in dir(IncomeTaxCalc) if name.startswith('_calculate_')]
+        self.assertEqual(sorted('_calculate_' + field for field in IncomeTaxCalc._DEPENDENCY_GRAPH.fields),
+                         sorted(calculate_methods))
+
+    def test_fork(self):
+        income_tax_calc = IncomeTaxCalc(employment_income=20000000, rent=2400000,
+                                        current_date=dt.date(year=2016, month=1, day=1))
+        original_fields = dict(income_tax_calc.__dict__)
+
+        forked_calc = income_tax_calc.fork(other_income=1000000)
+        self.assertEqual(income_tax_calc.__dict__, original_fields)
+        expected = IncomeTaxCalc(employment_income=20000000, rent=2400000, other_income=1000000,
+                                 current_date=dt.date(year=2016, month=1, day=1))
+        self.assertEqual(forked_calc.__dict__, expected.__dict__)
+
+        # The defaulted social_security_expense follows employment_income
+        forked_calc = income_tax_calc.fork(employment_income=5000000)
+        expected = IncomeTaxCalc(employment_income=5000000, rent=2400000,
+                                 current_date=dt.date(year=2016, month=1, day=1))
+        self.assertEqual(forked_calc.social_security_expense, expected.social_security_expense)
+        self.assertEqual(forked_calc.__dict__, expected.__dict__)
+
     def test__calculate_all_fields(self):
         """A basic regression test to confirm that all required functions are called as part of calculate_all_fields"""
         income_tax_calc = IncomeTaxCalc(
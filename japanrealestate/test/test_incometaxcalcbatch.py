@@ -0,0 +1,122 @@
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.incometaxcalcbatch import IncomeTaxCalcBatch
+from unittest import TestCase
+import datetime as dt
+import numpy as np
+
+
+class TestIncomeTaxCalcBatch(TestCase):
+    def test_broadcasting(self):
+        income_tax_calc_batch = IncomeTaxCalcBatch(
+            employment_income=np.array([5000000, 10000000, 20000000]).reshape(3, 1),
+            other_income=np.array([0, 1000000]),
+        )
+        self.assertEqual(income_tax_calc_batch.shape, (3, 2))
+        self.assertEqual(income_tax_calc_batch.total_income_tax.shape, (3, 2))
+        self.assertEqual(income_tax_calc_batch.current_date.shape, (3, 2))
+
+    def test__calculate_social_security_expense(self):
+        income_tax_calc_batch = IncomeTaxCalcBatch(
+            employment_income=10000000,
+            social_security_expense=np.array([200000, np.nan]),
+        )
+        np.testing.assert_array_equal(income_tax_calc_batch.social_security_expense, [200000, 1195230])
+
+    def test__calculate_employment_income_for_tax(self):
+        """The piecewise kernel should match the functions of the table at (and around) every bound"""
+        bounds = [rule['bounds'] for rule in IncomeTaxCalc._EMPLOYMENT_INCOME_FOR_TAX_TABLE]
+        incomes = sorted(set(
+            [bound[0] for bound in bounds] +
+            [bound[0] + 1 for bound in bounds] +
+            [bound[1] for bound in bounds] +
+            [1630001, 1702000, 1702001, 1703999, 2345678, 4567890, 7654321, 11111111, 55555555]
+        ))
+
+        income_tax_calc_batch = IncomeTaxCalcBatch()
+        income_tax_calc_batch.employment_income_after_rent_program = np.array(incomes)
+        income_tax_calc_batch.shape = (len(incomes),)
+        income_tax_calc_batch._calculate_employment_income_for_tax()
+
+        income_tax_calc = IncomeTaxCalc()
+        for i, income in enumerate(incomes):
+            income_tax_calc.employment_income_after_rent_program = income
+            income_tax_calc._calculate_employment_income_for_tax()
+            self.assertEqual(income_tax_calc_batch.employment_income_for_tax[i],
+                             income_tax_calc.employment_income_for_tax,
+                             "Mismatch for income {}".format(income))
+
+        income_tax_calc_batch.employment_income_after_rent_program = np.array([-1, 650999.5])
+        income_tax_calc_batch.shape = (2,)
+        self.assertRaises(ValueError, income_tax_calc_batch._calculate_employment_income_for_tax)
+
+    def test__calculate_all_fields(self):
+        """Every element of the batch should match an IncomeTaxCalc created with the same inputs"""
+        employment_income = np.array([0, 1000000, 1625000, 1700000, 3000000, 5000000, 8000000, 10500000, 20000000,
+                                      50000000])
+        grid = np.meshgrid(
+            employment_income,
+            np.array([0, 1000000, -500000]),  # other_income
+            np.array([False, True]),  # is_rent_program
+            np.array([0, 3]),  # number_of_dependents
+            np.array([False, True]),  # is_resident_for_tax_purposes
+            np.array(['2016-01-01', '2038-01-01'], dtype='datetime64[D]'),  # current_date
+            indexing='ij'
+        )
+        grid = [values.ravel() for values in grid]
+        rent = np.where(grid[0] >= 5000000, 2400000, 0)
+
+        income_tax_calc_batch = IncomeTaxCalcBatch(
+            employment_income=grid[0],
+            other_income=grid[1],
+            is_rent_program=grid[2],
+            number_of_dependents=grid[3],
+            is_resident_for_tax_purposes=grid[4],
+            current_date=grid[5],
+            rent=rent,
+            life_insurance_premium=30000,
+            medical_expense=10000,
+            tax_deduction=100000,
+        )
+
+        for i in range(len(grid[0])):
+            income_tax_calc = IncomeTaxCalc(
+                employment_income=int(grid[0][i]),
+                other_income=int(grid[1][i]),
+                is_rent_program=bool(grid[2][i]),
+                number_of_dependents=int(grid[3][i]),
+                is_resident_for_tax_purposes=bool(grid[4][i]),
+                current_date=grid[5][i].item(),
+                rent=int(rent[i]),
+                life_insurance_premium=30000,
+                medical_expense=10000,
+                tax_deduction=100000,
+            )
+
+            for field, expected in income_tax_calc.__dict__.items():
+                if field == '_defaulted_inputs':
+                    continue
+
+                actual = getattr(income_tax_calc_batch, field)[i]
+                if field == 'national_income_tax_bracket':
+                    expected = IncomeTaxCalc._NATIONAL_INCOME_TAX_TABLE.index(expected)
+                elif field == 'current_date':
+                    actual = actual.item()
+                self.assertEqual(actual, expected, "{} does not match for taxpayer {}".format(field, i))
+
+    def test_from_income_tax_calc(self):
+        income_tax_calc = IncomeTaxCalc(
+            employment_income=20000000,
+            rent=2400000,
+            is_rent_program=True,
+            other_income=1000000,
+            number_of_dependents=2,
+            tax_deduction=100000,
+            current_date=dt.date(year=2016, month=1, day=1)
+        )
+
+        income_tax_calc_batch = IncomeTaxCalcBatch.from_income_tax_calc(income_tax_calc,
+                                                                        other_income=np.array([1000000, 2000000]))
+        self.assertEqual(income_tax_calc_batch.total_income_tax[0], income_tax_calc.total_income_tax)
+        self.assertGreater(income_tax_calc_batch.total_income_tax[1], income_tax_calc.total_income_tax)
+        np.testing.assert_array_equal(income_tax_calc_batch.social_security_expense,
+                                      income_tax_calc.social_security_expense)
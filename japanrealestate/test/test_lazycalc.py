@@ -0,0 +1,39 @@
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.lazycalc import LazyCalc
+from japanrealestate.realestatecalc import RealEstateCalc
+from unittest import TestCase
+import datetime as dt
+
+
+class TestLazyCalc(TestCase):
+    def test___getattr__(self):
+        inputs = dict(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=100000000,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=30,
+            mortgage_rate=0.01,
+            calc_year=5,
+            income_tax_calculator=IncomeTaxCalc(employment_income=20000000, current_date=dt.date(2016, 1, 1)),
+            gross_rental_yield=0.04,
+        )
+        expected = RealEstateCalc(**inputs)
+
+        real_estate_calc = LazyCalc(RealEstateCalc, **inputs)
+        self.assertEqual(real_estate_calc.calculated_fields, set())
+        self.assertEqual(real_estate_calc.purchase_price, 100000000)  # Inputs are available as is
+
+        self.assertEqual(real_estate_calc.rental_income, expected.rental_income)
+        self.assertEqual(real_estate_calc.calculated_fields, {'rental_income'})
+
+        self.assertEqual(real_estate_calc.net_income_after_taxes, expected.net_income_after_taxes)
+        self.assertNotIn('cumulative_net_income', real_estate_calc.calculated_fields)
+        self.assertIsNone(real_estate_calc.calculator.sale_proceeds_net)
+
+        for field in RealEstateCalc._DEPENDENCY_GRAPH.fields:
+            if field != 'mortgage':
+                self.assertEqual(getattr(real_estate_calc, field), getattr(expected, field))
+
+        income_tax_calc = LazyCalc(IncomeTaxCalc, employment_income=20000000)
+        self.assertEqual(income_tax_calc.taxable_income, IncomeTaxCalc(employment_income=20000000).taxable_income)
+        self.assertNotIn('effective_tax_rate', income_tax_calc.calculated_fields)
@@ -0,0 +1,97 @@
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.montecarlo import MonteCarlo
+from japanrealestate.projection import Projection
+from japanrealestate.realestatecalc import RealEstateCalc
+from unittest import TestCase
+import datetime as dt
+import numpy as np
+
+
+class TestMonteCarlo(TestCase):
+    @staticmethod
+    def _sample_real_estate_calc(is_primary_residence=0, mortgage_loan_to_value=0.9):
+        income_tax_calc = IncomeTaxCalc(
+            employment_income=20000000,
+            rent=2400000,
+            is_rent_program=True,
+            other_income=1000000,
+            number_of_dependents=2,
+            social_security_expense=None,
+            tax_deduction=100000,
+            is_resident_for_tax_purposes=True,
+            current_date=dt.date(year=2016, month=1, day=1)
+        )
+
+        return RealEstateCalc(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=100000000,
+            building_to_land_ratio=0.7,
+            size=100,
+            age=10,
+            mortgage_loan_to_value=mortgage_loan_to_value,
+            mortgage_tenor=30,
+            mortgage_rate=0.01,
+            agent_fee_variable=0.03,
+            agent_fee_fixed=20000,
+            other_transaction_fees=0.01,
+            monthly_fees=20000,
+            property_tax_rate=0.01,
+            calc_year=35,
+            income_tax_calculator=income_tax_calc,
+            gross_rental_yield=0.04,
+            is_primary_residence=is_primary_residence,
+            is_resident_for_tax_purposes=True,
+        )
+
+    def test_deterministic(self):
+        """Without randomness, every path should match the Projection of the calculator"""
+        for is_primary_residence in [0, 1]:
+            for mortgage_loan_to_value in [0, 0.9]:
+                real_estate_calc = self._sample_real_estate_calc(is_primary_residence, mortgage_loan_to_value)
+                projection = Projection(real_estate_calc=real_estate_calc)
+                monte_carlo = MonteCarlo(real_estate_calc=real_estate_calc, num_paths=2, seed=0)
+
+                for field in ['net_income_before_taxes', 'net_income_after_taxes', 'mortgage_amount_outstanding']:
+                    np.testing.assert_allclose(monte_carlo.percentiles(field, q=[0, 100]),
+                                               [getattr(projection, field)] * 2, rtol=0, atol=1)
+                np.testing.assert_allclose(monte_carlo.net_profit_on_realestate,
+                                           projection.net_profit_on_realestate[-1], rtol=0, atol=40)
+                np.testing.assert_allclose(monte_carlo.cash_flows(), [real_estate_calc.cash_flows()] * 2, rtol=0,
+                                           atol=40)
+                np.testing.assert_allclose(monte_carlo.irr(), real_estate_calc.irr(), rtol=1e-6)
+
+    def test_simulation(self):
+        real_estate_calc = self._sample_real_estate_calc()
+        monte_carlo = MonteCarlo(real_estate_calc=real_estate_calc,
+                                 horizon=10,
+                                 num_paths=1000,
+                                 rent_growth_mean=-0.01,
+                                 rent_growth_volatility=0.02,
+                                 vacancy_rate=0.1,
+                                 rate_reset_years=5,
+                                 rate_volatility=0.01,
+                                 rate_floor=0.005,
+                                 seed=1)
+
+        self.assertEqual(monte_carlo.rent_index.shape, (1000, 11))
+        np.testing.assert_array_equal(monte_carlo.rent_index[:, 0], 1)
+        self.assertTrue(((monte_carlo.vacancy_months >= 0) & (monte_carlo.vacancy_months <= 12)).all())
+        self.assertAlmostEqual(monte_carlo.vacancy_months.mean() / 12, 0.1, places=2)
+
+        # Rates only change at resets, and never below the floor
+        np.testing.assert_array_equal(monte_carlo.mortgage_rate[:, :5], 0.01)
+        np.testing.assert_array_equal(monte_carlo.mortgage_rate[:, 5:10], monte_carlo.mortgage_rate[:, [5] * 5])
+        self.assertGreaterEqual(monte_carlo.mortgage_rate.min(), 0.005)
+
+        # Vacancy reduces income, so most paths do worse than the deterministic projection
+        projection = Projection(real_estate_calc=real_estate_calc, horizon=10)
+        self.assertLess(np.median(monte_carlo.net_profit_on_realestate), projection.net_profit_on_realestate[-1])
+        self.assertEqual(monte_carlo.probability_negative_cash_flow.shape, (11,))
+        self.assertEqual(monte_carlo.value_at_risk(0.95), -monte_carlo.percentiles(q=5))
+
+        # The same seed gives the same simulation
+        np.testing.assert_array_equal(
+            MonteCarlo(real_estate_calc=real_estate_calc, horizon=10, num_paths=1000, vacancy_rate=0.1,
+                       seed=2).net_income_after_taxes,
+            MonteCarlo(real_estate_calc=real_estate_calc, horizon=10, num_paths=1000, vacancy_rate=0.1,
+                       seed=2).net_income_after_taxes)
@@ -90,3 +90,42 @@ class TestMortgage(TestCase):
         expected = [1264.14] * 30 * 12
         np.testing.assert_almost_equal(loan.amortization_schedule, expected, decimal=2)
         self.assertAlmostEquals(loan.monthly_payment, 1264.14, places=2)
+
+    def test__calculate_balance_by_year(self):
+        loan = Mortgage()
+        loan.principal_schedule = np.asarray([1.0] * 24)
+        loan._calculate_balance_by_year()
+        np.testing.assert_array_equal(loan.balance_by_year, [24, 12, 0])
+
+    def test__calculate_remaining_payments_by_year(self):
+        loan = Mortgage()
+        loan.amortization_schedule = np.asarray([2.0] * 24)
+        loan._calculate_remaining_payments_by_year()
+        np.testing.assert_array_equal(loan.remaining_payments_by_year, [48, 24, 0])
+
+    def test__calculate_interest_by_year(self):
+        loan = Mortgage()
+        loan.interest_schedule = np.asarray(range(24))
+        loan._calculate_interest_by_year()
+        np.testing.assert_array_equal(loan.interest_by_year, [sum(range(12)), sum(range(12, 24))])
+
+    def test__calculate_principal_by_year(self):
+        loan = Mortgage()
+        loan.principal_schedule = np.asarray(range(24))
+        loan._calculate_principal_by_year()
+        np.testing.assert_array_equal(loan.principal_by_year, [sum(range(12)), sum(range(12, 24))])
+
+    def test_queries_by_year(self):
+        """Queries should be identical to summing the schedules, including before and after the loan"""
+        loan = Mortgage(
+            principal=200e3,
+            tenor=30,
+            rate=6.5 / 100
+        )
+        for year in range(-1, 32):
+            self.assertEqual(loan.balance_after_year(year), sum(loan.principal_schedule[(year + 1) * 12:]))
+            self.assertEqual(loan.remaining_payments_after_year(year), sum(loan.amortization_schedule[(year + 1) * 12:]))
+            self.assertEqual(loan.interest_in_year(year), sum(loan.interest_schedule[year * 12:][:12]))
+            self.assertEqual(loan.principal_in_year(year), sum(loan.principal_schedule[year * 12:][:12]))
+
+        self.assertAlmostEqual(loan.balance_after_year(29), 0, places=6)
@@ -0,0 +1,52 @@
+from japanrealestate.mortgage import Mortgage
+from japanrealestate.mortgagebatch import MortgageBatch
+from unittest import TestCase
+import numpy as np
+
+
+class TestMortgageBatch(TestCase):
+    def test_broadcasting(self):
+        loan_batch = MortgageBatch(
+            principal=np.array([10e6, 20e6]).reshape(2, 1),
+            tenor=np.array([10, 35, 35]),
+            rate=0.01,
+        )
+        self.assertEqual(loan_batch.shape, (2, 3))
+        self.assertEqual(loan_batch.monthly_payment.shape, (2, 3))
+        self.assertEqual(loan_batch.balance_after_year(0).shape, (2, 3))
+
+        # Identical loans are only amortized once
+        self.assertEqual(loan_batch.interest_schedule.shape, (4, 35 * 12))
+        self.assertEqual(loan_batch.loan_index[0, 1], loan_batch.loan_index[0, 2])
+
+    def test__calculate_is_active(self):
+        loan_batch = MortgageBatch(principal=1e6, tenor=np.array([1, 2]), rate=0.01)
+        np.testing.assert_array_equal(loan_batch.is_active.sum(axis=1), [12, 24])
+        np.testing.assert_array_equal(loan_batch.amortization_schedule[0, 12:], [0] * 12)
+
+    def test__calculate_all_fields(self):
+        """Every loan should match a Mortgage created with the same inputs"""
+        principal = np.array([0, 1e6, 24000000, 60e6, 12345678.9])
+        tenor = np.array([0, 1, 2, 30, 35])
+        rate = np.array([0, 0.01, 6.5 / 100])
+        grid = [values.ravel() for values in np.meshgrid(principal, tenor, rate, indexing='ij')]
+
+        loan_batch = MortgageBatch(principal=grid[0], tenor=grid[1], rate=grid[2])
+        for i in range(len(grid[0])):
+            loan = Mortgage(principal=float(grid[0][i]), tenor=int(grid[1][i]), rate=float(grid[2][i]))
+            row = loan_batch.loan_index[i]
+            num_periods = len(loan.loan_periods)
+
+            np.testing.assert_array_equal(loan_batch.interest_schedule[row, :num_periods], loan.interest_schedule)
+            np.testing.assert_array_equal(loan_batch.principal_schedule[row, :num_periods], loan.principal_schedule)
+            np.testing.assert_array_equal(loan_batch.amortization_schedule[row, :num_periods],
+                                          loan.amortization_schedule)
+            self.assertEqual(loan_batch.monthly_payment[i], loan.monthly_payment)
+
+            for year in range(-1, 37):
+                self.assertEqual(loan_batch.balance_after_year(year)[i], loan.balance_after_year(year))
+                self.assertEqual(loan_batch.remaining_payments_after_year(year)[i],
+                                 loan.remaining_payments_after_year(year))
+                if year >= 0:
+                    self.assertEqual(loan_batch.interest_in_year(year)[i], loan.interest_in_year(year))
+                    self.assertEqual(loan_batch.principal_in_year(year)[i], loan.principal_in_year(year))
@@ -0,0 +1,52 @@
+from japanrealestate.mortgage import Mortgage
+from japanrealestate.mortgagecache import MortgageCache
+from unittest import TestCase
+import numpy as np
+
+
+class TestMortgageCache(TestCase):
+    def test_get(self):
+        cache = MortgageCache()
+        loan = cache.get(principal=200e3, tenor=30, rate=6.5 / 100)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+        expected = Mortgage(principal=200e3, tenor=30, rate=6.5 / 100)
+        for field, value in expected.__dict__.items():
+            np.testing.assert_array_equal(getattr(loan, field), value)
+
+        same_loan = cache.get(principal=200e3, tenor=30, rate=6.5 / 100)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertIsNot(same_loan, loan)
+        self.assertIs(same_loan.interest_schedule, loan.interest_schedule)
+
+        cache.get(principal=200e3, tenor=30, rate=0)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        self.assertEqual(len(cache), 2)
+
+    def test_get_read_only(self):
+        cache = MortgageCache()
+        loan = cache.get(principal=200e3, tenor=30, rate=6.5 / 100)
+        with self.assertRaises(ValueError):
+            loan.interest_schedule[0] = 0
+
+        loan.monthly_payment = 0  # Scalar fields can be overridden on the returned copy only
+        self.assertAlmostEqual(cache.get(principal=200e3, tenor=30, rate=6.5 / 100).monthly_payment, 1264.14, places=2)
+
+        zero_rate_loan = cache.get(principal=200e3, tenor=30, rate=0)
+        self.assertEqual(zero_rate_loan.principal_schedule, tuple([200000 / 30 / 12] * 30 * 12))
+
+    def test_eviction(self):
+        cache = MortgageCache(max_size=2)
+        cache.get(principal=100, tenor=1, rate=0.01)
+        cache.get(principal=200, tenor=1, rate=0.01)
+        cache.get(principal=100, tenor=1, rate=0.01)  # 200 is now the least recently used
+        cache.get(principal=300, tenor=1, rate=0.01)
+        self.assertEqual(len(cache), 2)
+
+        cache.get(principal=100, tenor=1, rate=0.01)
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+        cache.get(principal=200, tenor=1, rate=0.01)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
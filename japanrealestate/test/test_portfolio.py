@@ -0,0 +1,113 @@
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.portfolio import Portfolio
+from japanrealestate.projection import Projection
+from japanrealestate.realestatecalc import RealEstateCalc
+from unittest import TestCase
+import datetime as dt
+
+
+class TestPortfolio(TestCase):
+    @staticmethod
+    def _sample_income_tax_calc():
+        return IncomeTaxCalc(
+            employment_income=20000000,
+            rent=2400000,
+            is_rent_program=True,
+            other_income=1000000,
+            life_insurance_premium=30000,
+            medical_expense=10000,
+            number_of_dependents=2,
+            social_security_expense=None,
+            tax_deduction=100000,
+            is_resident_for_tax_purposes=True,
+            current_date=dt.date(year=2016, month=1, day=1)
+        )
+
+    @staticmethod
+    def _sample_real_estate_calc(income_tax_calc, purchase_date=dt.date(2017, 1, 24), monthly_fees=20000,
+                                 is_primary_residence=False, calc_year=0):
+        return RealEstateCalc(
+            purchase_date=purchase_date,
+            purchase_price=100000000,
+            building_to_land_ratio=0.7,
+            size=100,
+            age=10,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=30,
+            mortgage_rate=0.01,
+            agent_fee_variable=0.03,
+            agent_fee_fixed=20000,
+            other_transaction_fees=0.01,
+            monthly_fees=monthly_fees,
+            property_tax_rate=0.01,
+            calc_year=calc_year,
+            income_tax_calculator=income_tax_calc,
+            gross_rental_yield=0.04,
+            is_primary_residence=is_primary_residence,
+            is_resident_for_tax_purposes=True,
+        )
+
+    def test_single_property(self):
+        """A portfolio of one property should have the same taxes as RealEstateCalc, with one evaluation per year"""
+        income_tax_calc = self._sample_income_tax_calc()
+        for is_primary_residence in [False, True]:
+            real_estate_calc = self._sample_real_estate_calc(income_tax_calc,
+                                                             is_primary_residence=is_primary_residence)
+            portfolio = Portfolio(real_estate_calcs=[real_estate_calc],
+                                  income_tax_calculator=income_tax_calc,
+                                  horizon=12)
+            projection = Projection(real_estate_calc=real_estate_calc, horizon=12)
+
+            self.assertEqual(portfolio.tax_year, list(range(2017, 2030)))
+            self.assertEqual(portfolio.income_tax, projection.income_tax)
+            self.assertEqual(portfolio.income_tax_real_estate, projection.income_tax_real_estate)
+            self.assertEqual(portfolio.income_tax_shield, projection.income_tax_shield)
+            self.assertEqual(portfolio.property_income_tax_real_estate[0], projection.income_tax_real_estate)
+            self.assertEqual(portfolio.property_income_tax_shield[0], projection.income_tax_shield)
+            self.assertEqual(portfolio.net_income_after_taxes, projection.net_income_after_taxes)
+            self.assertLessEqual(portfolio.tax_evaluations, 2 * 13)
+
+    def test_pooled_taxes(self):
+        """Losses of one property shield the income of another, and allocations add up to the portfolio totals"""
+        income_tax_calc = self._sample_income_tax_calc()
+        real_estate_calcs = [
+            self._sample_real_estate_calc(income_tax_calc, monthly_fees=0),
+            self._sample_real_estate_calc(income_tax_calc, monthly_fees=200000),
+            self._sample_real_estate_calc(income_tax_calc, purchase_date=dt.date(2019, 6, 1), calc_year=3),
+        ]
+        portfolio = Portfolio(real_estate_calcs=real_estate_calcs, income_tax_calculator=income_tax_calc)
+
+        self.assertEqual(portfolio.horizon, 3)
+        self.assertEqual(portfolio.tax_year, list(range(2017, 2023)))
+        self.assertEqual(portfolio.tax_evaluations, len(portfolio.tax_year))  # No home loan deductions
+
+        for tax_year_index, tax_year in enumerate(portfolio.tax_year):
+            entries = portfolio._tax_year_entries(tax_year)
+            self.assertEqual(sum(portfolio.property_income_tax_change[i][year] for i, year in entries),
+                             portfolio.income_tax_real_estate[tax_year_index]
+                             - portfolio.income_tax_shield[tax_year_index])
+
+        # The first property makes a profit and the second a loss, so the pooled tax change is smaller than the tax of
+        # the first property alone
+        self.assertGreater(real_estate_calcs[0].income_tax_real_estate, 0)
+        self.assertGreater(real_estate_calcs[1].income_tax_shield, 0)
+        self.assertLess(portfolio.income_tax_real_estate[0] - portfolio.income_tax_shield[0],
+                        real_estate_calcs[0].income_tax_real_estate)
+
+        # The third property is only pooled from its purchase year
+        self.assertEqual(len(portfolio._tax_year_entries(2017)), 2)
+        self.assertEqual(len(portfolio._tax_year_entries(2020)), 3)
+        self.assertEqual(len(portfolio._tax_year_entries(2022)), 1)
+
+    def test_no_income_tax_calculator(self):
+        real_estate_calc = self._sample_real_estate_calc(None)
+        portfolio = Portfolio(real_estate_calcs=[real_estate_calc, real_estate_calc], horizon=2)
+        self.assertEqual(portfolio.tax_evaluations, 0)
+        self.assertEqual(portfolio.income_tax_real_estate, [0, 0, 0])
+        self.assertEqual(portfolio.net_income_after_taxes,
+                         [2 * net_income for net_income in portfolio.projections[0].net_income_before_taxes])
+
+    def test__allocate(self):
+        self.assertEqual(Portfolio._allocate(10, [3.4, 3.3, 3.3]), [4, 3, 3])
+        self.assertEqual(Portfolio._allocate(-7, [-7.6]), [-7])
+        self.assertEqual(Portfolio._allocate(0, []), [])
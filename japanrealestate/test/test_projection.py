@@ -0,0 +1,117 @@
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.projection import Projection
+from japanrealestate.realestatecalc import RealEstateCalc
+from unittest import TestCase
+import copy
+import datetime as dt
+import numpy as np
+
+
+class TestProjection(TestCase):
+    @staticmethod
+    def _sample_real_estate_calc(calc_year=0):
+        income_tax_calc = IncomeTaxCalc(
+            employment_income=20000000,
+            rent=2400000,
+            is_rent_program=True,
+            other_income=1000000,
+            life_insurance_premium=30000,
+            medical_expense=10000,
+            number_of_dependents=2,
+            social_security_expense=None,
+            tax_deduction=100000,
+            is_resident_for_tax_purposes=True,
+            current_date=dt.date(year=2016, month=1, day=1)
+        )
+
+        return RealEstateCalc(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=100000000,
+            building_to_land_ratio=0.7,
+            size=100,
+            age=10,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=30,
+            mortgage_rate=0.01,
+            agent_fee_variable=0.03,
+            agent_fee_fixed=20000,
+            other_transaction_fees=0.01,
+            monthly_fees=20000,
+            property_tax_rate=0.01,
+            calc_year=calc_year,
+            income_tax_calculator=income_tax_calc,
+            gross_rental_yield=0.04,
+            is_resident_for_tax_purposes=True,
+        )
+
+    def test__calculate_horizon(self):
+        real_estate_calc = self._sample_real_estate_calc(calc_year=3)
+
+        projection = Projection(real_estate_calc=real_estate_calc)
+        self.assertEqual(projection.horizon, 3)
+        self.assertEqual(projection.calc_year, [0, 1, 2, 3])
+
+        projection = Projection(real_estate_calc=real_estate_calc, horizon=-1)
+        self.assertEqual(projection.calc_year, [])
+        self.assertEqual(projection.net_income_after_taxes, [])
+
+    def test__calculate_fields(self):
+        real_estate_calc = self._sample_real_estate_calc(calc_year=3)
+
+        projection = Projection(real_estate_calc=real_estate_calc)
+        self.assertEqual(projection.fields, Projection._YEARLY_FIELDS)
+
+        projection = Projection(real_estate_calc=real_estate_calc, fields=['cumulative_net_income'])
+        self.assertEqual(projection.fields, ['calc_date', 'depreciation', 'net_income_before_taxes',
+                                             'net_income_taxable', 'home_loan_deduction', 'income_tax',
+                                             'income_tax_real_estate', 'income_tax_shield', 'net_income_after_taxes',
+                                             'cumulative_net_income'])
+        self.assertIsNone(projection.book_value)
+        self.assertEqual(projection.cumulative_net_income, Projection(real_estate_calc).cumulative_net_income)
+
+        projection = Projection(real_estate_calc=real_estate_calc, fields=['book_value'])
+        self.assertEqual(projection.fields, ['depreciation_cumulative', 'depreciated_building_value', 'book_value'])
+        self.assertEqual(projection.book_value, Projection(real_estate_calc).book_value)
+        self.assertEqual(sorted(projection.to_arrays().keys()), sorted(['calc_year'] + projection.fields))
+
+    def test__calculate_yearly_fields(self):
+        """Every year of the projection should match the calculator re-calculated for that year"""
+        real_estate_calc = self._sample_real_estate_calc()
+        real_estate_calc_before = copy.deepcopy(real_estate_calc)
+
+        projection = Projection(real_estate_calc=real_estate_calc, horizon=35)
+
+        # Confirm calculator is unmodified
+        self.assertEqual(real_estate_calc.calc_year, real_estate_calc_before.calc_year)
+        self.assertEqual(real_estate_calc.net_income_after_taxes, real_estate_calc_before.net_income_after_taxes)
+
+        for year in [0, 1, 9, 10, 29, 30, 35]:
+            year_calc = self._sample_real_estate_calc(calc_year=year)
+            for field in Projection._YEARLY_FIELDS:
+                self.assertEqual(getattr(projection, Projection._attribute_name(field))[year],
+                                 getattr(year_calc, field),
+                                 "{} does not match for year {}".format(field, year))
+
+        # Fixed sale price
+        projection = Projection(real_estate_calc=real_estate_calc, horizon=5, sale_price=120000000)
+        self.assertEqual(projection.sale_prices, [120000000] * 6)
+        year_calc = self._sample_real_estate_calc(calc_year=5)
+        year_calc.sale_price = 120000000
+        year_calc.calculate_all_fields()
+        self.assertEqual(projection.capital_gains_tax[5], year_calc.capital_gains_tax)
+        self.assertEqual(projection.net_profit_on_realestate[5], year_calc.net_profit_on_realestate)
+
+    def test_to_arrays(self):
+        real_estate_calc = self._sample_real_estate_calc()
+        projection = Projection(real_estate_calc=real_estate_calc, horizon=9)
+
+        arrays = projection.to_arrays()
+        self.assertEqual(sorted(arrays.keys()), sorted(['calc_year'] + Projection._YEARLY_FIELDS))
+        for field, values in arrays.items():
+            self.assertEqual(values.shape, (10,))
+
+        np.testing.assert_array_equal(arrays['calc_year'], np.arange(10))
+        np.testing.assert_array_equal(arrays['net_income_after_taxes'], projection.net_income_after_taxes)
+        np.testing.assert_array_equal(arrays['sale_price'], projection.sale_prices)
+        self.assertEqual(arrays['calc_date'].dtype, np.dtype('datetime64[D]'))
+        self.assertEqual(arrays['calc_date'][1], np.datetime64('2018-01-24'))
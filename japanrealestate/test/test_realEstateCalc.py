@@ -304,6 +304,7 @@ class TestRealEstateCalc(TestCase):
 
         real_estate_calc.depreciation_years = 10
         real_estate_calc.depreciation_annual = 1000000
+        real_estate_calc._calculate_depreciation_schedule()
         self.assertEquals(real_estate_calc.depreciation_for_year(9), 1000000)
         self.assertEquals(real_estate_calc.depreciation_for_year(10), 0)
 
@@ -312,6 +313,7 @@ class TestRealEstateCalc(TestCase):
 
         real_estate_calc.depreciation_years = 10
         real_estate_calc.depreciation_annual = 1000000
+        real_estate_calc._calculate_depreciation_schedule()
         real_estate_calc.calc_year = 9
         real_estate_calc._calculate_depreciation()
         self.assertEquals(real_estate_calc.depreciation, 1000000)
@@ -543,6 +545,65 @@ class TestRealEstateCalc(TestCase):
         real_estate_calc._calculate_cumulative_net_income()
         self.assertEquals(real_estate_calc.cumulative_net_income, year_0_income + year_1_income * 3)
 
+    def test_project(self):
+        real_estate_calc = RealEstateCalc(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=10000000,
+            gross_rental_yield=0.05,
+            calc_year=2,
+            mortgage_loan_to_value=1,
+            mortgage_rate=0.01,
+            mortgage_tenor=1,
+            renewal_income_rate=0,
+            rental_management_renewal_fee=0,
+            rental_management_rental_fee=0,
+        )
+        real_estate_calc_before = copy.deepcopy(real_estate_calc)
+
+        projected = real_estate_calc.project(horizon=5)
+        self.assertEqual(len(projected['net_income_after_taxes']), 6)
+        self.assertEqual(projected['net_income_after_taxes'][2], real_estate_calc.net_income_after_taxes)
+        self.assertEqual(projected['cumulative_net_income'][2], real_estate_calc.cumulative_net_income)
+        self.assertEqual(projected['book_value'][2], real_estate_calc.book_value)
+        self.assertEqual(projected['net_profit_on_realestate'][2], real_estate_calc.net_profit_on_realestate)
+        self.assertEqual(projected['mortgage_amount_outstanding'][0], 0)
+
+        # Confirm calculator is unmodified
+        self.assertEqual(real_estate_calc.calc_year, real_estate_calc_before.calc_year)
+        self.assertEqual(real_estate_calc.sale_price, real_estate_calc_before.sale_price)
+
+        # Horizon defaults to calc_year
+        self.assertEqual(len(real_estate_calc.project()['calc_year']), 3)
+
+    def test_cash_flows(self):
+        real_estate_calc = RealEstateCalc(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=10000000,
+            gross_rental_yield=0.05,
+            calc_year=2,
+            mortgage_loan_to_value=0.5,
+            mortgage_rate=0.01,
+            mortgage_tenor=10,
+            sale_price=11000000,
+        )
+        projected = real_estate_calc.project()
+
+        cash_flows = real_estate_calc.cash_flows()
+        self.assertEqual(len(cash_flows), 4)
+        self.assertEqual(cash_flows[0], -real_estate_calc.purchase_initial_outlay)
+        self.assertEqual(cash_flows[1:3], list(projected['net_income_after_taxes'][:2]))
+        self.assertEqual(cash_flows[3], real_estate_calc.net_income_after_taxes + real_estate_calc.sale_proceeds_net -
+                         real_estate_calc.mortgage_amount_outstanding)
+        self.assertEqual(sum(cash_flows), real_estate_calc.net_profit_on_realestate)
+
+        self.assertEqual(real_estate_calc.npv(0), real_estate_calc.net_profit_on_realestate)
+        self.assertAlmostEqual(real_estate_calc.npv(real_estate_calc.irr()), 0, places=4)
+        self.assertAlmostEqual(real_estate_calc.equity_multiple(),
+                               1 + real_estate_calc.net_profit_on_realestate / real_estate_calc.purchase_initial_outlay)
+
+        real_estate_calc.update(calc_year=0)
+        self.assertEqual(len(real_estate_calc.cash_flows()), 2)
+
     def test__calculate_mortgage_amount_outstanding(self):
         real_estate_calc = RealEstateCalc()
 
@@ -585,6 +646,7 @@ class TestRealEstateCalc(TestCase):
 
         real_estate_calc.depreciation_annual = 1000000
         real_estate_calc.depreciation_years = 10
+        real_estate_calc._calculate_depreciation_schedule()
 
         # First year
         real_estate_calc.calc_year = 0
@@ -771,6 +833,162 @@ class TestRealEstateCalc(TestCase):
         real_estate_calc._calculate_net_profit_on_realestate()
         self.assertEquals(real_estate_calc.net_profit_on_realestate, 3000000)
 
+    def test_calculate_fields(self):
+        inputs = dict(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=100000000,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=30,
+            mortgage_rate=0.01,
+            calc_year=5,
+            income_tax_calculator=IncomeTaxCalc(employment_income=20000000, current_date=dt.date(2016, 1, 1)),
+            gross_rental_yield=0.04,
+        )
+        expected = RealEstateCalc(**inputs)
+
+        real_estate_calc = RealEstateCalc(outputs=['net_income_after_taxes'], **inputs)
+        self.assertEqual(real_estate_calc.net_income_after_taxes, expected.net_income_after_taxes)
+        self.assertEqual(real_estate_calc.income_tax, expected.income_tax)
+        self.assertIsNone(real_estate_calc.cumulative_net_income)
+        self.assertIsNone(real_estate_calc.sale_proceeds_net)
+        self.assertIsNone(real_estate_calc.purchase_agent_fee)
+
+        real_estate_calc.calculate_fields('net_profit_on_realestate')
+        self.assertEqual(real_estate_calc.net_profit_on_realestate, expected.net_profit_on_realestate)
+
+    def test_recalculate(self):
+        """Recalculating after changing any input should give the same result as a new calculator with that input"""
+        inputs = dict(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=100000000,
+            size=100,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=30,
+            mortgage_rate=0.01,
+            agent_fee_variable=0.03,
+            other_transaction_fees=0.01,
+            monthly_fees=20000,
+            property_tax_rate=0.01,
+            calc_year=5,
+            income_tax_calculator=IncomeTaxCalc(employment_income=20000000, current_date=dt.date(2016, 1, 1)),
+            gross_rental_yield=0.04,
+        )
+        real_estate_calc = RealEstateCalc(**inputs)
+
+        changes = [
+            ('purchase_date', dt.date(2020, 1, 1)), ('purchase_price', 80000000), ('building_to_land_ratio', 0.5),
+            ('size', 40), ('age', 20), ('mortgage_loan_to_value', 0.5), ('bank_valuation_to_actual', 0.9),
+            ('mortgage_tenor', 10), ('mortgage_rate', 0.02), ('mortgage_initiation_fees', 100000),
+            ('renovation_cost', 5000000), ('agent_fee_variable', 0.02), ('agent_fee_fixed', 60000),
+            ('other_transaction_fees', 0.02), ('monthly_fees', 30000), ('property_tax_rate', 0.02),
+            ('maintenance_per_m2', 2000), ('useful_life', 22), ('calc_year', 2),
+            ('income_tax_calculator', IncomeTaxCalc(employment_income=5000000, current_date=dt.date(2016, 1, 1))),
+            ('income_tax_calculator', None), ('gross_rental_yield', 0.06), ('renewal_income_rate', 0),
+            ('rental_management_rental_fee', 0.1), ('rental_management_renewal_fee', 0.1),
+            ('is_primary_residence', 1), ('is_resident_for_tax_purposes', False), ('sale_price', 90000000),
+            ('mortgage_loan_to_value', 0), ('bank_valuation_to_actual', 0),
+        ]
+
+        for field, value in changes:
+            expected = RealEstateCalc(**dict(inputs, **{field: value}))
+
+            actual = copy.copy(real_estate_calc)
+            actual.update(**{field: value})
+
+            for key, expected_value in expected.__dict__.items():
+                if key == 'mortgage' and expected_value is not None:
+                    expected_value = (expected_value.principal, expected_value.tenor, expected_value.rate)
+                    actual_value = (actual.mortgage.principal, actual.mortgage.tenor, actual.mortgage.rate)
+                else:
+                    actual_value = getattr(actual, key)
+                self.assertEqual(actual_value, expected_value, "{} does not match after changing {}".format(key, field))
+
+        # Turning the financing off entirely removes the mortgage
+        actual = copy.copy(real_estate_calc)
+        actual.update(mortgage_loan_to_value=0, bank_valuation_to_actual=0)
+        expected = RealEstateCalc(**dict(inputs, mortgage_loan_to_value=0, bank_valuation_to_actual=0))
+        self.assertIsNone(actual.mortgage)
+        self.assertEqual(actual.purchase_price_financed, 0)
+        self.assertEqual(actual.mortgage_amount_outstanding, 0)
+        self.assertEqual(actual.__dict__, expected.__dict__)
+
+        # Only the fields downstream of the change are recalculated
+        real_estate_calc.update(monthly_fees=30000)
+        recalculated_fields = RealEstateCalc._DEPENDENCY_GRAPH.downstream(['monthly_fees'])
+        self.assertIn('total_expense', recalculated_fields)
+        self.assertIn('net_income_after_taxes', recalculated_fields)
+        self.assertNotIn('mortgage', recalculated_fields)
+        self.assertNotIn('depreciation_annual', recalculated_fields)
+        self.assertNotIn('purchase_agent_fee', recalculated_fields)
+
+        # Every _calculate_* method is part of the dependency graph
+        calculate_methods = [name for name in dir(RealEstateCalc) if name.startswith('_calculate_')]
+        self.assertEqual(sorted('_calculate_' + field for field in RealEstateCalc._DEPENDENCY_GRAPH.fields),
+                         sorted(calculate_methods))
+
+    def test_fork(self):
+        """Forks should match a calculator created with the overridden inputs, and share all unaffected fields"""
+        inputs = dict(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=100000000,
+            size=100,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=30,
+            mortgage_rate=0.01,
+            monthly_fees=20000,
+            property_tax_rate=0.01,
+            calc_year=5,
+            income_tax_calculator=IncomeTaxCalc(employment_income=20000000, current_date=dt.date(2016, 1, 1)),
+            gross_rental_yield=0.04,
+        )
+        real_estate_calc = RealEstateCalc(**inputs)
+        original_fields = dict(real_estate_calc.__dict__)
+
+        forked_calcs = [real_estate_calc.fork(monthly_fees=monthly_fees, gross_rental_yield=0.05)
+                        for monthly_fees in range(10000, 30000, 20)]
+        self.assertEqual(real_estate_calc.__dict__, original_fields)
+
+        for forked_calc in forked_calcs[::100]:
+            expected = RealEstateCalc(**dict(inputs, monthly_fees=forked_calc.monthly_fees, gross_rental_yield=0.05))
+            for key, expected_value in expected.__dict__.items():
+                if key != 'mortgage':
+                    self.assertEqual(getattr(forked_calc, key), expected_value, key)
+
+            # Fields not depending on the overrides are the same objects as those of the parent
+            for key in ('mortgage', 'income_tax_calculator', 'depreciation_schedule', 'purchase_date'):
+                self.assertIs(getattr(forked_calc, key), getattr(real_estate_calc, key))
+
+        # Overriding the owner, by forking the income tax calculator
+        forked_calc = real_estate_calc.fork(
+            income_tax_calculator=real_estate_calc.income_tax_calculator.fork(employment_income=5000000))
+        self.assertEqual(forked_calc.income_tax,
+                         RealEstateCalc(**dict(inputs, income_tax_calculator=IncomeTaxCalc(
+                             employment_income=5000000, current_date=dt.date(2016, 1, 1)))).income_tax)
+        self.assertEqual(real_estate_calc.income_tax_calculator.employment_income, 20000000)
+
+        # Overrides which change the defaulted sale price (the book value at calc_year) and the disposal fields
+        for overrides in [dict(calc_year=10), dict(purchase_price=50000000), dict(age=20), dict(useful_life=22)]:
+            forked_calc = real_estate_calc.fork(**overrides)
+            expected = RealEstateCalc(**dict(inputs, **overrides))
+            for key in ('sale_price', 'sale_agent_fee', 'capital_gains_tax', 'sale_proceeds_net',
+                        'net_profit_on_realestate'):
+                self.assertEqual(getattr(forked_calc, key), getattr(expected, key),
+                                 "{} does not match after {}".format(key, overrides))
+        self.assertEqual(real_estate_calc.__dict__, original_fields)
+
+        # Overrides which turn the financing off, so that the fork has no mortgage
+        for overrides in [dict(mortgage_loan_to_value=0), dict(bank_valuation_to_actual=0)]:
+            forked_calc = real_estate_calc.fork(**overrides)
+            expected = RealEstateCalc(**dict(inputs, **overrides))
+            self.assertIsNone(forked_calc.mortgage)
+            for key, expected_value in expected.__dict__.items():
+                self.assertEqual(getattr(forked_calc, key), expected_value,
+                                 "{} does not match after {}".format(key, overrides))
+        self.assertIsNotNone(real_estate_calc.mortgage)
+
+        with self.assertRaises(ValueError):
+            real_estate_calc.fork(not_a_field=0)
+
     def test__calculate_all_fields(self):
         """
         A regression test to confirm that all required functions are called as part of calculate_all_fields.
@@ -829,6 +1047,7 @@ class TestRealEstateCalc(TestCase):
         )
 
         expected = {
+            '_defaulted_inputs': {},
             'acquisition_cost': 104261600,
             'age': 0,
             'agent_fee_fixed': 20000,
@@ -863,6 +1082,7 @@ class TestRealEstateCalc(TestCase):
             'monthly_fees': 20000,
             'monthly_fees_annualized': 240000,
             'mortgage': real_estate_calc.mortgage,
+            'depreciation_schedule': real_estate_calc.depreciation_schedule,
             'mortgage_amount_outstanding': 0,
             'mortgage_initiation_fees': 10000,
             'mortgage_loan_to_value': 0.9,
@@ -0,0 +1,145 @@
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.realestatecalc import RealEstateCalc
+from japanrealestate.realestatecalcbatch import RealEstateCalcBatch
+from unittest import TestCase
+import datetime as dt
+import numpy as np
+
+
+class TestRealEstateCalcBatch(TestCase):
+    @staticmethod
+    def _sample_income_tax_calc():
+        return IncomeTaxCalc(
+            employment_income=20000000,
+            rent=2400000,
+            is_rent_program=True,
+            other_income=1000000,
+            life_insurance_premium=30000,
+            medical_expense=10000,
+            number_of_dependents=2,
+            social_security_expense=None,
+            tax_deduction=100000,
+            is_resident_for_tax_purposes=True,
+            current_date=dt.date(year=2016, month=1, day=1)
+        )
+
+    def test_broadcasting(self):
+        real_estate_calc_batch = RealEstateCalcBatch(
+            purchase_price=np.array([50000000, 100000000]).reshape(2, 1),
+            gross_rental_yield=np.array([0.03, 0.04, 0.05]),
+            size=50,
+        )
+        self.assertEqual(real_estate_calc_batch.shape, (2, 3))
+        self.assertEqual(real_estate_calc_batch.net_profit_on_realestate.shape, (2, 3))
+        self.assertEqual(real_estate_calc_batch.maintenance_expense.shape, (2, 3))
+        np.testing.assert_array_equal(real_estate_calc_batch.rental_income,
+                                      [[1500000, 2000000, 2500000], [3000000, 4000000, 5000000]])
+
+    def test__calculate_sale_price(self):
+        real_estate_calc_batch = RealEstateCalcBatch(
+            purchase_price=100000000,
+            calc_year=np.array([0, 10]),
+            sale_price=np.array([np.nan, 80000000]),
+        )
+        self.assertEqual(real_estate_calc_batch.sale_price[0], real_estate_calc_batch.book_value[0])
+        self.assertEqual(real_estate_calc_batch.sale_price[1], 80000000)
+
+    def test__calculate_capital_gains_tax_primary_residence_deduction(self):
+        self.assertRaises(ValueError, RealEstateCalcBatch, is_primary_residence=np.array([0, 3]))
+
+    def test__calculate_all_fields(self):
+        """Every element of the batch should match a RealEstateCalc created with the same inputs"""
+        purchase_price = np.array([30000000, 68000000, 100000000])
+        mortgage_rate = np.array([0, 0.01, 0.025])
+        mortgage_loan_to_value = np.array([0, 0.9])
+        mortgage_tenor = np.array([1, 35])
+        calc_year = np.array([0, 4, 5, 12, 36])
+        is_primary_residence = np.array([0, 1])
+
+        grid = np.meshgrid(purchase_price, mortgage_rate, mortgage_loan_to_value, mortgage_tenor, calc_year,
+                           is_primary_residence, indexing='ij')
+        grid = [values.ravel() for values in grid]
+
+        for income_tax_calc in [None, self._sample_income_tax_calc()]:
+            common_inputs = dict(
+                purchase_date=dt.date(2017, 1, 24),
+                building_to_land_ratio=0.3,
+                size=62.06,
+                age=18,
+                agent_fee_variable=0.03,
+                agent_fee_fixed=60000,
+                renovation_cost=6000000,
+                other_transaction_fees=0.010735294,
+                monthly_fees=44810,
+                property_tax_rate=0.00263,
+                income_tax_calculator=income_tax_calc,
+                gross_rental_yield=0.0467,
+                is_resident_for_tax_purposes=True,
+            )
+
+            real_estate_calc_batch = RealEstateCalcBatch(
+                purchase_price=grid[0],
+                mortgage_rate=grid[1],
+                mortgage_loan_to_value=grid[2],
+                mortgage_tenor=grid[3],
+                calc_year=grid[4],
+                is_primary_residence=grid[5],
+                **common_inputs
+            )
+
+            for i in range(len(grid[0])):
+                real_estate_calc = RealEstateCalc(
+                    purchase_price=int(grid[0][i]),
+                    mortgage_rate=float(grid[1][i]),
+                    mortgage_loan_to_value=float(grid[2][i]),
+                    mortgage_tenor=int(grid[3][i]),
+                    calc_year=int(grid[4][i]),
+                    is_primary_residence=int(grid[5][i]),
+                    **common_inputs
+                )
+
+                for field, expected in real_estate_calc.__dict__.items():
+                    if field in ['mortgage', 'depreciation_schedule', 'income_tax_calculator', 'purchase_date',
+                                 '_defaulted_inputs']:
+                        continue
+
+                    actual = getattr(real_estate_calc_batch, field)
+                    actual = actual[i] if np.ndim(actual) else actual
+                    if field == 'calc_date':
+                        actual = actual.item()
+                    self.assertEqual(actual, expected, "{} does not match for scenario {}".format(field, i))
+
+    def test_cash_flows(self):
+        """Cash flows of every scenario should match RealEstateCalc, padded with zeros after the sale"""
+        calc_year = np.array([0, 3, 7])
+        mortgage_rate = np.array([0.01, 0.03])
+        common_inputs = dict(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=68000000,
+            size=62.06,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=35,
+            monthly_fees=44810,
+            income_tax_calculator=self._sample_income_tax_calc(),
+            gross_rental_yield=0.0467,
+        )
+
+        real_estate_calc_batch = RealEstateCalcBatch(calc_year=calc_year.reshape(3, 1),
+                                                     mortgage_rate=mortgage_rate,
+                                                     **common_inputs)
+        cash_flows = real_estate_calc_batch.cash_flows()
+        self.assertEqual(cash_flows.shape, (3, 2, 9))
+        irr = real_estate_calc_batch.irr()
+        npv = real_estate_calc_batch.npv(0.02)
+        equity_multiple = real_estate_calc_batch.equity_multiple()
+
+        for i in range(3):
+            for j in range(2):
+                real_estate_calc = RealEstateCalc(calc_year=int(calc_year[i]),
+                                                  mortgage_rate=float(mortgage_rate[j]),
+                                                  **common_inputs)
+                expected = real_estate_calc.cash_flows()
+                self.assertEqual(list(cash_flows[i, j]), expected + [0] * (9 - len(expected)))
+                self.assertAlmostEqual(irr[i, j], real_estate_calc.irr())
+                self.assertAlmostEqual(npv[i, j], real_estate_calc.npv(0.02), places=4)
+                self.assertAlmostEqual(equity_multiple[i, j], real_estate_calc.equity_multiple())
@@ -0,0 +1,140 @@
+from japanrealestate import resultcache
+from japanrealestate import taxconstants
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.resultcache import ResultCache, SQLiteResultCache, fingerprint, version_stamp
+from japanrealestate.sweeprunner import SweepRunner, run_scenario
+from unittest import TestCase, mock
+import datetime as dt
+import os
+import tempfile
+
+
+class TestResultCache(TestCase):
+    @staticmethod
+    def _sample_scenario(monthly_fees=20000):
+        return {
+            'income_tax_calc_params': {
+                'employment_income': 20000000,
+                'current_date': '2016-01-01',
+            },
+            'real_estate_calc_params': {
+                'purchase_date': '2017-01-24',
+                'purchase_price': 100000000,
+                'mortgage_loan_to_value': 0.9,
+                'mortgage_tenor': 30,
+                'mortgage_rate': 0.01,
+                'monthly_fees': monthly_fees,
+                'calc_year': 5,
+                'gross_rental_yield': 0.04,
+            },
+        }
+
+    def test_fingerprint(self):
+        scenario = self._sample_scenario()
+        key = fingerprint(scenario)
+        self.assertEqual(fingerprint(self._sample_scenario()), key)
+
+        # Inputs given with their default value, and dates given as dates, are the same scenario
+        same_scenario = self._sample_scenario()
+        same_scenario['income_tax_calc_params'].update(rent=0, current_date=dt.date(2016, 1, 1))
+        same_scenario['real_estate_calc_params'].update(renovation_cost=0)
+        self.assertEqual(fingerprint(same_scenario), key)
+
+        self.assertNotEqual(fingerprint(self._sample_scenario(monthly_fees=30000)), key)
+        self.assertNotEqual(fingerprint(scenario, outputs=['net_income_after_taxes']), key)
+        self.assertNotEqual(fingerprint(scenario, version='other'), key)
+
+    def test_version_stamp(self):
+        version = version_stamp()
+        self.assertEqual(version_stamp(), version)
+
+        with mock.patch.object(taxconstants, 'RESTORATION_TAX', 0.03):
+            self.assertNotEqual(version_stamp(), version)
+        table = [dict(rule, rate=rule['rate'] + 0.01) for rule in IncomeTaxCalc._NATIONAL_INCOME_TAX_TABLE]
+        with mock.patch.object(IncomeTaxCalc, '_NATIONAL_INCOME_TAX_TABLE', table):
+            self.assertNotEqual(version_stamp(), version)
+        with mock.patch.object(resultcache, 'RESULTS_VERSION', resultcache.RESULTS_VERSION + 1):
+            self.assertNotEqual(version_stamp(), version)
+
+    def test_get_many(self):
+        with SQLiteResultCache() as cache:
+            keys = [cache.fingerprint(self._sample_scenario(monthly_fees)) for monthly_fees in (10000, 20000, 30000)]
+            self.assertEqual(cache.get_many(keys), [None, None, None])
+
+            cache.put_many([(keys[0], {'value': 1}), (keys[2], {'value': 3})])
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.get_many(keys), [{'value': 1}, None, {'value': 3}])
+            self.assertEqual(cache.get(keys[2]), {'value': 3})
+            self.assertEqual((cache.hits, cache.misses), (3, 4))
+
+            cache.put(keys[1], {'value': 2})
+            self.assertEqual(cache.get(keys[1]), {'value': 2})
+
+            cache.clear()
+            self.assertEqual(len(cache), 0)
+            self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def test_eviction(self):
+        """The least recently used results are evicted first"""
+        with SQLiteResultCache(max_size=2) as cache:
+            cache.put('a', 1)
+            cache.put('b', 2)
+            cache.get('a')
+            cache.put('c', 3)
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.get_many(['a', 'b', 'c']), [1, None, 3])
+
+    def test_len(self):
+        """The number of results is kept up to date when results are added, replaced and evicted"""
+        with SQLiteResultCache(max_size=3) as cache:
+            cache.put_many([('a', 1), ('b', 2), ('a', 3)])
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.get('a'), 3)
+
+            cache.put_many([('b', 4), ('c', 5), ('d', 6), ('e', 7)])
+            self.assertEqual(len(cache), 3)
+            self.assertEqual(len(cache), cache._connection.execute('SELECT COUNT(*) FROM results').fetchone()[0])
+
+    def test_abstract(self):
+        """Caches which do not implement the whole interface cannot be created"""
+        class IncompleteCache(ResultCache):
+            def get_many(self, keys):
+                return [None] * len(keys)
+
+        with self.assertRaises(TypeError):
+            IncompleteCache()
+
+    def test_persistence(self):
+        """Results are kept when the database is reopened, unless the version stamp changed"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.sqlite')
+            with SQLiteResultCache(path) as cache:
+                key = cache.fingerprint(self._sample_scenario())
+                cache.put(key, {'value': 1})
+
+            with SQLiteResultCache(path) as cache:
+                self.assertEqual(len(cache), 1)
+                self.assertEqual(cache.get(key), {'value': 1})
+
+            with mock.patch.object(resultcache, 'RESULTS_VERSION', resultcache.RESULTS_VERSION + 1):
+                with SQLiteResultCache(path) as cache:
+                    self.assertEqual(len(cache), 0)
+                    self.assertIsNone(cache.get(cache.fingerprint(self._sample_scenario())))
+
+    def test_sweep_runner(self):
+        scenarios = [self._sample_scenario(monthly_fees) for monthly_fees in (10000, 20000, 30000, 20000)]
+        outputs = ['net_income_after_taxes', 'net_profit_on_realestate']
+        expected = [run_scenario(scenario, outputs) for scenario in scenarios]
+
+        with SQLiteResultCache() as cache, SweepRunner(max_workers=2, chunk_size=2, outputs=outputs,
+                                                       cache=cache) as runner:
+            cache.put(cache.fingerprint(scenarios[0], outputs), expected[0])
+
+            results = [result for _, result in runner.run(scenarios)]
+            self.assertEqual(results, expected)
+            self.assertEqual(len(cache), 3)
+
+            # Every scenario is now found in the cache
+            results = [result for _, result in runner.run(scenarios)]
+            self.assertEqual(results, expected)
+            self.assertEqual(cache.misses, 3)
@@ -0,0 +1,81 @@
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.realestatecalcbatch import RealEstateCalcBatch
+from japanrealestate.resultcube import ResultCube, open_result_cube
+from unittest import TestCase
+import datetime as dt
+import json
+import os
+import tempfile
+import numpy as np
+
+
+class TestResultCube(TestCase):
+    @staticmethod
+    def _sample_inputs():
+        return dict(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=np.array([50000000, 80000000, 100000000, 120000000, 150000000]),
+            gross_rental_yield=np.array([0.03, 0.04, 0.05, 0.06, 0.07]),
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=30,
+            mortgage_rate=0.01,
+            income_tax_calculator=IncomeTaxCalc(employment_income=20000000, current_date=dt.date(2016, 1, 1)),
+        )
+
+    def test_fill(self):
+        fields = ['net_income_after_taxes', 'cumulative_net_income', 'net_profit_on_realestate']
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cube')
+            cube = ResultCube(path, inputs=self._sample_inputs(), num_years=6, fields=fields, chunk_size=2)
+            self.assertEqual(cube.num_chunks, 3)
+            self.assertEqual(cube.fill(), 3)
+            self.assertTrue(cube.is_complete())
+
+            values = open_result_cube(path)
+            self.assertEqual(list(values), fields)
+            self.assertFalse(values['net_income_after_taxes'].flags.writeable)
+            for year in range(6):
+                expected = RealEstateCalcBatch(calc_year=year, **self._sample_inputs())
+                for field in fields:
+                    np.testing.assert_array_equal(values[field][:, year], getattr(expected, field))
+
+    def test_resume(self):
+        """An interrupted fill is resumed by creating the cube again with the same inputs"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cube')
+            cube = ResultCube(path, inputs=self._sample_inputs(), num_years=4, chunk_size=2)
+            self.assertEqual(cube.fill(max_chunks=2), 2)
+            self.assertFalse(cube.is_complete())
+            with open(os.path.join(path, 'manifest.json')) as file:
+                self.assertEqual(json.load(file)['completed_chunks'], [0, 1])
+            del cube
+
+            cube = ResultCube(path, inputs=self._sample_inputs(), num_years=4, chunk_size=2)
+            self.assertEqual(cube.fill(), 1)
+            self.assertTrue(cube.is_complete())
+            self.assertEqual(cube.fill(), 0)
+
+            expected_path = os.path.join(directory, 'expected')
+            ResultCube(expected_path, inputs=self._sample_inputs(), num_years=4, chunk_size=5).fill()
+            expected = open_result_cube(expected_path)
+            for field, values in open_result_cube(path).items():
+                np.testing.assert_array_equal(values, expected[field])
+
+    def test_different_inputs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cube')
+            ResultCube(path, inputs=self._sample_inputs(), num_years=4, chunk_size=2).fill(max_chunks=1)
+
+            inputs = self._sample_inputs()
+            inputs['mortgage_rate'] = 0.02
+            with self.assertRaises(ValueError):
+                ResultCube(path, inputs=inputs, num_years=4, chunk_size=2)
+            with self.assertRaises(ValueError):
+                ResultCube(path, inputs=self._sample_inputs(), num_years=5, chunk_size=2)
+
+    def test_inputs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(ValueError):
+                ResultCube(os.path.join(directory, 'cube'), inputs=dict(purchase_price=[1, 2], size=[1, 2, 3]))
+            with self.assertRaises(ValueError):
+                ResultCube(os.path.join(directory, 'cube'), inputs=dict(purchase_price=[1, 2], calc_year=3))
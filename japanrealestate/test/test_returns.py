@@ -0,0 +1,39 @@
+from japanrealestate import returns
+from unittest import TestCase
+import numpy as np
+
+
+class TestReturns(TestCase):
+    def test_npv(self):
+        self.assertAlmostEqual(returns.npv(0.1, [-100, 110]), 0)
+        self.assertAlmostEqual(returns.npv(0, [-100, 50, 60]), 10)
+        np.testing.assert_allclose(returns.npv([0, 0.1], [[-100, 110], [-100, 110]]), [10, 0], atol=1e-12)
+
+        # Padding with zeros does not change the NPV
+        self.assertAlmostEqual(returns.npv(0.05, [-100, 30, 80, 0, 0]), returns.npv(0.05, [-100, 30, 80]))
+
+    def test_equity_multiple(self):
+        np.testing.assert_array_equal(returns.equity_multiple([[-100, 10, 120], [-100, 0, 0], [0, 10, 10]]),
+                                      [1.3, 0, np.nan])
+
+    def test_irr(self):
+        cash_flows = np.array([
+            [-100, 10, 10, 110] + [0] * 32,
+            [-100, 50, 60] + [0] * 33,
+            [-1e7] + [3e5] * 34 + [8e6],
+            [-100, 0, 0, 1e5] + [0] * 32,  # Very high rate
+            [-100, 0, 0, 1] + [0] * 32,  # Very low rate
+            [100, 10, 10, 10] + [0] * 32,  # No negative cash flow
+        ])
+        irr = returns.irr(cash_flows)
+        self.assertAlmostEqual(irr[0], 0.1)
+        self.assertTrue(np.isnan(irr[-1]))
+        np.testing.assert_allclose(returns.npv(irr[:-1], cash_flows[:-1]), 0, atol=1e-6)
+
+        # No cash flows at all (e.g. with a purchase price of 0)
+        self.assertTrue(np.isnan(returns.irr([0, 0])))
+        np.testing.assert_array_equal(np.isnan(returns.irr([[0, 0, 0], [-100, 0, 110]])), [True, False])
+
+        # Scenarios can have any shape
+        self.assertEqual(returns.irr(cash_flows.reshape(2, 3, 36)).shape, (2, 3))
+        self.assertAlmostEqual(float(returns.irr(cash_flows[0])), 0.1)
@@ -0,0 +1,74 @@
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.realestatecalc import RealEstateCalc
+from japanrealestate.sensitivity import Sensitivity
+from unittest import TestCase
+import datetime as dt
+import numpy as np
+
+
+class TestSensitivity(TestCase):
+    @staticmethod
+    def _sample_inputs():
+        return dict(
+            purchase_date=dt.date(2017, 1, 24),
+            purchase_price=68000000,
+            building_to_land_ratio=0.3,
+            size=62.06,
+            age=18,
+            mortgage_loan_to_value=0.9,
+            mortgage_tenor=35,
+            mortgage_rate=0.01,
+            agent_fee_variable=0.03,
+            agent_fee_fixed=60000,
+            other_transaction_fees=0.01,
+            monthly_fees=44810,
+            property_tax_rate=0.00263,
+            calc_year=10,
+            income_tax_calculator=IncomeTaxCalc(employment_income=20000000, current_date=dt.date(2016, 1, 1)),
+            gross_rental_yield=0.0467,
+            is_resident_for_tax_purposes=True,
+            sale_price=70000000,
+        )
+
+    def test__calculate_all_fields(self):
+        """Low and high outputs should match RealEstateCalc with the bumped input"""
+        inputs = self._sample_inputs()
+        sensitivity = Sensitivity(inputs=inputs, outputs=['net_profit_on_realestate', 'irr', 'net_income_after_taxes'])
+        self.assertEqual(sensitivity.parameters[:3], ['purchase_price', 'building_to_land_ratio', 'size'])
+        self.assertNotIn('renewal_income_rate', sensitivity.parameters)  # Not given
+
+        base = RealEstateCalc(**inputs)
+        self.assertEqual(sensitivity.base['net_profit_on_realestate'], base.net_profit_on_realestate)
+        self.assertAlmostEqual(sensitivity.base['irr'], base.irr())
+
+        for i, parameter in enumerate(sensitivity.parameters):
+            bump = inputs[parameter] * 0.01
+            low = RealEstateCalc(**dict(inputs, **{parameter: inputs[parameter] - bump}))
+            high = RealEstateCalc(**dict(inputs, **{parameter: inputs[parameter] + bump}))
+            self.assertEqual(sensitivity.low['net_income_after_taxes'][i], low.net_income_after_taxes, parameter)
+            self.assertEqual(sensitivity.high['net_profit_on_realestate'][i], high.net_profit_on_realestate, parameter)
+            self.assertAlmostEqual(sensitivity.high['irr'][i], high.irr(), msg=parameter)
+
+            derivative = (high.net_profit_on_realestate - low.net_profit_on_realestate) / (2 * bump)
+            self.assertAlmostEqual(sensitivity.derivative['net_profit_on_realestate'][i], derivative, msg=parameter)
+            self.assertAlmostEqual(sensitivity.elasticity['net_profit_on_realestate'][i],
+                                   derivative * inputs[parameter] / base.net_profit_on_realestate, msg=parameter)
+
+        # Profit increases with rent
+        gross_rental_yield = sensitivity.parameters.index('gross_rental_yield')
+        self.assertGreater(sensitivity.derivative['net_profit_on_realestate'][gross_rental_yield], 0)
+
+    def test_parameters(self):
+        inputs = dict(self._sample_inputs(), renovation_cost=0)
+        sensitivity = Sensitivity(inputs=inputs, parameters=['mortgage_rate', 'renovation_cost'], relative_bump=0.1)
+        np.testing.assert_allclose(sensitivity.bump, [0.001, 0.1])
+        self.assertRaises(ValueError, Sensitivity, inputs=inputs, parameters=['mortgage_tenor'])
+        self.assertRaises(ValueError, Sensitivity, inputs=inputs, parameters=['renewal_income_rate'])
+
+    def test_tornado(self):
+        sensitivity = Sensitivity(inputs=self._sample_inputs(), outputs=['net_profit_on_realestate'],
+                                  relative_bump=0.1)
+        tornado = sensitivity.tornado('net_profit_on_realestate')
+        self.assertEqual(len(tornado), len(sensitivity.parameters))
+        swings = [abs(high - low) for _, low, high in tornado]
+        self.assertEqual(swings, sorted(swings, reverse=True))
@@ -0,0 +1,164 @@
+from japanrealestate import server as server_module
+from japanrealestate.server import EvaluationServer, evaluate_scenarios
+from japanrealestate.sweeprunner import run_scenario
+from unittest import TestCase, mock
+import asyncio
+import json
+
+
+async def _request(port, method, path, payload=None):
+    """Sends a request to the server on localhost, and returns (HTTP status, JSON payload) of the response"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = b'' if payload is None else json.dumps(payload).encode()
+    writer.write('{} {} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {}\r\nConnection: close\r\n\r\n'.format(
+        method, path, len(body)).encode() + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    response = await reader.read()
+    writer.close()
+    return status, json.loads(response.split(b'\r\n\r\n', 1)[1])
+
+
+class TestServer(TestCase):
+    @staticmethod
+    def _sample_scenario(monthly_fees=20000, employment_income=20000000):
+        return {
+            'income_tax_calc_params': {
+                'employment_income': employment_income,
+                'current_date': '2016-01-01',
+            },
+            'real_estate_calc_params': {
+                'purchase_date': '2017-01-24',
+                'purchase_price': 100000000,
+                'mortgage_loan_to_value': 0.9,
+                'mortgage_tenor': 30,
+                'mortgage_rate': 0.01,
+                'monthly_fees': monthly_fees,
+                'calc_year': 5,
+                'gross_rental_yield': 0.04,
+            },
+            'outputs': ['net_income_after_taxes', 'net_profit_on_realestate'],
+        }
+
+    def test_evaluate_scenarios(self):
+        scenarios = [self._sample_scenario(monthly_fees, employment_income)
+                     for monthly_fees in (10000, 30000) for employment_income in (0, 20000000)]
+        scenarios[1]['real_estate_calc_params']['sale_price'] = 90000000
+        results = evaluate_scenarios(scenarios + [{}])
+
+        for scenario, result in zip(scenarios, results):
+            self.assertEqual(result, run_scenario(scenario, scenario['outputs']))
+        self.assertIsInstance(results[-1], ValueError)
+
+        scenario = self._sample_scenario()
+        scenario['real_estate_calc_params']['unknown'] = 1
+        self.assertIsInstance(evaluate_scenarios([scenario])[0], ValueError)
+
+    def test_evaluate_scenarios_invalid(self):
+        """An invalid scenario only fails itself, not the valid scenarios calculated in the same batch"""
+        invalid_params = [{'calc_yaer': 5}, {'purchase_price': '100000000'}, {'is_primary_residence': 5},
+                          {'purchase_date': 'not a date'}]
+        for params in invalid_params:
+            invalid_scenario = self._sample_scenario()
+            invalid_scenario['real_estate_calc_params'].update(params)
+            scenarios = [self._sample_scenario(10000), self._sample_scenario(30000), invalid_scenario]
+
+            results = evaluate_scenarios(scenarios)
+            for scenario, result in zip(scenarios[:2], results):
+                self.assertEqual(result, run_scenario(scenario, scenario['outputs']))
+            self.assertIsInstance(results[2], ValueError, params)
+
+    def test_server(self):
+        async def run():
+            server = EvaluationServer(batch_window=0.05)
+            await server.start()
+            try:
+                scenarios = [self._sample_scenario(monthly_fees) for monthly_fees in range(10000, 60000, 10000)]
+                responses = await asyncio.gather(*(_request(server.port, 'POST', '/evaluate', scenario)
+                                                   for scenario in scenarios))
+                stats = (await _request(server.port, 'GET', '/stats'))[1]
+                errors = [await _request(server.port, 'POST', '/evaluate', {'real_estate_calc_params': {'x': 1}}),
+                          await _request(server.port, 'GET', '/unknown')]
+            finally:
+                await server.close()
+            return scenarios, responses, stats, errors
+
+        scenarios, responses, stats, errors = asyncio.run(run())
+        for scenario, (status, result) in zip(scenarios, responses):
+            self.assertEqual(status, 200)
+            self.assertEqual(result, run_scenario(scenario, scenario['outputs']))
+
+        # Concurrent requests are calculated in a single batch
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['completed'], 5)
+        self.assertEqual(stats['batches'], 1)
+        self.assertEqual(stats['largest_batch'], 5)
+
+        self.assertEqual([status for status, _ in errors], [400, 404])
+
+    def test_server_invalid_request(self):
+        """An invalid request coalesced with a valid request only fails itself"""
+        async def run():
+            server = EvaluationServer(batch_window=0.05)
+            await server.start()
+            try:
+                invalid_scenario = self._sample_scenario()
+                invalid_scenario['real_estate_calc_params']['is_primary_residence'] = 5
+                responses = await asyncio.gather(_request(server.port, 'POST', '/evaluate', self._sample_scenario()),
+                                                 _request(server.port, 'POST', '/evaluate', invalid_scenario))
+            finally:
+                await server.close()
+            return responses, server.stats()
+
+        responses, stats = asyncio.run(run())
+        (status, result), (invalid_status, _) = responses
+        self.assertEqual(status, 200)
+        self.assertEqual(result, run_scenario(self._sample_scenario(), self._sample_scenario()['outputs']))
+        self.assertEqual(invalid_status, 400)
+        self.assertEqual(stats['batches'], 1)
+        self.assertEqual((stats['completed'], stats['errors']), (1, 1))
+
+    def test_server_batch_error(self):
+        """A batch whose evaluation fails returns 500 to its requests, and the next batches are still calculated"""
+        async def run():
+            server = EvaluationServer(batch_window=0.05)
+            await server.start()
+            try:
+                # With a timeout, as requests would otherwise wait forever if the batches stopped being calculated
+                with mock.patch.object(server_module, 'evaluate_scenarios', side_effect=MemoryError('out of memory')):
+                    failed = await asyncio.wait_for(
+                        _request(server.port, 'POST', '/evaluate', self._sample_scenario()), 10)
+                succeeded = await asyncio.wait_for(
+                    _request(server.port, 'POST', '/evaluate', self._sample_scenario()), 10)
+            finally:
+                await server.close()
+            return failed, succeeded, server.stats()
+
+        (failed_status, failed_result), (status, result), stats = asyncio.run(run())
+        self.assertEqual(failed_status, 500)
+        self.assertIn('out of memory', failed_result['error'])
+        self.assertEqual(status, 200)
+        self.assertEqual(result, run_scenario(self._sample_scenario(), self._sample_scenario()['outputs']))
+        self.assertEqual((stats['completed'], stats['errors']), (1, 1))
+
+    def test_backpressure(self):
+        """Requests are rejected when the queue is full"""
+        async def run():
+            server = EvaluationServer(batch_window=0.05, max_queue_size=2)
+            await server.start()
+            try:
+                responses = await asyncio.gather(*(_request(server.port, 'POST', '/evaluate', self._sample_scenario())
+                                                   for _ in range(5)))
+            finally:
+                await server.close()
+            return responses, server.stats()
+
+        responses, stats = asyncio.run(run())
+        statuses = [status for status, _ in responses]
+        self.assertEqual(set(statuses), {200, 503})
+
+        # At most the 2 queued requests and the first request of the batch are accepted
+        self.assertLessEqual(statuses.count(200), 3)
+        self.assertEqual(stats['rejected'], statuses.count(503))
+        self.assertEqual(stats['completed'], statuses.count(200))
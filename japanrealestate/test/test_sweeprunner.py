@@ -0,0 +1,104 @@
+from japanrealestate.incometaxcalc import IncomeTaxCalc
+from japanrealestate.projection import Projection
+from japanrealestate.realestatecalc import RealEstateCalc
+from japanrealestate.sweeprunner import SweepRunner, run_scenario, run_scenario_years, scenario_calculators
+from unittest import TestCase, mock
+import datetime as dt
+
+
+class TestSweepRunner(TestCase):
+    @staticmethod
+    def _sample_scenario(monthly_fees=20000):
+        return {
+            'income_tax_calc_params': {
+                'employment_income': 20000000,
+                'rent': 2400000,
+                'is_rent_program': True,
+                'other_income': 1000000,
+                'number_of_dependents': 2,
+                'social_security_expense': None,
+                'is_resident_for_tax_purposes': True,
+                'current_date': '2016-01-01',
+            },
+            'real_estate_calc_params': {
+                'purchase_date': '2017-01-24',
+                'purchase_price': 100000000,
+                'building_to_land_ratio': 0.7,
+                'size': 100,
+                'age': 10,
+                'mortgage_loan_to_value': 0.9,
+                'mortgage_tenor': 30,
+                'mortgage_rate': 0.01,
+                'monthly_fees': monthly_fees,
+                'property_tax_rate': 0.01,
+                'calc_year': 5,
+                'gross_rental_yield': 0.04,
+                'is_resident_for_tax_purposes': True,
+            },
+        }
+
+    def test_scenario_calculators(self):
+        income_tax_calc, real_estate_calc = scenario_calculators(self._sample_scenario())
+        self.assertEqual(income_tax_calc.current_date, dt.date(2016, 1, 1))
+        self.assertEqual(real_estate_calc.purchase_date, dt.date(2017, 1, 24))
+        self.assertIs(real_estate_calc.income_tax_calculator, income_tax_calc)
+
+        scenario = self._sample_scenario()
+        del scenario['income_tax_calc_params']
+        income_tax_calc, real_estate_calc = scenario_calculators(scenario)
+        self.assertIsNone(income_tax_calc)
+        self.assertEqual(real_estate_calc.income_tax_real_estate, 0)
+
+    def test_run_scenario(self):
+        scenario = self._sample_scenario()
+        expected = RealEstateCalc(
+            income_tax_calculator=IncomeTaxCalc(**dict(scenario['income_tax_calc_params'],
+                                                       current_date=dt.date(2016, 1, 1))),
+            **dict(scenario['real_estate_calc_params'], purchase_date=dt.date(2017, 1, 24)))
+
+        result = run_scenario(scenario)
+        self.assertNotIn('mortgage', result)
+        self.assertNotIn('income_tax_calculator', result)
+        self.assertEqual(result['net_income_after_taxes'], expected.net_income_after_taxes)
+        self.assertEqual(result['cumulative_net_income'], expected.cumulative_net_income)
+
+        result = run_scenario(scenario, outputs=['net_income_after_taxes', 'capital_gains_tax'])
+        self.assertEqual(result, {'net_income_after_taxes': expected.net_income_after_taxes,
+                                  'capital_gains_tax': expected.capital_gains_tax})
+
+    def test_run_scenario_years(self):
+        scenario = self._sample_scenario()
+        results = run_scenario_years(scenario, outputs=['net_income_after_taxes', 'purchase_initial_outlay'])
+        self.assertEqual(len(results), 6)
+
+        for year, result in enumerate(results):
+            year_scenario = self._sample_scenario()
+            year_scenario['real_estate_calc_params']['calc_year'] = year
+            expected = run_scenario(year_scenario, outputs=['net_income_after_taxes', 'purchase_initial_outlay'])
+            self.assertEqual(result, dict(calc_year=year, **expected))
+
+        self.assertEqual(list(run_scenario_years(scenario)[0]), ['calc_year'] + Projection._YEARLY_FIELDS)
+
+        # The yearly fields are only calculated by the projection, once per year
+        calculate = RealEstateCalc._calculate_net_income_after_taxes
+        with mock.patch.object(RealEstateCalc, '_calculate_net_income_after_taxes', autospec=True,
+                               side_effect=calculate) as calculate_mock:
+            run_scenario_years(scenario)
+        self.assertEqual(calculate_mock.call_count, 6)
+
+    def test_run(self):
+        scenarios = [self._sample_scenario(monthly_fees=monthly_fees) for monthly_fees in range(0, 100000, 10000)]
+        expected = [run_scenario(scenario, outputs=['net_income_after_taxes']) for scenario in scenarios]
+
+        with SweepRunner(max_workers=2, chunk_size=3, outputs=['net_income_after_taxes']) as runner:
+            self.assertEqual(list(runner.run(scenarios)), list(enumerate(expected)))
+
+            # The same workers are re-used, and scenarios can be a generator
+            results = runner.run((scenario for scenario in scenarios), ordered=False)
+            self.assertEqual(sorted(results, key=lambda result: result[0]), list(enumerate(expected)))
+
+            self.assertEqual(list(runner.run([])), [])
+
+    def test_chunk_size(self):
+        with self.assertRaises(ValueError):
+            SweepRunner(max_workers=1, chunk_size=0)
@@ -1,4 +1,4 @@
-from distutils.core import setup
+from setuptools import setup
 
 with open("README.md", 'r') as f:
     long_description = f.read()
@@ -17,6 +17,11 @@ setup(
     install_requires=[
         'numpy',
         'python-dateutil',
-    ]
+    ],
+    entry_points={
+        'console_scripts': [
+            'japanrealestate = japanrealestate.cli:main',
+        ],
+    },
 )
 